@@ -1,5 +1,14 @@
+import contextvars
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
-from dbconfig import get_connection
+from dbconfig import POOL_SIZE, connection
+from cache import DataCache
+from profiling import timed, unwrap
 
 PLACEMENT_ORDER = [
     "Not Eligible",
@@ -11,49 +20,263 @@ PLACEMENT_ORDER = [
     "Unable to Clear GD"
 ]
 
+STATUS_LABELS = {
+    0: "Not Eligible",
+    1: "Unable to Clear 1st Round",
+    3: "Unable to Clear Technicals",
+    4: "Unable to Clear HR",
+    9: "Shortlisted",
+    10: "Placed",
+    2: "Unable to Clear GD"
+}
+STATUS_CODES = {label: code for code, label in STATUS_LABELS.items()}
+
+JOIN_CLAUSE = """
+    FROM student s
+    LEFT JOIN performance p ON s.usn = p.usn
+    LEFT JOIN hiring h ON p.cid = h.cid
+    LEFT JOIN company c ON h.cid = c.cid
+"""
+
 def map_status(code: int) -> str:
-    mapping = {
-        0: "Not Eligible",
-        1: "Unable to Clear 1st Round",
-        3: "Unable to Clear Technicals",
-        4: "Unable to Clear HR",
-        9: "Shortlisted",
-        10: "Placed",
-        2: "Unable to Clear GD"
-    }
-    return mapping.get(code, "Unknown")
-
-def load_all_data():
-    conn = get_connection()
-
-    student_df = pd.read_sql("SELECT * FROM student", conn)
-    company_df = pd.read_sql("SELECT * FROM company", conn)
-    performance_df = pd.read_sql("SELECT * FROM performance", conn)
-    hiring_df = pd.read_sql("SELECT * FROM hiring", conn)
-
-    # Build combined_df with joins
-    query = """
-        SELECT s.usn, s.name, s.dept, s.batch, s.cgpa,
-               p.status, c.company, h.ctc
-        FROM student s
-        LEFT JOIN performance p ON s.usn = p.usn
-        LEFT JOIN hiring h ON p.cid = h.cid
-        LEFT JOIN company c ON h.cid = c.cid
-    """
-    combined_df = pd.read_sql(query, conn)
-    conn.close()
-
-    combined_df["Placement_status"] = combined_df["status"].apply(map_status)
-    combined_df["Placement_status"] = pd.Categorical(
-        combined_df["Placement_status"],
-        categories=PLACEMENT_ORDER,
-        ordered=True
-    )
+    return STATUS_LABELS.get(code, "Unknown")
+
+# --- Data cache ---
+CACHE_TTL_SECONDS = 600        # hard upper bound on the age of cached data
+CACHE_PROBE_SECONDS = 30       # how often the change-detection probe may run
+CACHE_MAX_BYTES = 1024 ** 3    # memory cap before least-recently-used eviction
+
+# Per-table fingerprint: the row count plus an order-independent checksum
+# over every column of every row, so edits that keep counts and sums the
+# same (two rows swapping status, a renamed company) are seen as well.
+PROBE_TABLES = ["student", "company", "performance", "hiring"]
+# dialect -> (row expression, column separator, NULL-safe column)
+CHECKSUM_SQL = {
+    "mysql": ("CONCAT_WS('|', {})", ", ", "IFNULL({}, '')"),
+    "sqlite": ("{}", " || '|' || ", "COALESCE({}, '')"),
+}
+
+data_cache = DataCache(ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES,
+                       probe_interval=CACHE_PROBE_SECONDS)
+
+def crc32(text):
+    return zlib.crc32(str(text).encode())
+
+def probe_queries(conn):
+    dialect = "sqlite" if isinstance(unwrap(conn), sqlite3.Connection) else "mysql"
+    if dialect == "sqlite":
+        unwrap(conn).create_function("CRC32", 1, crc32, deterministic=True)
+    row, separator, column = CHECKSUM_SQL[dialect]
+    cursor = conn.cursor()
+    queries = {}
+    for table in PROBE_TABLES:
+        cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+        columns = separator.join(column.format(d[0]) for d in cursor.description)
+        cursor.fetchall()
+        queries[table] = f"SELECT COUNT(*), COALESCE(SUM(CRC32({row.format(columns)})), 0) FROM {table}"
+    cursor.close()
+    return queries
+
+def probe_tables(conn):
+    cursor = conn.cursor()
+    signature = []
+    for table, sql in probe_queries(conn).items():
+        cursor.execute(sql)
+        signature.append((table,) + tuple(cursor.fetchone()))
+    cursor.close()
+    return tuple(signature)
+
+def table_signature():
+    with connection() as conn:
+        return probe_tables(conn)
+
+def invalidate_data():
+    data_cache.invalidate("all_data")
+
+# Refresh by pulling only changed rows into the previous snapshot
+# (see incremental) instead of re-running the full join.
+INCREMENTAL_REFRESH = True
+
+# Raw tables read next to the joined frame on a full load (see TABLE_QUERIES)
+LOAD_TABLES = "options"
+
+@timed
+def load_all_data(use_cache=True, incremental=INCREMENTAL_REFRESH):
+    from backends import current_backend
+    backend = current_backend()
+    loader = lambda: backend.fetch_all_data(LOAD_TABLES)
+    if incremental and backend.supports_sql:
+        from incremental import sync_all_data
+        loader = lambda: sync_all_data(backend.name, LOAD_TABLES)
+    if not use_cache:
+        return loader()
+    return data_cache.get("all_data", loader, probe=backend.signature)
+
+# --- Concurrent load ---
+# "full" reads every raw table whole (snapshots, incremental sync); "options"
+# reads only what the dashboard takes from them beyond the joined frame, the
+# sidebar options, and returns empty performance/hiring frames.
+TABLE_QUERIES = {
+    "full": {
+        "student": "SELECT * FROM student",
+        "company": "SELECT * FROM company",
+        "performance": "SELECT * FROM performance",
+        "hiring": "SELECT * FROM hiring",
+    },
+    "options": {
+        "student": "SELECT DISTINCT dept, batch FROM student",
+        "company": "SELECT DISTINCT company FROM company",
+    },
+}
+COMBINED_QUERY = """
+    SELECT s.usn, s.name, s.dept, s.batch, s.cgpa,
+           p.status, c.company, h.ctc
+""" + JOIN_CLAUSE
+
+class DataLoadError(Exception):
+    pass
+
+# Steps (queries, files) finished of the load in flight, for the dashboard's
+# progress bar while the data loads in the background (see store)
+class LoadProgress:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start(0)
+
+    def start(self, steps):
+        with self._lock:
+            self.steps, self.done, self.last = steps, 0, None
+
+    def advance(self, step):
+        with self._lock:
+            self.done += 1
+            self.last = step
 
+    def fraction(self):
+        with self._lock:
+            return min(self.done / self.steps, 1.0) if self.steps else 0.0
+
+    def describe(self):
+        with self._lock:
+            return f"{self.last} ({self.done}/{self.steps})" if self.last else "connecting"
+
+load_progress = LoadProgress()
+
+def read_frame(sql):
+    with connection() as conn:
+        return pd.read_sql(sql, conn)
+
+def read_frames(queries, workers=POOL_SIZE):
+    # Each query runs on its own pooled connection; the first failure cancels
+    # what has not started yet and is re-raised naming the query.
+    frames = {}
+    load_progress.start(len(queries))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(queries)))) as pool:
+        futures = {pool.submit(contextvars.copy_context().run, read_frame, sql): name
+                   for name, sql in queries.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                frames[name] = future.result()
+                load_progress.advance(name)
+            except Exception as exc:
+                for pending in futures:
+                    pending.cancel()
+                raise DataLoadError(f"Loading {name} failed: {exc}") from exc
+    return frames
+
+@timed
+def fetch_all_data(tables="full"):
+    queries = dict(TABLE_QUERIES[tables], combined=COMBINED_QUERY)
+    frames = read_frames(queries)
+    combined_df = compact_frame(frames.pop("combined"))
+    student_df, company_df, performance_df, hiring_df = (
+        frames.get(table, pd.DataFrame()) for table in TABLE_QUERIES["full"])
     return student_df, company_df, performance_df, hiring_df, combined_df
 
-def apply_filters(df, batch_filter="All", dept_filter="All", company_filter="All"):
-    filtered = df.copy()
+# --- Compact representation ---
+# Dictionary-encoded categoricals for the repeated string columns (the usn
+# categorical is the integer-coded USN with its lookup table in .categories),
+# float32 measures and a vectorized status mapping.
+CATEGORY_COLUMNS = ["usn", "name", "dept", "batch", "company"]
+FLOAT32_COLUMNS = ["cgpa", "ctc"]
+
+memory_report = {}
+
+def frame_memory(df) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+@timed
+def map_status_codes(codes):
+    return pd.Categorical(codes.map(STATUS_LABELS), categories=PLACEMENT_ORDER, ordered=True)
+
+@timed
+def compact_frame(df):
+    before = frame_memory(df)
+    compact = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        if column in CATEGORY_COLUMNS:
+            compact[column] = df[column].astype("category")
+        elif column in FLOAT32_COLUMNS:
+            compact[column] = pd.to_numeric(df[column], errors="coerce").astype("float32")
+        elif column == "status":
+            compact[column] = df[column].astype("Int8")
+        else:
+            compact[column] = df[column]
+    compact["Placement_status"] = map_status_codes(df["status"])
+
+    memory_report.update(before=before, after=frame_memory(compact))
+    return compact
+
+# --- Filter index ---
+# value -> sorted row positions for every sidebar filter column, so a filter
+# costs time proportional to the matching rows instead of a full scan.
+FILTER_COLUMNS = ["batch", "dept", "company"]
+
+class FilterIndex:
+    @timed(name="analyzer.FilterIndex")
+    def __init__(self, df):
+        self.size = len(df)
+        self.positions = {
+            column: df.groupby(column, observed=True, sort=False).indices
+            for column in FILTER_COLUMNS
+        }
+        self.batches = sorted(df["batch"].dropna().unique())
+        recent = self.batches[-3:] if len(self.batches) >= 3 else []
+        self.recent = np.sort(np.concatenate([self.positions["batch"][b] for b in recent])) if recent else None
+
+    def rows(self, column, value):
+        return self.positions[column].get(value, np.empty(0, dtype=np.intp))
+
+    def lookup(self, batch_filter="All", dept_filter="All", company_filter="All"):
+        # Returns sorted row positions, or None when no filter applies
+        lists = []
+        if batch_filter == "Last 3 Years":
+            if self.recent is not None:
+                lists.append(self.recent)
+        elif batch_filter != "All":
+            lists.append(self.rows("batch", batch_filter))
+        if dept_filter != "All":
+            lists.append(self.rows("dept", dept_filter))
+        if company_filter != "All":
+            lists.append(self.rows("company", company_filter))
+        if not lists:
+            return None
+        lists.sort(key=len)
+        result = lists[0]
+        for positions in lists[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, positions, assume_unique=True)
+        return result
+
+@timed
+def apply_filters(df, batch_filter="All", dept_filter="All", company_filter="All", index=None):
+    if index is not None:
+        positions = index.lookup(batch_filter, dept_filter, company_filter)
+        return df if positions is None else df.take(positions)
+
+    filtered = df
 
     # Batch filter
     if batch_filter == "Last 3 Years":
@@ -72,3 +295,19 @@ def apply_filters(df, batch_filter="All", dept_filter="All", company_filter="All
         filtered = filtered[filtered["company"] == company_filter]
 
     return filtered
+
+@timed
+def kpi_summary(df):
+    total_students = df["usn"].nunique()
+    placed_students = df[df["Placement_status"] == "Placed"]["usn"].nunique()
+    shortlisted_students = df[df["Placement_status"] == "Shortlisted"]["usn"].nunique()
+    return kpi_values(total_students, placed_students, shortlisted_students)
+
+def kpi_values(total_students, placed_students, shortlisted_students):
+    placement_rate = ((placed_students + shortlisted_students) / total_students * 100) if total_students > 0 else 0
+    return {
+        "total_students": total_students,
+        "placed_students": placed_students,
+        "shortlisted_students": shortlisted_students,
+        "placement_rate": placement_rate,
+    }
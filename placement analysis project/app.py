@@ -1,38 +1,175 @@
+import os
+import uuid
+from concurrent.futures import wait
 import streamlit as st
-import pandas as pd
-from analyzer import load_all_data, apply_filters
-import visualization as vz
+from profiling import PROFILE_MODES, start_profile, finish_profile
+
+# "pandas" loads the full tables once and aggregates in memory;
+# "cube" answers the charts from the aggregate cube built once per load;
+# "sketch" does the same with approximate (HyperLogLog) student counts;
+# "sql" pushes filters and aggregates down to the database;
+# "worker" asks a shared aggregation worker (python worker.py) for everything.
+QUERY_MODE = os.environ.get("PLACEMENT_QUERY_MODE", "pandas")
+
+# Charts sit in tabs and only the open tab's aggregate is computed; set
+# PLACEMENT_LAZY_CHARTS=0 to compute and draw every chart on each rerun.
+LAZY_CHARTS = os.environ.get("PLACEMENT_LAZY_CHARTS", "1") == "1"
+
+# Default for the sidebar "Profile renders" switch
+PROFILE_RENDERS = os.environ.get("PLACEMENT_PROFILE", "") == "1"
 
 # --- Page Config ---
 st.set_page_config(page_title="Placement Analysis Dashboard", layout="wide")
 st.title("📊 Placement Analysis Dashboard")
 
-# --- Load all data once ---
-student_df, company_df, performance_df, hiring_df, combined_df = load_all_data()
+# --- Performance panel (per session) ---
+perf_panel = st.sidebar.expander("⏱ Performance", expanded=PROFILE_RENDERS)
+with perf_panel:
+    profile_on = st.checkbox("Profile renders", value=PROFILE_RENDERS)
+    profile_mode = st.selectbox("Profiler", PROFILE_MODES, disabled=not profile_on)
+    trace_memory = st.checkbox("Track memory", disabled=not profile_on,
+                               help="Measured only while no other session is profiling")
+
+# A rerun that was interrupted leaves its profile running; close it first
+if "render_profile" in st.session_state:
+    finish_profile(st.session_state.pop("render_profile"))
+if profile_on:
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex[:8])
+    st.session_state["render_profile"] = start_profile(session_id, profile_mode, trace_memory)
+
+# --- Data modules ---
+# Imported once the page shell is on screen: pandas, numpy and the data
+# layer are most of a cold start, and nothing above needs them (Plotly
+# and the MySQL driver load later still, on first use).
+from analyzer import apply_filters, invalidate_data
+import analyzer
+import visualization as vz
+import query_builder as qb
+from cube import cube_for, sketch_cube_for
+from sketch import relative_error
+from trends import TREND_METRICS, trends_for
+from store import shared_store
+from backends import current_backend
+from figure_cache import cached_aggregates, cached_result, chart_key
+from export import EXPORT_FORMATS, PIVOT_INDEX, export_file
+from metrics import DashboardMetrics, MetricsEngine
+from records import PAGE_SIZES, RecordsView, records_view
+from worker import WorkerError, default_client
+
+def wait_for_data(loading, poll=0.1):
+    # Progress of the background load (other sessions may be waiting on it too)
+    bar = st.progress(0.0, text="Loading placement data…")
+    while not loading.done():
+        progress = analyzer.load_progress
+        bar.progress(progress.fraction(), text=f"Loading placement data… {progress.describe()}")
+        wait([loading], timeout=poll)
+    bar.empty()
+
+# --- Load all data (one shared snapshot for every session, swapped on refresh) ---
+if QUERY_MODE == "worker":
+    client = default_client()
+if st.sidebar.button("🔄 Refresh Data"):
+    if QUERY_MODE == "worker":
+        client.refresh()
+    else:
+        invalidate_data()
+    st.session_state.pop("chart_memo", None)
+    st.session_state.pop("trend_engine", None)
+
+if QUERY_MODE == "sql":
+    st.sidebar.caption(f"Data source: {current_backend().name}")
+    dept_list, batch_list, company_list = qb.fetch_filter_options()
+elif QUERY_MODE == "worker":
+    try:
+        worker_info = client.info()
+    except WorkerError as exc:
+        st.error(f"⚠ {exc}")
+        st.stop()
+    worker_version = worker_info["version"]
+    st.sidebar.caption(f"Data source: {worker_info['backend']} via aggregation worker at {client.address} "
+                       f"({worker_info['mode']} mode, {worker_info['processes']} processes)")
+    dept_list, batch_list, company_list = cached_result("options", (QUERY_MODE, worker_version), client.filter_options)
+else:
+    st.sidebar.caption(f"Data source: {current_backend().name}")
+    loading = shared_store.load_in_background()
+    if not loading.done():
+        wait_for_data(loading)
+    snapshot = loading.result()
+    combined_df = snapshot.combined_df
+    dept_list, batch_list, company_list = snapshot.options
+    memory_report = analyzer.memory_report
+    if memory_report:
+        st.sidebar.caption(f"Data in memory: {memory_report['after'] / 1024**2:.1f} MB "
+                           f"(was {memory_report['before'] / 1024**2:.1f} MB)")
 
 # --- Sidebar Filters ---
 st.sidebar.header("Criteria ")
 
-dept_options = ["All"] + sorted(student_df["dept"].dropna().unique().tolist())
+dept_options = ["All"] + dept_list
 dept_filter = st.sidebar.selectbox("Select Department", dept_options)
 
-batch_list = sorted(student_df["batch"].dropna().unique().tolist())
 batch_options = ["All", "Last 3 Years"] + batch_list
 batch_filter = st.sidebar.selectbox("Select Batch", batch_options)
 
-company_options = ["All"] + sorted(company_df["company"].dropna().unique().tolist())
+company_options = ["All"] + company_list
 company_filter = st.sidebar.selectbox("Select Company", company_options)
 
 # --- Apply filters ---
-df = apply_filters(combined_df, batch_filter, dept_filter, company_filter)
+filters = (batch_filter, dept_filter, company_filter)
+if QUERY_MODE == "sql":
+    # Only aggregates and one page of records are read (see records_view)
+    chart_cache_key = None
+    df = None
+    compute_one = lambda name: qb.fetch_aggregate(name, *filters)
+    compute_all = lambda: qb.fetch_aggregates(*filters)
+elif QUERY_MODE == "worker":
+    # The worker pages the records too (see WorkerRecordsView)
+    chart_cache_key = (QUERY_MODE, worker_version, filters)
+    df = None
+    compute_one = lambda name: client.aggregate(name, *filters)
+    compute_all = lambda: client.aggregates(*filters)
+else:
+    chart_cache_key = (QUERY_MODE, snapshot.version, filters)
+    df = apply_filters(combined_df, *filters, index=snapshot.filter_index)
+    if QUERY_MODE in ("cube", "sketch"):
+        build = cube_for if QUERY_MODE == "cube" else sketch_cube_for
+        view = lambda: snapshot.derived(QUERY_MODE, lambda s: build(s.combined_df)).slice(*filters)
+        compute_one = lambda name: view().aggregate(name)
+        compute_all = lambda: view().aggregates()
+    else:
+        # One reduction of the filtered rows per filter set answers the KPIs
+        # and every chart (see metrics); only the small result is cached
+        compute_all = lambda: cached_result("metrics", chart_cache_key, lambda: MetricsEngine(df).metrics())
+        compute_one = lambda name: compute_all()[name]
+
+def aggregate(name):
+    # Process-wide cache when the data is versioned, else a per-session memo
+    # that lasts while the filters stay the same
+    if chart_cache_key is not None:
+        return cached_result("aggregate", chart_key(chart_cache_key, name), lambda: compute_one(name))
+    memo = st.session_state.get("chart_memo")
+    if memo is None or memo["filters"] != filters:
+        memo = st.session_state["chart_memo"] = {"filters": filters, "values": {}}
+    if name not in memo["values"]:
+        memo["values"][name] = compute_one(name)
+    return memo["values"][name]
+
+if LAZY_CHARTS:
+    kpis = aggregate("kpis")
+else:
+    aggs = DashboardMetrics.of(cached_aggregates(chart_cache_key, compute_all))
+    kpis = aggs.kpis
 
 # --- KPI Summary ---
 st.subheader("📌 Key Placement Metrics")
+if QUERY_MODE == "sketch":
+    st.caption(f"Student counts are estimates: within ±{2 * relative_error():.1%} for 95% of counts, "
+               "usually exact for small groups.")
 
-total_students = df["usn"].nunique()
-placed_students = df[df["Placement_status"] == "Placed"]["usn"].nunique()
-shortlisted_students = df[df["Placement_status"] == "Shortlisted"]["usn"].nunique()
-placement_rate = ((placed_students + shortlisted_students) / total_students * 100) if total_students > 0 else 0
+total_students = kpis["total_students"]
+placed_students = kpis["placed_students"]
+shortlisted_students = kpis["shortlisted_students"]
+placement_rate = kpis["placement_rate"]
 
 card_style = """
     <div style="background-color:{bg}; padding:20px; border-radius:15px;
@@ -55,34 +192,98 @@ st.markdown("---")
 
 # --- Graphs ---
 st.subheader("📊 Placement Analysis Graphs")
-if not df.empty:
-    color_set = vz.plot_overall_status(df)
-    vz.plot_top_recruiters(df)
-    vz.plot_batch_wise(df)
-    vz.plot_branch_wise(df)
-    vz.plot_salary_trends(df)
-    vz.plot_conversion_rates(df)
-    vz.plot_cgpa_bins(df, color_set)
-else:
+has_data = kpis["total_students"] > 0 if df is None else not df.empty
+if not has_data:
     st.info("⚠ No data available for selected filters.")
+elif LAZY_CHARTS:
+    tabs = st.tabs(list(vz.CHARTS.values()), on_change="rerun", key="chart_tab")
+    for name, tab in zip(vz.CHARTS, tabs):
+        if tab.open:
+            with tab:
+                vz.render_chart(name, aggregate(name), key=chart_key(chart_cache_key, name))
+else:
+    vz.render_aggregates(aggs, key=chart_cache_key)
+
+st.markdown("---")
+
+# --- Placement Trends (across every batch; the batch filter does not apply) ---
+st.subheader("📈 Placement Trends")
+TREND_COMPARE = {"Department": "dept", "Company": "company", "Overall": None}
+col1, col2, col3 = st.columns(3)
+with col1:
+    trend_metric = st.selectbox("Metric", list(TREND_METRICS), format_func=TREND_METRICS.get)
+with col2:
+    trend_window = st.slider("Rolling window (batches)", 1, 5, 1)
+with col3:
+    trend_by = TREND_COMPARE[st.selectbox("Compare by", list(TREND_COMPARE))]
+
+trend_args = (trend_by, trend_window, dept_filter, company_filter)
+if QUERY_MODE == "sql":
+    # Built once per session from per-batch counts and kept until Refresh
+    if "trend_engine" not in st.session_state:
+        st.session_state["trend_engine"] = qb.fetch_trend_engine()
+    trend_cache_key = None
+    compute_trend = lambda: st.session_state["trend_engine"].trends(*trend_args)
+elif QUERY_MODE == "worker":
+    trend_cache_key = (QUERY_MODE, worker_version) + trend_args
+    compute_trend = lambda: client.trends(*trend_args)
+else:
+    trend_cache_key = (QUERY_MODE, snapshot.version) + trend_args
+    compute_trend = lambda: snapshot.derived("trends", lambda s: trends_for(s.combined_df)).trends(*trend_args)
+trend = cached_result("trends", trend_cache_key, compute_trend)
+vz.render_trends(trend, trend_metric, trend_by, key=chart_key(trend_cache_key, trend_metric))
 
 st.markdown("---")
 
 # --- Hiring Records ---
 st.subheader("📑 Hiring Records Table")
-if not df.empty:
-    pivot_df = df.pivot_table(
-        index=["usn", "name", "dept", "batch", "cgpa"],
-        columns="company",
-        values="Placement_status",
-        aggfunc="first"
-    ).reset_index()
-    st.dataframe(pivot_df, use_container_width=True, height=500)
+if has_data:
+    if QUERY_MODE == "worker":
+        records = client.records_view(*filters)
+    elif df is None:
+        records = records_view(*filters)
+    else:
+        records = cached_result("records", chart_cache_key, lambda: RecordsView(df))
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        search = st.text_input("Search USN / Name / Company")
+    with col2:
+        sort_by = st.selectbox("Sort by", PIVOT_INDEX)
+    with col3:
+        ascending = st.selectbox("Order", ["Ascending", "Descending"]) == "Ascending"
+    with col4:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES)
+
+    total_rows = records.count(search)
+    page_count = records.page_count(total_rows, page_size)
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1,
+                           key=f"records_page_{search}_{page_size}_{page_count}")
+    page_df, total_rows = records.page(page, page_size, sort_by, ascending, search)
+    st.caption(f"{total_rows} students")
+    st.dataframe(page_df, use_container_width=True, height=500)
+    fetch_export = (lambda: client.records(*filters)) if QUERY_MODE == "worker" else (lambda: qb.fetch_records(*filters))
+    export_format = st.selectbox("Export format", list(EXPORT_FORMATS))
+    file_name, mime = EXPORT_FORMATS[export_format]
     st.download_button(
-        label="📥 Download CSV",
-        data=pivot_df.to_csv(index=False).encode("utf-8"),
-        file_name="hiring_records.csv",
-        mime="text/csv"
+        label="📥 Download",
+        # Streamed in chunks on click; SQL and worker modes read the records only then
+        data=lambda: export_file(fetch_export() if df is None else df, export_format),
+        file_name=file_name,
+        mime=mime
     )
 else:
     st.info("⚠ No hiring records available for the selected filters.")
+
+# --- Performance report ---
+if "render_profile" in st.session_state:
+    profile = finish_profile(st.session_state.pop("render_profile"))
+    with perf_panel:
+        st.caption(f"Render {profile.seconds * 1000:.0f} ms, SQL {profile.query_seconds * 1000:.0f} ms "
+                   f"in {len(profile.queries)} queries")
+        st.dataframe(profile.stage_frame(), hide_index=True, use_container_width=True)
+        if profile.queries:
+            st.dataframe(profile.query_frame(), hide_index=True, use_container_width=True)
+        if profile.report:
+            st.code(profile.report)
+        st.download_button("📥 Profile (JSON)", data=profile.to_json(indent=2),
+                           file_name="render_profile.json", mime="application/json")
@@ -0,0 +1,272 @@
+import os
+import shutil
+import sqlite3
+import threading
+
+import pandas as pd
+import analyzer
+import dbconfig
+from cache import FrameRegistry
+
+TABLES = ["student", "company", "performance", "hiring"]
+COMBINED_COLUMNS = ["usn", "name", "dept", "batch", "cgpa", "status", "company", "ctc"]
+ROW_GROUP_SIZE = 64 * 1024
+ARROW_KEEP_VERSIONS = 3   # older Arrow snapshot versions are deleted on write
+
+# Columns read per table for each analyzer.TABLE_QUERIES profile (None = all)
+TABLE_COLUMNS = {
+    "full": {table: None for table in TABLES},
+    "options": {"student": ["dept", "batch"], "company": ["company"]},
+}
+
+
+# --- SQL backends ---
+# Served through the shared connection pool, so query_builder (SQL mode),
+# incremental refresh and the table-change probe work unchanged.
+class SqlBackend:
+    supports_sql = True
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+
+    def activate(self):
+        dbconfig.configure_pool(self.factory)
+
+    def fetch_all_data(self, tables="full"):
+        return analyzer.fetch_all_data(tables)
+
+    def signature(self):
+        return analyzer.table_signature()
+
+class MySQLBackend(SqlBackend):
+    def __init__(self):
+        super().__init__("mysql", dbconfig.get_connection)
+
+class SQLiteBackend(SqlBackend):
+    def __init__(self, path):
+        self.path = path
+        super().__init__(f"sqlite:{path}", lambda: sqlite3.connect(path, check_same_thread=False))
+
+
+# --- Parquet snapshot ---
+# One file per table plus the pre-joined combined frame, sorted by
+# batch/dept/company so row-group statistics let filtered reads skip most
+# of the file. Reads only the columns asked for.
+def loaded(step, frame):
+    analyzer.load_progress.advance(step)
+    return frame
+
+class ParquetBackend:
+    supports_sql = False
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"parquet:{path}"
+
+    def activate(self):
+        missing = [t for t in TABLES + ["combined"] if not os.path.exists(self.file(t))]
+        if missing:
+            raise FileNotFoundError(f"No {', '.join(missing)} in Parquet snapshot {self.path}")
+
+    def file(self, table):
+        return os.path.join(self.path, f"{table}.parquet")
+
+    def read(self, table, columns=None, filters=None):
+        import pyarrow.parquet as pq
+        return pq.read_table(self.file(table), columns=columns, filters=filters).to_pandas()
+
+    def fetch_all_data(self, tables="full"):
+        # Same table profiles as analyzer.TABLE_QUERIES
+        columns = TABLE_COLUMNS[tables]
+        analyzer.load_progress.start(len(TABLES) + 1)
+        frames = [loaded(t, self.read(t, columns[t]) if t in columns else pd.DataFrame()) for t in TABLES]
+        combined_df = analyzer.compact_frame(loaded("combined", self.read("combined", COMBINED_COLUMNS)))
+        return (*frames, combined_df)
+
+    def signature(self):
+        stats = (os.stat(self.file(t)) for t in TABLES + ["combined"])
+        return tuple((s.st_mtime_ns, s.st_size) for s in stats)
+
+    def filters(self, batch_filter="All", dept_filter="All", company_filter="All"):
+        # Same rules as analyzer.apply_filters, as pyarrow predicates
+        conditions = []
+        if batch_filter == "Last 3 Years":
+            batches = sorted(self.read("student", ["batch"])["batch"].dropna().unique())
+            if len(batches) >= 3:
+                conditions.append(("batch", "in", batches[-3:]))
+        elif batch_filter != "All":
+            conditions.append(("batch", "==", batch_filter))
+        if dept_filter != "All":
+            conditions.append(("dept", "==", dept_filter))
+        if company_filter != "All":
+            conditions.append(("company", "==", company_filter))
+        return conditions or None
+
+    def read_combined(self, batch_filter="All", dept_filter="All", company_filter="All", columns=COMBINED_COLUMNS):
+        filters = self.filters(batch_filter, dept_filter, company_filter)
+        return analyzer.compact_frame(self.read("combined", columns, filters))
+
+    def filter_options(self):
+        student_df = self.read("student", ["dept", "batch"])
+        company_df = self.read("company", ["company"])
+        return (sorted(student_df["dept"].dropna().unique().tolist()),
+                sorted(student_df["batch"].dropna().unique().tolist()),
+                sorted(company_df["company"].dropna().unique().tolist()))
+
+def write_snapshot(frames, path, row_group_size=ROW_GROUP_SIZE):
+    # Written next to `path` and swapped in, so readers never see half a snapshot
+    tmp = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for table, frame in zip(TABLES, frames[:4]):
+        frame.to_parquet(os.path.join(tmp, f"{table}.parquet"), index=False)
+    combined = frames[4][COMBINED_COLUMNS].sort_values(["batch", "dept", "company"], kind="stable")
+    combined.to_parquet(os.path.join(tmp, "combined.parquet"), index=False, row_group_size=row_group_size)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+
+
+# --- Arrow snapshot ---
+# Uncompressed Arrow IPC files, memory-mapped read-only by every reader:
+# opening one copies nothing, the columns live in the OS page cache shared
+# by all processes, and pandas gets views over the mapped numeric columns
+# and category codes (only the string dictionaries are built per process).
+# Each write goes to a new version directory and then swaps CURRENT to
+# point at it, so readers always see a whole snapshot and pick up the next
+# one on their next signature probe. The combined frame is stored compacted.
+def read_arrow(file, columns=None, filters=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # The table keeps the map open for as long as any column uses it
+    table = pa.ipc.open_file(pa.memory_map(file)).read_all()
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+def write_arrow(frame, file):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa.OSFile(file, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def arrow_version(path):
+    try:
+        with open(os.path.join(path, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_arrow_snapshot(frames, path, keep=ARROW_KEEP_VERSIONS):
+    os.makedirs(path, exist_ok=True)
+    current = arrow_version(path)
+    version = f"v{int(current[1:]) + 1 if current else 1:06d}"
+    tmp = os.path.join(path, version + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for table, frame in zip(TABLES + ["combined"], frames):
+        write_arrow(frame, os.path.join(tmp, f"{table}.arrow"))
+    os.replace(tmp, os.path.join(path, version))
+
+    pointer = os.path.join(path, "CURRENT.tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(path, "CURRENT"))
+
+    # Processes still mapping a deleted version keep its pages until they let go
+    versions = sorted(v for v in os.listdir(path) if v.startswith("v") and not v.endswith(".tmp"))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(path, old), ignore_errors=True)
+    return version
+
+class ArrowBackend(ParquetBackend):
+    def __init__(self, path):
+        super().__init__(path)
+        self.name = f"arrow:{path}"
+
+    def activate(self):
+        if arrow_version(self.path) is None:
+            raise FileNotFoundError(f"No Arrow snapshot in {self.path} (write one with snapshot.py --format arrow)")
+
+    def file(self, table, version=None):
+        return os.path.join(self.path, version or arrow_version(self.path), f"{table}.arrow")
+
+    def read(self, table, columns=None, filters=None, version=None):
+        return read_arrow(self.file(table, version), columns, filters)
+
+    def fetch_all_data(self, tables="full"):
+        # Every table from the same version, even if CURRENT moves meanwhile
+        version = arrow_version(self.path)
+        columns = TABLE_COLUMNS[tables]
+        analyzer.load_progress.start(len(TABLES) + 1)
+        frames = [loaded(t, self.read(t, columns[t], version=version) if t in columns else pd.DataFrame())
+                  for t in TABLES]
+        combined_file = self.file("combined", version)
+        combined_df = loaded("combined", read_arrow(combined_file))
+        _mapped.register(combined_df, combined_file)
+        return (*frames, combined_df)
+
+    def signature(self):
+        return arrow_version(self.path)
+
+# Frames read from an Arrow snapshot -> their file, so process pools can
+# hand workers the file to map instead of a pickled copy of the frame
+_mapped = FrameRegistry(lambda df: None)
+
+class MappedFrame:
+    def __init__(self, file):
+        self.file = file
+
+    def load(self):
+        return read_arrow(self.file)
+
+def shareable(df):
+    file = _mapped.peek(df)
+    return df if file is None else MappedFrame(file)
+
+def unshared(value):
+    return value.load() if isinstance(value, MappedFrame) else value
+
+
+# --- Active backend ---
+# PLACEMENT_BACKEND is "mysql", "sqlite:<file>", "parquet:<directory>" or
+# "arrow:<directory>".
+DEFAULT_BACKEND = os.environ.get("PLACEMENT_BACKEND", "mysql")
+
+def backend_from_spec(spec):
+    kind, _, location = spec.partition(":")
+    if kind == "mysql":
+        return MySQLBackend()
+    if kind == "sqlite" and location:
+        return SQLiteBackend(location)
+    if kind == "parquet" and location:
+        return ParquetBackend(location)
+    if kind == "arrow" and location:
+        return ArrowBackend(location)
+    raise ValueError(f"Unknown backend {spec!r}; expected mysql, sqlite:<file>, parquet:<directory> or arrow:<directory>")
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def configure_backend(backend):
+    global _backend
+    if isinstance(backend, str):
+        backend = backend_from_spec(backend)
+    with _backend_lock:
+        backend.activate()
+        _backend = backend
+    analyzer.invalidate_data()
+    return backend
+
+def current_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = backend_from_spec(DEFAULT_BACKEND)
+                backend.activate()
+                _backend = backend
+    return _backend
@@ -0,0 +1,255 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+import analyzer
+import backends
+import synthetic
+import visualization as vz
+import query_builder as qb
+from cube import AggregateCube, SketchCube
+from export import iter_csv
+from metrics import compute_metrics
+
+FILTERS = [
+    ("All", "All", "All"),
+    ("Last 3 Years", "All", "All"),
+    ("Last 3 Years", "CSE", "All"),
+    ("All", "All", "Company 0001"),
+]
+
+CHART_STAGES = {
+    "overall_status": vz.overall_status_stats,
+    "batch_wise": lambda df: vz.group_wise_stats(df, "batch"),
+    "branch_wise": lambda df: vz.group_wise_stats(df, "dept"),
+    "top_recruiters": vz.top_recruiters_stats,
+    "salary": vz.salary_stats,
+    "conversion": vz.conversion_stats,
+    "cgpa_bins": vz.cgpa_bin_stats,
+}
+
+
+# Distinct-count columns of each aggregate, keyed so exact and approximate
+# results line up row for row
+COUNT_COLUMNS = {
+    "overall": (lambda agg: agg[0], ["Placement_status"], "count"),
+    "batch": (lambda agg: agg, ["batch", "Placement_status"], "count"),
+    "dept": (lambda agg: agg, ["dept", "Placement_status"], "count"),
+    "top_recruiters": (lambda agg: agg, ["company"], "hires"),
+    "cgpa": (lambda agg: agg[0], ["cgpa_bin"], "count"),
+}
+
+
+# --- Import times ---
+# Cold import cost in a fresh interpreter: "shell" is what app.py imports
+# before it draws anything (its imports above the first top-level call),
+# "dashboard" everything it imports, plus single modules. Streamlit is
+# loaded before timing starts, as the server has it loaded already.
+# Also records which heavy libraries each one pulls in, so a module that
+# starts importing Plotly or the MySQL driver eagerly again shows up.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+IMPORT_MODULES = ["analyzer", "visualization", "dbconfig", "store", "metrics", "worker"]
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "plotly.express", "mysql.connector"]
+PRELOADED = ["streamlit"]
+
+IMPORT_PROBE = """
+import importlib, json, sys, time
+preload, modules, heavy = json.loads(sys.argv[1])
+for module in preload:
+    importlib.import_module(module)
+start = time.perf_counter()
+for module in modules:
+    importlib.import_module(module)
+print(json.dumps([time.perf_counter() - start, [m for m in heavy if m in sys.modules]]))
+"""
+
+def app_imports(path=APP_PATH):
+    # (shell, all) module names imported at the top level of app.py
+    shell, modules = None, []
+    for node in ast.parse(open(path).read()).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+        elif isinstance(node, ast.Expr) and shell is None:
+            shell = list(modules)
+    return shell or modules, modules
+
+def import_time(modules, repeat=3):
+    # Best of `repeat` fresh interpreters: (seconds, heavy libraries loaded)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE, json.dumps([PRELOADED, modules, HEAVY_MODULES])],
+                             cwd=os.path.dirname(APP_PATH), capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(runs)
+
+def run_imports(repeat=3):
+    shell, dashboard = app_imports()
+    targets = {"shell": shell, "dashboard": dashboard, **{m: [m] for m in IMPORT_MODULES}}
+    results = []
+    print("cold imports")
+    for name, modules in targets.items():
+        seconds, heavy = import_time(modules, repeat)
+        results.append({"stage": f"import[{name}]", "seconds": round(seconds, 6), "heavy_modules": heavy})
+        print(f"  {name:<32} {seconds * 1000:10.1f} ms  loads {', '.join(heavy) or '-'}")
+    return results
+
+
+# --- Stage timer ---
+class Recorder:
+    def __init__(self, run):
+        self.run = run
+        self.results = []
+
+    def stage(self, name, func, *args, rows=None, **kwargs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if rows is None and isinstance(value, pd.DataFrame):
+            rows = len(value)
+        self.results.append({**self.run, "stage": name, "seconds": round(seconds, 6),
+                             "peak_bytes": peak, "rows": rows})
+        print(f"  {name:<32} {seconds * 1000:10.1f} ms  {peak / 1024 ** 2:9.1f} MB")
+        return value
+
+
+def sketch_error(exact, approx):
+    # Largest relative error of the approximate student counts
+    errors = [abs(approx["kpis"][k] - exact["kpis"][k]) / max(exact["kpis"][k], 1)
+              for k in ("total_students", "placed_students", "shortlisted_students")]
+    for name, (table, keys, column) in COUNT_COLUMNS.items():
+        expected = table(exact[name]).set_index(keys)[column].astype(float)
+        actual = table(approx[name]).set_index(keys)[column].reindex(expected.index).astype(float)
+        errors.extend(((actual - expected).abs() / expected.clip(lower=1)).fillna(1.0))
+    return max(errors, default=0.0)
+
+def same_aggregate(expected, actual):
+    if isinstance(expected, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True))
+        except AssertionError:
+            return False
+        return True
+    if isinstance(expected, (tuple, list)):
+        return len(expected) == len(actual) and all(map(same_aggregate, expected, actual))
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(same_aggregate(expected[k], actual[k]) for k in expected)
+    return expected == actual
+
+def metrics_mismatches(df, metrics):
+    # Aggregates where the one-pass metrics differ from the per-chart functions
+    return [name for name, compute in vz.AGGREGATES.items() if not same_aggregate(compute(df), metrics[name])]
+
+def drain(iterator):
+    return sum(len(chunk) for chunk in iterator)
+
+def run_size(students, args):
+    run = {"students": students, "backend": args.backend, "batches": args.batches,
+           "depts": args.depts, "companies": args.companies}
+    recorder = Recorder(run)
+    print(f"students={students} backend={args.backend}")
+
+    frames = recorder.stage("generate", synthetic.generate, students, args.batches, args.depts,
+                            args.companies, args.interviews, args.status_weights, seed=args.seed)
+
+    if args.backend == "sqlite":
+        path = args.db or os.path.join(tempfile.mkdtemp(), "placement_bench.db")
+        recorder.stage("write_sqlite", synthetic.write_sqlite, frames, path)
+        backends.configure_backend(backends.SQLiteBackend(path))
+        loaded = recorder.stage("load_all_data", analyzer.load_all_data, use_cache=False, incremental=False)
+    elif args.backend == "parquet":
+        path = args.db or os.path.join(tempfile.mkdtemp(), "placement_bench")
+        recorder.stage("write_parquet", backends.write_snapshot, synthetic.load_frames(frames), path)
+        backends.configure_backend(backends.ParquetBackend(path))
+        loaded = recorder.stage("load_all_data", analyzer.load_all_data, use_cache=False)
+    elif args.backend == "arrow":
+        path = args.db or os.path.join(tempfile.mkdtemp(), "placement_bench")
+        recorder.stage("write_arrow", backends.write_arrow_snapshot, synthetic.load_frames(frames), path)
+        backends.configure_backend(backends.ArrowBackend(path))
+        loaded = recorder.stage("load_all_data", analyzer.load_all_data, use_cache=False)
+    else:
+        loaded = recorder.stage("load_all_data", synthetic.load_frames, frames)
+    combined = loaded[4]
+    run["total_rows"] = len(combined)
+    recorder.results[-1]["rows"] = len(combined)
+
+    index = recorder.stage("filter_index", analyzer.FilterIndex, combined)
+    for f in FILTERS:
+        label = "/".join(str(v) for v in f)
+        recorder.stage(f"apply_filters[{label}]", analyzer.apply_filters, combined, *f)
+        df = recorder.stage(f"apply_filters_indexed[{label}]", analyzer.apply_filters, combined, *f, index=index)
+        for name, func in CHART_STAGES.items():
+            recorder.stage(f"{name}[{label}]", func, df)
+        metrics = recorder.stage(f"metrics[{label}]", compute_metrics, df)
+        mismatches = recorder.results[-1]["mismatches"] = metrics_mismatches(df, metrics)
+        if mismatches:
+            print(f"  metrics differ from the per-chart aggregates: {', '.join(mismatches)}")
+
+    cube = recorder.stage("cube_build", AggregateCube, combined)
+    for f in FILTERS:
+        label = "/".join(str(v) for v in f)
+        recorder.stage(f"cube_aggregates[{label}]", lambda: cube.slice(*f).aggregates())
+        if args.backend != "memory":
+            recorder.stage(f"pushdown_aggregates[{label}]", qb.fetch_aggregates, *f)
+
+    # Approximate counts: timings plus the largest error against the exact cube
+    sketch_cube = recorder.stage("sketch_cube_build", SketchCube, combined)
+    for f in FILTERS:
+        label = "/".join(str(v) for v in f)
+        approx = recorder.stage(f"sketch_aggregates[{label}]", lambda: sketch_cube.slice(*f).aggregates())
+        recorder.results[-1]["relative_error"] = round(sketch_error(cube.slice(*f).aggregates(), approx), 6)
+
+    recorder.stage("pivot_export_csv", lambda: drain(iter_csv(combined)))
+    return recorder.results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the placement analysis pipeline on synthetic data")
+    parser.add_argument("--students", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--depts", type=int, default=8)
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--interviews", type=float, default=4, help="mean interviews per student")
+    parser.add_argument("--status-weights", type=synthetic.parse_status_weights, default=None,
+                        help="e.g. 0:0.1,1:0.3,2:0.15,3:0.15,4:0.08,9:0.07,10:0.15")
+    parser.add_argument("--backend", choices=["sqlite", "parquet", "arrow", "memory"], default="sqlite")
+    parser.add_argument("--db", help="SQLite file / Parquet or Arrow directory to (re)create; a temp path by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--imports", action="store_true",
+                        help="measure cold import times of the dashboard instead of the data pipeline")
+    parser.add_argument("--repeat", type=int, default=3, help="--imports: fresh interpreters per module (best is kept)")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.imports:
+        results.extend(run_imports(args.repeat))
+    else:
+        for students in args.students:
+            results.extend(run_size(students, args))
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"wrote {len(results)} measurements to {args.output}")
+
+if __name__ == "__main__":
+    main()
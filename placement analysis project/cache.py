@@ -0,0 +1,199 @@
+import dataclasses
+import sys
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# --- Size estimation ---
+def estimate_size(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(estimate_size(getattr(value, f.name)) for f in dataclasses.fields(value))
+    return sys.getsizeof(value)
+
+
+class CacheEntry:
+    def __init__(self, value, fingerprint=None):
+        self.value = value
+        self.fingerprint = fingerprint
+        self.size = estimate_size(value)
+        self.created = time.monotonic()
+        self.checked = self.created
+
+
+# --- TTL + memory-capped LRU cache ---
+# Entries younger than `probe_interval` are served straight from memory.
+# Older entries are re-validated with the (cheap) probe and only reloaded
+# when its fingerprint changed. `ttl` is a hard upper bound on entry age,
+# so changes the probe cannot see are still picked up eventually.
+# Probes and loads run outside the lock: hits on other keys never wait on
+# them, and concurrent misses on one key share a single in-flight load.
+class DataCache:
+    def __init__(self, ttl=600, max_bytes=1024 ** 3, probe_interval=30):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.probe_interval = probe_interval
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry.created >= self.ttl
+
+    def get(self, key, loader, probe=None):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                entry = None
+            if entry is not None and (probe is None or now - entry.checked < self.probe_interval):
+                self._entries.move_to_end(key)
+                return entry.value
+            waiting = self._pending.get(key)
+            if waiting is None:
+                pending = self._pending[key] = Future()
+                generation = self._generation
+        if waiting is not None:
+            return waiting.result()
+        try:
+            value = self._load(key, entry, loader, probe, generation)
+        except BaseException as exc:
+            self._finish(key)
+            pending.set_exception(exc)
+            raise
+        self._finish(key)
+        pending.set_result(value)
+        return value
+
+    def _load(self, key, entry, loader, probe, generation):
+        fingerprint = None
+        if probe is not None:
+            fingerprint = probe()
+            if entry is not None and fingerprint == entry.fingerprint:
+                with self._lock:
+                    entry.checked = time.monotonic()
+                    if self._entries.get(key) is entry:
+                        self._entries.move_to_end(key)
+                return entry.value
+        # Probe runs before the load so a change made mid-load is
+        # detected on the next check rather than silently cached.
+        value = loader()
+        with self._lock:
+            # Not cached if invalidated while loading: it may predate the change
+            if generation == self._generation:
+                self.put(key, value, fingerprint)
+        return value
+
+    def _finish(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry.value
+
+    def put(self, key, value, fingerprint=None):
+        with self._lock:
+            self._remove(key)
+            entry = CacheEntry(value, fingerprint)
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                return value
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            self._evict()
+            return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+                self.total_bytes = 0
+            else:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry, time.monotonic())
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# --- Per-frame registry ---
+# One derived object (cube, trend engine, ...) per loaded frame, dropped
+# together with the frame, so a refresh can find the previous frame's
+# object and carry it forward. Builds run outside the lock, and sessions
+# asking for the same frame's object at once share one build.
+class FrameRegistry:
+    def __init__(self, build):
+        self.build = build
+        self._objects = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def register(self, df, obj):
+        key = id(df)
+        with self._lock:
+            if key not in self._objects:
+                weakref.finalize(df, self._objects.pop, key, None)
+            self._objects[key] = obj
+        return obj
+
+    def peek(self, df):
+        return self._objects.get(id(df))
+
+    def get(self, df):
+        key = id(df)
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is not None:
+                return obj
+            waiting = self._pending.get(key)
+            if waiting is None:
+                pending = self._pending[key] = Future()
+        if waiting is not None:
+            return waiting.result()
+        try:
+            obj = self.register(df, self.build(df))
+        except BaseException as exc:
+            self._finish(key)
+            pending.set_exception(exc)
+            raise
+        self._finish(key)
+        pending.set_result(obj)
+        return obj
+
+    def _finish(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
@@ -0,0 +1,450 @@
+import numpy as np
+import pandas as pd
+import sketch
+from cache import FrameRegistry
+from analyzer import PLACEMENT_ORDER, kpi_values
+from metrics import category_codes
+from visualization import bin_cgpa
+
+DIMENSIONS = ["dept", "batch", "company", "Placement_status", "cgpa_bin"]
+AGGREGATE_NAMES = ["kpis", "overall", "top_recruiters", "batch", "dept", "salary", "conversion", "cgpa"]
+
+
+# --- Approximate cube slice ---
+# One cell per DIMENSIONS combination, each keeping a sparse HyperLogLog
+# sketch of its students (see sketch.py for the error bound): at most one
+# 4-byte entry per register, stored in one flat `members` array with cell i
+# owning members[start:stop]. Roll-ups merge registers in one scatter-max
+# pass, so a student appearing in several cells is counted once. Counts are
+# estimates; everything else (CTC, row counts) is exact. Missing dimension
+# values are stored as None. The exact cube (AggregateCube) keeps per-group
+# counts instead.
+class SketchView:
+    def __init__(self, cells, members, batches, precision=sketch.PRECISION):
+        self.cells = cells
+        self.members = members
+        self.batches = batches
+        self.precision = precision
+
+    def _where(self, mask):
+        return SketchView(self.cells[mask], self.members, self.batches, self.precision)
+
+    def count_distinct(self, members, groups, n_groups):
+        return sketch.estimate(sketch.registers(members, groups, n_groups, self.precision))
+
+    def slice(self, batch_filter="All", dept_filter="All", company_filter="All"):
+        cells = self.cells
+        mask = pd.Series(True, index=cells.index)
+        if batch_filter == "Last 3 Years":
+            if len(self.batches) >= 3:
+                mask &= cells["batch"].isin(self.batches[-3:])
+        elif batch_filter != "All":
+            mask &= cells["batch"] == batch_filter
+        if dept_filter != "All":
+            mask &= cells["dept"] == dept_filter
+        if company_filter != "All":
+            mask &= cells["company"] == company_filter
+        return self._where(mask)
+
+    def with_status(self, *statuses):
+        return self._where(self.cells["Placement_status"].isin(statuses))
+
+    def with_value(self, dim):
+        return self._where(self.cells[dim].notna())
+
+    @property
+    def empty(self):
+        return self.cells.empty
+
+    def gather(self):
+        # Concatenated members of every cell in the view, plus per-cell lengths
+        starts = self.cells["start"].to_numpy()
+        lengths = self.cells["stop"].to_numpy() - starts
+        shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.members[shift + np.arange(lengths.sum())], lengths
+
+    def distinct(self):
+        members, _ = self.gather()
+        return int(self.count_distinct(members, np.zeros(len(members), dtype=np.int64), 1)[0])
+
+    def distinct_by(self, dims, name="count"):
+        dims = list(dims)
+        view = self._where(self.cells[dims].notna().all(axis=1))
+        if view.cells.empty:
+            return pd.DataFrame(columns=dims + [name])
+        grouped = view.cells.groupby(dims, sort=True)
+        groups = grouped.ngroup().to_numpy().astype(np.int64)
+        members, lengths = view.gather()
+        result = grouped.size().index.to_frame(index=False)
+        result[name] = self.count_distinct(members, np.repeat(groups, lengths), len(result))
+        return result
+
+    # --- Chart aggregates (same shapes as visualization.*_stats) ---
+    def kpis(self):
+        return kpi_values(self.distinct(),
+                          self.with_status("Placed").distinct(),
+                          self.with_status("Shortlisted").distinct())
+
+    def overall_status_stats(self):
+        total = self.distinct()
+        counts = self.with_value("Placement_status").distinct_by(["Placement_status"])
+        stats = (counts.set_index("Placement_status")["count"]
+                       .reindex(PLACEMENT_ORDER, fill_value=0)
+                       .rename_axis("Placement_status").reset_index(name="count"))
+        stats["Placement_status"] = pd.Categorical(stats["Placement_status"], categories=PLACEMENT_ORDER, ordered=True)
+        stats["percent"] = stats["count"]/total*100 if total else 0.0
+        return stats, total
+
+    def group_wise_stats(self, group_col):
+        grouped = self.with_value(group_col)
+        totals = grouped.distinct_by([group_col], name="total")
+        counts = grouped.with_value("Placement_status").distinct_by([group_col, "Placement_status"])
+        grid = pd.MultiIndex.from_product([totals[group_col], PLACEMENT_ORDER],
+                                          names=[group_col, "Placement_status"])
+        stats = (counts.set_index([group_col, "Placement_status"])["count"]
+                       .reindex(grid, fill_value=0).reset_index())
+        stats["Placement_status"] = pd.Categorical(stats["Placement_status"], categories=PLACEMENT_ORDER, ordered=True)
+        stats = stats.merge(totals, on=group_col)
+        stats["percent"] = stats["count"]/stats["total"]*100
+        return stats
+
+    def top_recruiters_stats(self):
+        top = self.with_status("Placed", "Shortlisted").with_value("company").distinct_by(["company"], name="hires")
+        return top.sort_values("hires", ascending=False)
+
+    def cgpa_bin_stats(self):
+        view = self.with_value("cgpa_bin")
+        stats_all = view.distinct_by(["cgpa_bin"])
+        stats_p = view.with_status("Placed", "Shortlisted").distinct_by(["cgpa_bin"])
+        dominant_bin = None
+        if not view.empty:
+            rows = view.cells.groupby("cgpa_bin")["rows"].sum()
+            dominant_bin = sorted(rows[rows == rows.max()].index)[0]
+        return stats_all, stats_p, dominant_bin
+
+    def salary_stats(self):
+        cells = self.with_status("Placed").with_value("company").cells
+        if cells.empty:
+            return pd.DataFrame(columns=["company", "highest", "lowest", "average"])
+        stats = cells.groupby("company", sort=True).agg(
+            highest=("ctc_max", "max"), lowest=("ctc_min", "min"),
+            ctc_sum=("ctc_sum", "sum"), ctc_count=("ctc_count", "sum"))
+        stats["average"] = stats["ctc_sum"]/stats["ctc_count"].where(stats["ctc_count"] > 0)
+        return stats[["highest", "lowest", "average"]].reset_index()
+
+    def conversion_stats(self):
+        view = self.with_value("company")
+        totals = view.distinct_by(["company"], name="total")
+        if totals.empty:
+            return pd.DataFrame(columns=["company", "conversion"])
+        placed = view.with_status("Placed").distinct_by(["company"], name="placed")
+        conv = totals.merge(placed, on="company", how="left").fillna({"placed": 0})
+        conv["conversion"] = (conv["placed"]/conv["total"]*100).round().astype(int)
+        return conv[["company", "conversion"]]
+
+    def aggregate(self, name):
+        if name in ("batch", "dept"):
+            return self.group_wise_stats(name)
+        return {
+            "kpis": self.kpis,
+            "overall": self.overall_status_stats,
+            "top_recruiters": self.top_recruiters_stats,
+            "salary": self.salary_stats,
+            "conversion": self.conversion_stats,
+            "cgpa": self.cgpa_bin_stats,
+        }[name]()
+
+    def aggregates(self):
+        return {name: self.aggregate(name) for name in AGGREGATE_NAMES}
+
+
+# --- Cube build ---
+def cube_keys(df):
+    work = df.assign(cgpa_bin=bin_cgpa(df["cgpa"]))
+    keys = work[DIMENSIONS].astype(object)
+    keys = keys.where(keys.notna(), None)
+    return pd.concat([keys, df["usn"].astype(object), df["ctc"].astype("float64")], axis=1)
+
+def group_cells(rows):
+    # One cell per distinct DIMENSIONS combination, and each row's cell id
+    grouped = rows.groupby(DIMENSIONS, dropna=False, sort=False)
+    cells = grouped.agg(rows=("usn", "size"), ctc_count=("ctc", "count"), ctc_sum=("ctc", "sum"),
+                        ctc_min=("ctc", "min"), ctc_max=("ctc", "max")).reset_index()
+    cells[DIMENSIONS] = cells[DIMENSIONS].astype(object).where(cells[DIMENSIONS].notna(), None)
+    return cells, grouped.ngroup().to_numpy().astype(np.int64)
+
+def pack(cells, members, lengths):
+    cells = cells.reset_index(drop=True)
+    cells["stop"] = np.cumsum(lengths)
+    cells["start"] = cells["stop"] - lengths
+    return cells, members
+
+def split_touched(view, df, changed_rows):
+    # The view's cells not touched by `changed_rows`, and the rows of `df`
+    # that fall in the touched ones
+    touched = cube_keys(changed_rows)[DIMENSIONS].drop_duplicates()
+    keep = view.cells.merge(touched, on=DIMENSIONS, how="left", indicator=True)["_merge"].to_numpy() == "left_only"
+    rows = cube_keys(df)
+    hit = rows.merge(touched, on=DIMENSIONS, how="left", indicator=True)["_merge"].to_numpy() == "both"
+    return view._where(keep), rows[hit]
+
+
+# --- Exact cube ---
+# A student has one dept, batch and CGPA bin, so distinct-student counts of
+# different (dept, batch, cgpa_bin) groups add up exactly. The cube keeps
+# two small tables of such counts, precomputed per group:
+#   students:  per group, its students, their rows, and how many of them
+#              have a row with each status (or are hired: Placed/Shortlisted)
+#   companies: the same per (group, company), over the rows at that company,
+#              plus the CTC of its Placed rows
+# A view sums rows of these tables (the companies table for a company
+# filter or a per-company chart), so no aggregate looks at single students
+# and the cost depends on the number of groups, not of rows.
+GROUP_KEYS = ["dept", "batch", "cgpa_bin"]
+STATUS_COLUMNS = list(PLACEMENT_ORDER)
+
+class RollupView:
+    def __init__(self, students, companies, batches, company_filter="All"):
+        self.students = students
+        self.companies = companies
+        self.batches = batches
+        self.company_filter = company_filter
+
+    def slice(self, batch_filter="All", dept_filter="All", company_filter="All"):
+        def where(cells, company=True):
+            mask = pd.Series(True, index=cells.index)
+            if batch_filter == "Last 3 Years":
+                if len(self.batches) >= 3:
+                    mask &= cells["batch"].isin(self.batches[-3:])
+            elif batch_filter != "All":
+                mask &= cells["batch"] == batch_filter
+            if dept_filter != "All":
+                mask &= cells["dept"] == dept_filter
+            if company and company_filter != "All":
+                mask &= cells["company"] == company_filter
+            return cells[mask]
+        return RollupView(where(self.students, company=False), where(self.companies), self.batches, company_filter)
+
+    @property
+    def base(self):
+        # Counts of the students in the view
+        return self.students if self.company_filter == "All" else self.companies
+
+    def sums(self, cells, by, columns):
+        return cells.groupby(by, sort=True)[columns].sum()
+
+    # --- Chart aggregates (same shapes as visualization.*_stats) ---
+    def kpis(self):
+        base = self.base
+        return kpi_values(int(base["students"].sum()), int(base["Placed"].sum()), int(base["Shortlisted"].sum()))
+
+    def overall_status_stats(self):
+        base = self.base
+        total = int(base["students"].sum())
+        stats = pd.DataFrame({
+            "Placement_status": pd.Categorical(STATUS_COLUMNS, categories=PLACEMENT_ORDER, ordered=True),
+            "count": base[STATUS_COLUMNS].sum().to_numpy().astype("int64"),
+        })
+        stats["percent"] = stats["count"]/total*100 if total else 0.0
+        return stats, total
+
+    def group_wise_stats(self, group_col):
+        sums = self.sums(self.base, group_col, ["students"] + STATUS_COLUMNS)
+        sums = sums[sums["students"] > 0]
+        totals = sums["students"].rename("total").reset_index()
+        grid = pd.MultiIndex.from_product([totals[group_col], PLACEMENT_ORDER],
+                                          names=[group_col, "Placement_status"])
+        stats = sums[STATUS_COLUMNS].stack().reindex(grid, fill_value=0).reset_index(name="count")
+        stats["Placement_status"] = pd.Categorical(stats["Placement_status"], categories=PLACEMENT_ORDER, ordered=True)
+        stats = stats.merge(totals, on=group_col)
+        stats["percent"] = stats["count"]/stats["total"]*100
+        return stats
+
+    def top_recruiters_stats(self):
+        hires = self.sums(self.companies, "company", "hired")
+        top = hires[hires > 0].reset_index(name="hires")
+        return top.sort_values("hires", ascending=False)
+
+    def cgpa_bin_stats(self):
+        sums = self.sums(self.base, "cgpa_bin", ["students", "hired", "rows"])
+        sums = sums[sums["students"] > 0]
+        stats_all = sums["students"].reset_index(name="count")
+        hired = sums["hired"]
+        stats_p = hired[hired > 0].reset_index(name="count")
+        dominant_bin = None
+        if not sums.empty:
+            rows = sums["rows"]
+            dominant_bin = sorted(rows[rows == rows.max()].index)[0]
+        return stats_all, stats_p, dominant_bin
+
+    def salary_stats(self):
+        cells = self.companies[self.companies["Placed"] > 0]
+        if cells.empty:
+            return pd.DataFrame(columns=["company", "highest", "lowest", "average"])
+        stats = cells.groupby("company", sort=True).agg(
+            highest=("ctc_max", "max"), lowest=("ctc_min", "min"),
+            ctc_sum=("ctc_sum", "sum"), ctc_count=("ctc_count", "sum"))
+        stats["average"] = stats["ctc_sum"]/stats["ctc_count"].where(stats["ctc_count"] > 0)
+        return stats[["highest", "lowest", "average"]].reset_index()
+
+    def conversion_stats(self):
+        sums = self.sums(self.companies, "company", ["students", "Placed"])
+        sums = sums[sums["students"] > 0]
+        if sums.empty:
+            return pd.DataFrame(columns=["company", "conversion"])
+        conv = sums.reset_index()
+        conv["conversion"] = (conv["Placed"]/conv["students"]*100).round().astype(int)
+        return conv[["company", "conversion"]]
+
+    def aggregate(self, name):
+        if name in ("batch", "dept"):
+            return self.group_wise_stats(name)
+        return {
+            "kpis": self.kpis,
+            "overall": self.overall_status_stats,
+            "top_recruiters": self.top_recruiters_stats,
+            "salary": self.salary_stats,
+            "conversion": self.conversion_stats,
+            "cgpa": self.cgpa_bin_stats,
+        }[name]()
+
+    def aggregates(self):
+        return {name: self.aggregate(name) for name in AGGREGATE_NAMES}
+
+
+def decode(codes, dtype):
+    # Category codes back to values, None for missing (-1)
+    values = np.asarray(dtype.categories, dtype=object)[np.maximum(codes, 0)]
+    values[codes < 0] = None
+    return values
+
+def count_cells(units, cells, n_cells, status, statuses):
+    # Per cell: the distinct `units` (students, or students at one company)
+    # of its rows, their rows, and how many of them have a row with each
+    # status or a hired one. All rows of a unit fall in the same cell.
+    _, first, units = np.unique(units, return_index=True, return_inverse=True)
+    unit_cells = cells[first]
+    n_units, n_status = len(first), len(statuses)
+    known = status >= 0
+    has = np.bincount(units[known] * n_status + status[known],
+                      minlength=n_units * n_status).reshape(n_units, n_status) > 0
+    hired = [statuses.index(label) for label in ("Placed", "Shortlisted")]
+    counts = pd.DataFrame({
+        "students": np.bincount(unit_cells, minlength=n_cells),
+        "rows": np.bincount(unit_cells, weights=np.bincount(units, minlength=n_units), minlength=n_cells),
+        "hired": np.bincount(unit_cells, weights=has[:, hired].any(axis=1), minlength=n_cells),
+    })
+    for label in STATUS_COLUMNS:
+        column = has[:, statuses.index(label)] if label in statuses else np.zeros(n_units)
+        counts[label] = np.bincount(unit_cells, weights=column, minlength=n_cells)
+    return counts.astype("int64")
+
+def build_rollup(df):
+    # The students and companies tables of AggregateCube
+    usn, _ = category_codes(df["usn"])
+    status, status_dtype = category_codes(df["Placement_status"])
+    company, company_dtype = category_codes(df["company"])
+    statuses = list(status_dtype.categories)
+    usn = usn.astype(np.int64)
+
+    # (dept, batch, cgpa_bin) group of every row
+    group = np.zeros(len(df), dtype=np.int64)
+    keys = []
+    for column, values in [("dept", df["dept"]), ("batch", df["batch"]), ("cgpa_bin", bin_cgpa(df["cgpa"]))]:
+        codes, dtype = category_codes(values)
+        group = group * (len(dtype.categories) + 1) + codes + 1
+        keys.append((column, codes, dtype))
+    _, first, group = np.unique(group, return_index=True, return_inverse=True)
+    key_values = lambda rows: {column: decode(codes[rows], dtype) for column, codes, dtype in keys}
+
+    students = pd.DataFrame(key_values(first))
+    students = pd.concat([students, count_cells(usn, group, len(first), status, statuses)], axis=1)
+
+    # Rows at a company, one cell per (group, company)
+    at = np.flatnonzero(company >= 0)
+    n_companies = max(len(company_dtype.categories), 1)
+    _, first, cell = np.unique(group[at] * n_companies + company[at], return_index=True, return_inverse=True)
+    companies = pd.DataFrame(key_values(at[first]))
+    companies["company"] = decode(company[at[first]], company_dtype)
+    companies = pd.concat([companies, count_cells(usn[at] * n_companies + company[at], cell, len(first),
+                                                  status[at], statuses)], axis=1)
+
+    # CTC of the Placed rows per cell, for salary_stats
+    placed = status[at] == statuses.index("Placed") if "Placed" in statuses else np.zeros(len(at), dtype=bool)
+    ctc = pd.Series(df["ctc"].to_numpy()[at[placed]], dtype="float64")
+    ctc = ctc.groupby(cell[placed]).agg(["count", "sum", "min", "max"]).reindex(range(len(first)))
+    companies["ctc_count"] = ctc["count"].fillna(0).astype("int64").to_numpy()
+    companies["ctc_sum"] = ctc["sum"].fillna(0.0).to_numpy()
+    companies["ctc_min"] = ctc["min"].to_numpy()
+    companies["ctc_max"] = ctc["max"].to_numpy()
+    return students, companies
+
+def group_keys(df):
+    keys = pd.DataFrame({"dept": df["dept"], "batch": df["batch"], "cgpa_bin": bin_cgpa(df["cgpa"])}).astype(object)
+    return keys.where(keys.notna(), None)
+
+def in_groups(keys, groups):
+    return keys[GROUP_KEYS].merge(groups, on=GROUP_KEYS, how="left", indicator=True)["_merge"].to_numpy() == "both"
+
+class AggregateCube(RollupView):
+    def __init__(self, df, students=None, companies=None):
+        if students is None:
+            students, companies = build_rollup(df)
+        batches = sorted(df["batch"].dropna().unique())
+        super().__init__(students, companies, batches)
+
+    # Recount only the (dept, batch, cgpa_bin) groups of `changed_rows` (the
+    # old and new rows of every re-synced student); other groups carry over.
+    def refreshed(self, df, changed_rows):
+        touched = group_keys(changed_rows).drop_duplicates()
+        students, companies = build_rollup(df[in_groups(group_keys(df), touched)])
+        kept = lambda cells: cells[~in_groups(cells, touched)]
+        return AggregateCube(df, pd.concat([kept(self.students), students], ignore_index=True),
+                             pd.concat([kept(self.companies), companies], ignore_index=True))
+
+
+# --- Approximate cube ---
+def build_sketch_cells(rows, precision):
+    rows = rows[rows["usn"].notna()]
+    cells, cell_ids = group_cells(rows)
+    members, lengths = sketch.compact(cell_ids, sketch.entries(sketch.hash_values(rows["usn"]), precision), len(cells))
+    return cells, members, lengths
+
+class SketchCube(SketchView):
+    def __init__(self, df, cells=None, members=None, precision=sketch.PRECISION):
+        if cells is None:
+            cells, members = pack(*build_sketch_cells(cube_keys(df), precision))
+        batches = sorted(df["batch"].dropna().unique())
+        super().__init__(cells, members, batches, precision)
+
+    def refreshed(self, df, changed_rows):
+        kept, rows = split_touched(self, df, changed_rows)
+        kept_members, kept_lengths = kept.gather()
+        new_cells, new_members, new_lengths = build_sketch_cells(rows, self.precision)
+        cells, members = pack(pd.concat([kept.cells.drop(columns=["start", "stop"]), new_cells], ignore_index=True),
+                              np.concatenate([kept_members, new_members]),
+                              np.concatenate([kept_lengths, new_lengths]))
+        return SketchCube(df, cells, members, self.precision)
+
+
+# One cube of each kind per loaded frame, dropped together with the frame
+_cubes = FrameRegistry(AggregateCube)
+_sketch_cubes = FrameRegistry(SketchCube)
+
+def register_cube(df, cube):
+    return _cubes.register(df, cube)
+
+def peek_cube(df):
+    return _cubes.peek(df)
+
+def cube_for(df):
+    return _cubes.get(df)
+
+def register_sketch_cube(df, cube):
+    return _sketch_cubes.register(df, cube)
+
+def peek_sketch_cube(df):
+    return _sketch_cubes.peek(df)
+
+def sketch_cube_for(df):
+    return _sketch_cubes.get(df)
@@ -1,11 +1,49 @@
-import mysql.connector
+import threading
+from contextlib import contextmanager
+from pool import ConnectionPool
+from profiling import instrument
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "",
+    "port": 3307,
+    "database": "placement_db",
+}
+
+POOL_SIZE = 5        # connections shared by every dashboard session
+POOL_TIMEOUT = 10    # seconds to wait for a free connection
 
 def get_connection():
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",    
-        port=3307,       
-        database="placement_db"  
-    )
+    # Imported on first use: only the MySQL backend needs the driver
+    import mysql.connector
+    conn = mysql.connector.connect(**DB_CONFIG)
     return conn
+
+# --- Connection pool ---
+_pool = None
+_pool_lock = threading.Lock()
+
+def configure_pool(factory=get_connection, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+    global _pool
+    with _pool_lock:
+        # Swapped in before the old pool closes; connections still checked
+        # out of it are closed when they are returned
+        old, _pool = _pool, ConnectionPool(factory, size=size, timeout=timeout)
+        if old is not None:
+            old.close()
+        return _pool
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_connection, size=POOL_SIZE, timeout=POOL_TIMEOUT)
+    return _pool
+
+# Queries are timed into the active render profile, if any (see profiling)
+@contextmanager
+def connection(timeout=None):
+    with get_pool().connection(timeout) as conn:
+        yield instrument(conn)
@@ -0,0 +1,133 @@
+import io
+import tempfile
+import zlib
+
+import numpy as np
+import pandas as pd
+
+PIVOT_INDEX = ["usn", "name", "dept", "batch", "cgpa"]
+CHUNK_STUDENTS = 5000
+SPOOL_BYTES = 16 * 1024 ** 2
+
+EXPORT_FORMATS = {
+    "csv": ("hiring_records.csv", "text/csv"),
+    "csv.gz": ("hiring_records.csv.gz", "application/gzip"),
+    "parquet": ("hiring_records.parquet", "application/vnd.apache.parquet"),
+}
+
+# --- Pivot ---
+def pivot_records(df, companies=None):
+    pivot = df.pivot_table(
+        index=PIVOT_INDEX,
+        columns="company",
+        values="Placement_status",
+        aggfunc="first",
+        observed=True
+    ).reset_index()
+    if companies is not None:
+        pivot = pivot.reindex(columns=PIVOT_INDEX + list(companies))
+    return pivot
+
+def record_companies(df):
+    # The company columns the full pivot would have, so every chunk shares them
+    rows = df["Placement_status"].notna() & df[PIVOT_INDEX].notna().all(axis=1)
+    return sorted(df.loc[rows, "company"].dropna().unique())
+
+def iter_pivot_chunks(df, companies=None, by="usn", chunk_students=CHUNK_STUDENTS):
+    # by="usn" walks students in sorted order in blocks of `chunk_students`,
+    # giving the same rows in the same order as one big pivot; any other
+    # column (e.g. "batch", "dept") emits one chunk per value.
+    if companies is None:
+        companies = record_companies(df)
+    groups = df.groupby(by, observed=True, sort=True).indices
+    keys = list(groups)
+    step = chunk_students if by == "usn" else 1
+    for start in range(0, len(keys), step):
+        positions = np.sort(np.concatenate([groups[key] for key in keys[start:start + step]]))
+        chunk = df.take(positions)
+        pivot = pivot_records(chunk, companies)
+        if not pivot.empty:
+            yield pivot
+
+# --- Streaming writers ---
+def iter_csv(df, compress=False, **chunking):
+    companies = record_companies(df)
+    compressor = zlib.compressobj(wbits=31) if compress else None   # gzip container
+    header = True
+    for chunk in iter_pivot_chunks(df, companies, **chunking):
+        data = chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+        yield compressor.compress(data) if compressor else data
+    if header:
+        data = ",".join(PIVOT_INDEX + [str(c) for c in companies]).encode("utf-8") + b"\n"
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def arrow_chunk(chunk, companies):
+    chunk = chunk.copy()
+    for column in chunk.columns:
+        if isinstance(chunk[column].dtype, pd.CategoricalDtype):
+            chunk[column] = chunk[column].astype(object)
+    for company in companies:
+        chunk[company] = chunk[company].astype("string")
+    chunk.columns = [str(c) for c in chunk.columns]
+    return chunk
+
+def iter_parquet(df, **chunking):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    companies = record_companies(df)
+    sink = _ChunkSink()
+    writer = None
+    for chunk in iter_pivot_chunks(df, companies, **chunking):
+        chunk = arrow_chunk(chunk, companies)
+        if writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            for company in companies:
+                schema = schema.set(schema.get_field_index(str(company)), pa.field(str(company), pa.string()))
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+def iter_export(df, fmt="csv", **chunking):
+    if fmt == "csv":
+        return iter_csv(df, **chunking)
+    if fmt == "csv.gz":
+        return iter_csv(df, compress=True, **chunking)
+    if fmt == "parquet":
+        return iter_parquet(df, **chunking)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+def export_file(df, fmt="csv", **chunking):
+    # Spools to disk past SPOOL_BYTES so peak memory stays bounded
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    for data in iter_export(df, fmt, **chunking):
+        spool.write(data)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,35 @@
+from cache import DataCache
+from profiling import stage
+
+# Aggregate tables and serialized figures keyed by
+# (query mode, data version, filter tuple[, chart id]). Process-wide, so
+# sessions looking at the same filters reuse each other's work. Computes
+# run outside the cache lock (see DataCache.get): a hit never waits on
+# another key's compute, and sessions missing the same key share one.
+FIGURE_CACHE_BYTES = 256 * 1024 ** 2
+
+figure_cache = DataCache(ttl=None, max_bytes=FIGURE_CACHE_BYTES)
+
+def cached_result(kind, key, compute):
+    if key is None:
+        return compute()
+    return figure_cache.get((kind,) + key, compute)
+
+def cached_aggregates(key, compute):
+    return cached_result("aggregates", key, compute)
+
+def serialize_figure(build):
+    fig = build()
+    with stage("plotly.to_json"):
+        return fig.to_json()
+
+def cached_figure(key, build):
+    if key is None:
+        return build()
+    fig_json = figure_cache.get(("figure",) + key, lambda: serialize_figure(build))
+    with stage("plotly.from_json"):
+        import plotly.io as pio
+        return pio.from_json(fig_json)
+
+def chart_key(key, chart_id):
+    return None if key is None else key + (chart_id,)
@@ -0,0 +1,316 @@
+import copy
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+import analyzer
+import cube
+import trends
+from dbconfig import connection
+from profiling import timed
+from query_builder import placeholder_for
+
+SNAPSHOT_PATH = os.environ.get("PLACEMENT_SNAPSHOT",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshot", "placement.pkl"))
+FULL_RESYNC_SECONDS = 6 * 3600   # full reload this often, whatever the deltas say
+FULL_JOIN_SHARE = 0.2            # re-run the whole join when more students than this changed
+
+PRIMARY_KEYS = {
+    "student": ["usn"],
+    "company": ["cid"],
+    "performance": ["usn", "cid"],
+    "hiring": ["cid"],
+}
+
+# Sync watermark, set on insert and update (see schema). Tables without it
+# are re-read whole and diffed locally, which still avoids re-running the
+# full join; an insert-only id would miss updates, so it is not used.
+WATERMARK_COLUMN = "updated_at"
+
+TABLE_ORDER = ["student", "company", "performance", "hiring"]
+JOIN_CHUNK = 500
+
+
+class SyncState:
+    def __init__(self, tables, combined, watermarks, source=None, read_at=None, synced_at=None,
+                 profile="full", loaded=None):
+        self.tables = tables          # what the sync diffs against, per table
+        self.combined = combined
+        self.watermarks = watermarks
+        self.source = source          # backend the snapshot was synced from
+        self.read_at = read_at        # database clock when the tables were last read
+        self.synced_at = synced_at    # wall clock of the last full sync
+        self.profile = profile        # analyzer.TABLE_QUERIES profile the caller loads
+        self.loaded = loaded          # that profile's tables, if not `tables` themselves
+
+    @property
+    def frames(self):
+        # As analyzer.fetch_all_data(self.profile) returns them
+        t = self.tables if self.loaded is None else self.loaded
+        return t["student"], t["company"], t["performance"], t["hiring"], self.combined
+
+    def updated(self, **changes):
+        state = copy.copy(self)
+        state.__dict__.update(changes)
+        return state
+
+
+# --- Snapshot persistence ---
+def load_snapshot(path=None):
+    path = path or SNAPSHOT_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def save_snapshot(state, path=None):
+    path = path or SNAPSHOT_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# --- Helpers ---
+def to_python(value):
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+def watermarks_for(tables):
+    marks = {}
+    for table, frame in tables.items():
+        if WATERMARK_COLUMN in frame.columns and frame[WATERMARK_COLUMN].notna().any():
+            marks[table] = (WATERMARK_COLUMN, to_python(frame[WATERMARK_COLUMN].max()))
+    return marks
+
+def key_index(frame, keys):
+    return pd.MultiIndex.from_frame(frame[keys].astype(object))
+
+def upsert(frame, delta, keys):
+    if delta.empty:
+        return frame
+    stale = key_index(frame, keys).isin(key_index(delta, keys))
+    return pd.concat([frame[~stale], delta], ignore_index=True)
+
+def changed_rows(old, new, keys):
+    # Rows added, removed or modified between two full reads of a table
+    diff = old.merge(new, how="outer", indicator=True)
+    return diff[diff["_merge"] != "both"][keys].drop_duplicates()
+
+def modified_rows(old, delta, keys):
+    # Rows of `delta` not already in `old` exactly as they are
+    if delta.empty:
+        return delta
+    same = delta.merge(old, how="left", indicator=True)["_merge"].to_numpy() == "both"
+    return delta[~same]
+
+def first_value(conn, sql):
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    value = cursor.fetchone()[0]
+    cursor.close()
+    return value
+
+def row_count(conn, table):
+    return first_value(conn, f"SELECT COUNT(*) FROM {table}")
+
+def database_time(conn):
+    return first_value(conn, "SELECT CURRENT_TIMESTAMP")
+
+def append_rows(frame, rows):
+    # Concatenates two compacted frames, merging their category dictionaries
+    # instead of re-encoding every row
+    if rows.empty:
+        return frame.reset_index(drop=True)
+    columns = {}
+    for column in frame.columns:
+        old, new = frame[column], rows[column]
+        if isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype):
+            values = union_categoricals([old, new], sort_categories=not old.cat.ordered)
+        else:
+            values = pd.concat([old, new], ignore_index=True)
+        columns[column] = pd.Series(values)
+    return pd.DataFrame(columns)
+
+
+# --- Sync ---
+def table_columns(conn, table):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+    columns = [d[0] for d in cursor.description]
+    cursor.close()
+    return columns
+
+def sync_queries(conn, profile):
+    # What the sync keeps of each table besides the caller's profile: with
+    # "full" the tables themselves, otherwise keys and watermark only (a
+    # table without a watermark is kept whole, to diff on the next read)
+    if profile == "full":
+        return {}
+    queries = {}
+    for table in TABLE_ORDER:
+        columns = PRIMARY_KEYS[table] + [WATERMARK_COLUMN]
+        selected = ", ".join(columns) if WATERMARK_COLUMN in table_columns(conn, table) else "*"
+        queries[f"{table}.sync"] = f"SELECT {selected} FROM {table}"
+    return queries
+
+@timed
+def full_sync(source=None, profile="full"):
+    # One concurrent read, as analyzer.fetch_all_data(profile) plus the
+    # sync columns
+    with connection() as conn:
+        read_at = database_time(conn)
+        queries = sync_queries(conn, profile)
+    queries.update(analyzer.TABLE_QUERIES[profile], combined=analyzer.COMBINED_QUERY)
+    frames = analyzer.read_frames(queries)
+    combined = analyzer.compact_frame(frames.pop("combined"))
+    loaded = {table: frames.get(table, pd.DataFrame()) for table in TABLE_ORDER}
+    if profile == "full":
+        tables, loaded = loaded, None
+    else:
+        tables = {table: frames[f"{table}.sync"] for table in TABLE_ORDER}
+    return SyncState(tables, combined, watermarks_for(tables), source, read_at, time.time(), profile, loaded)
+
+DELTA_QUERY = "SELECT {columns} FROM {table} WHERE {column} {op} {ph}"
+KEYS_QUERY = "SELECT {keys} FROM {table}"
+STUDENTS_QUERY = "SELECT s.usn, s.name, s.dept, s.batch, s.cgpa, p.status, c.company, h.ctc" + analyzer.JOIN_CLAUSE
+
+def delta_operator(mark, read_at):
+    # Rows written after the last read have a watermark >= its time. Ones at
+    # the highest watermark seen can only be new if that is the same second
+    # as the read; otherwise strictly newer rows are all there is to fetch.
+    if read_at is None or pd.Timestamp(mark) >= pd.Timestamp(read_at):
+        return ">="
+    return ">"
+
+def fetch_table_delta(conn, table, state):
+    # The table with this interval's changes applied, and the keys of the
+    # rows added, modified or removed
+    old = state.tables[table]
+    keys = PRIMARY_KEYS[table]
+    mark = state.watermarks.get(table)
+    if mark is None:
+        new = pd.read_sql(f"SELECT * FROM {table}", conn)
+        changed = changed_rows(old, new, keys)
+        return (old if changed.empty else new), changed
+
+    column, value = mark
+    ph = placeholder_for(conn)
+    sql = DELTA_QUERY.format(columns=", ".join(old.columns), table=table, column=column,
+                             op=delta_operator(value, state.read_at), ph=ph)
+    delta = pd.read_sql(sql, conn, params=[value])
+    if set(old.columns) - set(keys) - {column}:
+        delta = modified_rows(old, delta, keys)
+    # else only keys and watermark are kept: a row at the same watermark may
+    # still have changed, so every row read counts as modified
+    frame = upsert(old, delta, keys)
+    changed = [delta[keys]]
+
+    # Watermarks cannot see deletes: a count other than the one expected
+    # means some keys are gone (also when inserts hide it in the count)
+    if row_count(conn, table) != len(frame):
+        present = pd.read_sql(KEYS_QUERY.format(keys=", ".join(keys), table=table), conn)
+        kept = key_index(frame, keys).isin(key_index(present, keys))
+        changed.append(frame.loc[~kept, keys])
+        frame = frame[kept].reset_index(drop=True)
+    return frame, pd.concat(changed, ignore_index=True)
+
+def fetch_students(conn, usns):
+    ph = placeholder_for(conn)
+    parts = []
+    for start in range(0, len(usns), JOIN_CHUNK):
+        chunk = usns[start:start + JOIN_CHUNK]
+        parts.append(pd.read_sql(f"{STUDENTS_QUERY} WHERE s.usn IN ({', '.join([ph] * len(chunk))})", conn, params=chunk))
+    return pd.concat(parts, ignore_index=True)
+
+@timed
+def refresh(state):
+    tables = dict(state.tables)
+    changed = {}
+    with connection() as conn:
+        read_at = database_time(conn)
+        for table in TABLE_ORDER:
+            tables[table], changed[table] = fetch_table_delta(conn, table, state)
+        if all(keys.empty for keys in changed.values()):
+            # Same state and frame objects: the store keeps its version and caches
+            state.read_at = read_at
+            return state
+        previous, state = state, state.updated(tables=tables, watermarks=watermarks_for(tables), read_at=read_at)
+        if state.loaded is not None:
+            # Re-read the caller's profile tables that changed (small: DISTINCT columns)
+            loaded = dict(state.loaded)
+            for table, sql in analyzer.TABLE_QUERIES[state.profile].items():
+                if not changed[table].empty:
+                    loaded[table] = pd.read_sql(sql, conn)
+            state.loaded = loaded
+
+        # Students whose joined rows may differ: their own row or performance
+        # changed, or a company/hiring row they interviewed with changed.
+        affected = [changed["student"]["usn"], changed["performance"]["usn"]]
+        cids = pd.concat([changed["company"]["cid"], changed["hiring"]["cid"]]).dropna().unique()
+        if len(cids):
+            for performance in (previous.tables["performance"], tables["performance"]):
+                affected.append(performance.loc[performance["cid"].isin(cids), "usn"])
+        affected = pd.concat(affected).dropna().astype(str).unique().tolist()
+
+        if not affected:
+            return state
+        if len(affected) > FULL_JOIN_SHARE * max(len(tables["student"]), 1):
+            return state.updated(combined=analyzer.compact_frame(pd.read_sql(analyzer.COMBINED_QUERY, conn)))
+        fresh = fetch_students(conn, affected)
+
+    old_combined = state.combined
+    stale = old_combined["usn"].astype(str).isin(affected).to_numpy()
+    new_rows = analyzer.compact_frame(fresh)
+    combined = append_rows(old_combined[~stale], new_rows)
+
+    # Carry the aggregate cubes and trend engine forward instead of rebuilding them
+    carried = [(cube.peek_cube, cube.register_cube),
+               (cube.peek_sketch_cube, cube.register_sketch_cube),
+               (trends.peek_trends, trends.register_trends)]
+    carried = [(peek(old_combined), register) for peek, register in carried]
+    if any(old is not None for old, _ in carried):
+        touched = pd.concat([old_combined[stale].astype(object), new_rows.astype(object)], ignore_index=True)
+        for old, register in carried:
+            if old is not None:
+                register(combined, old.refreshed(combined, touched))
+
+    return state.updated(combined=combined)
+
+
+_state = None
+_state_lock = threading.Lock()
+
+def sync_all_data(source=None, tables="full"):
+    global _state
+    with _state_lock:
+        state = _state or load_snapshot()
+        # A snapshot taken from another database cannot be patched forward,
+        # and a periodic full sync bounds any drift the deltas cannot see
+        if (state is None or getattr(state, "source", None) != source
+                or getattr(state, "profile", "full") != tables
+                or time.time() - (getattr(state, "synced_at", None) or 0) >= FULL_RESYNC_SECONDS):
+            state = full_sync(source, tables)
+            save_snapshot(state)
+        else:
+            previous, state = state, refresh(state)
+            if state is not previous:
+                save_snapshot(state)
+        _state = state
+        return state.frames
+
+def reset_snapshot(path=None):
+    path = path or SNAPSHOT_PATH
+    global _state
+    with _state_lock:
+        _state = None
+        if os.path.exists(path):
+            os.remove(path)
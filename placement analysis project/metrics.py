@@ -0,0 +1,213 @@
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+from analyzer import kpi_values
+from profiling import timed
+from visualization import CGPA_EDGES, bin_cgpa
+
+
+# --- Result ---
+# Every KPI and chart aggregate of one filtered view, in the shapes of
+# visualization.*_stats. Also readable by aggregate name (metrics["batch"]),
+# like the {name: aggregate} dicts of the cube, SQL and worker modes.
+@dataclass(frozen=True)
+class DashboardMetrics:
+    kpis: dict
+    overall: tuple
+    top_recruiters: pd.DataFrame
+    batch: pd.DataFrame
+    dept: pd.DataFrame
+    salary: pd.DataFrame
+    conversion: pd.DataFrame
+    cgpa: tuple
+
+    @classmethod
+    def of(cls, aggs):
+        return aggs if isinstance(aggs, cls) else cls(**{f.name: aggs[f.name] for f in fields(cls)})
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    @property
+    def total_students(self):
+        return self.kpis["total_students"]
+
+    @property
+    def placed_students(self):
+        return self.kpis["placed_students"]
+
+    @property
+    def shortlisted_students(self):
+        return self.kpis["shortlisted_students"]
+
+    @property
+    def placement_rate(self):
+        return self.kpis["placement_rate"]
+
+
+# --- Single pass ---
+# One grouped reduction over the status codes: a student x status matrix of
+# "has a row with this status" (one bincount over the rows), plus the
+# distinct (company, student) pairs. dept, batch and CGPA belong to the
+# student, so every KPI and student count is a column sum of that matrix
+# over the students of a group; no aggregate goes back to the rows. Students
+# are numbered within the view, so the arrays are sized by the students
+# filtered in rather than the whole USN dictionary of the loaded frame.
+def category_codes(values):
+    values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+    return values.cat.codes.to_numpy(), values.dtype
+
+def categorical(codes, dtype):
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
+class MetricsEngine:
+    @timed(name="metrics.reduce")
+    def __init__(self, df, edges=CGPA_EDGES):
+        codes, self.dtypes = {}, {}
+        for key, column in [("status", "Placement_status"), ("company", "company"),
+                            ("dept", "dept"), ("batch", "batch")]:
+            codes[key], self.dtypes[key] = category_codes(df[column])
+        codes["cgpa_bin"], self.dtypes["cgpa_bin"] = category_codes(bin_cgpa(df["cgpa"], edges))
+        statuses = list(self.dtypes["status"].categories)
+        self.placed = statuses.index("Placed")
+        self.shortlisted = statuses.index("Shortlisted")
+
+        usn, students = pd.factorize(df["usn"])
+        usn = usn.astype(np.int64)
+        status, company = codes["status"], codes["company"]
+        self.n_students = n_students = len(students)
+        n_status = self.size("status")
+        known = status >= 0
+        self.has = np.bincount(usn[known] * n_status + status[known],
+                               minlength=n_students * n_status).reshape(n_students, n_status) > 0
+        self.rows = np.bincount(usn, minlength=n_students)
+        self.students = {}
+        for key in ["dept", "batch", "cgpa_bin"]:
+            self.students[key] = np.full(n_students, -1, dtype=np.int64)
+            self.students[key][usn] = codes[key]
+
+        on_company = company >= 0
+        pairs = company[on_company].astype(np.int64) * n_students + usn[on_company]
+        status = status[on_company]
+        self.company_pairs = {
+            "all": pd.unique(pairs),
+            "placed": pd.unique(pairs[status == self.placed]),
+            "hired": pd.unique(pairs[(status == self.placed) | (status == self.shortlisted)]),
+        }
+        placed = on_company & (codes["status"] == self.placed)
+        self.placed_ctc = pd.Series(df["ctc"].to_numpy()[placed], index=company[placed])
+
+    def size(self, key):
+        return len(self.dtypes[key].categories)
+
+    def present(self):
+        return self.rows > 0
+
+    def per_company(self, kind):
+        return np.bincount(self.company_pairs[kind] // max(self.n_students, 1), minlength=self.size("company"))
+
+    def kpis(self):
+        return kpi_values(int(self.present().sum()), int(self.has[:, self.placed].sum()),
+                          int(self.has[:, self.shortlisted].sum()))
+
+    def overall_status_stats(self):
+        total = int(self.present().sum())
+        stats = pd.DataFrame({"Placement_status": categorical(np.arange(self.size("status")), self.dtypes["status"]),
+                              "count": self.has.sum(axis=0).astype("int64")})
+        stats["percent"] = stats["count"]/total*100 if total else 0.0
+        return stats, total
+
+    def group_wise_stats(self, group_col):
+        group = self.students[group_col]
+        members = self.present() & (group >= 0)
+        n_groups, n_status = self.size(group_col), self.size("status")
+        totals = np.bincount(group[members], minlength=n_groups)
+        counts = np.stack([np.bincount(group[members], weights=self.has[members, s], minlength=n_groups)
+                           for s in range(n_status)], axis=1)
+        groups = np.flatnonzero(totals)
+        stats = pd.DataFrame({
+            group_col: categorical(np.repeat(groups, n_status), self.dtypes[group_col]),
+            "Placement_status": categorical(np.tile(np.arange(n_status), len(groups)), self.dtypes["status"]),
+            "count": counts[groups].ravel().astype("int64"),
+            "total": np.repeat(totals[groups], n_status).astype("int64"),
+        })
+        stats["percent"] = stats["count"]/stats["total"]*100
+        return stats
+
+    def by_company(self, values, name):
+        companies = np.flatnonzero(values)
+        return pd.DataFrame({"company": categorical(companies, self.dtypes["company"]),
+                             name: values[companies].astype("int64")})
+
+    def top_recruiters_stats(self):
+        return self.by_company(self.per_company("hired"), "hires").sort_values("hires", ascending=False)
+
+    def salary_stats(self):
+        ctc = self.placed_ctc
+        stats = ctc.groupby(level=0, sort=True).agg(["max", "min", "sum", "count"])
+        average = stats["sum"]/stats["count"].where(stats["count"] > 0)
+        return pd.DataFrame({
+            "company": categorical(stats.index.to_numpy(), self.dtypes["company"]),
+            "highest": stats["max"].astype(ctc.dtype).to_numpy(),
+            "lowest": stats["min"].astype(ctc.dtype).to_numpy(),
+            "average": average.astype(ctc.dtype).to_numpy(),
+        })
+
+    def conversion_stats(self):
+        totals = self.per_company("all")
+        if not totals.any():
+            return pd.DataFrame(columns=["company", "conversion"])
+        companies = np.flatnonzero(totals)
+        placed = self.per_company("placed")[companies]
+        conversion = pd.Series(placed/totals[companies]).mul(100).round().astype(int)
+        return pd.DataFrame({"company": categorical(companies, self.dtypes["company"]),
+                             "conversion": conversion.to_numpy()})
+
+    def cgpa_bin_stats(self):
+        bins = self.students["cgpa_bin"]
+        binned = self.present() & (bins >= 0)
+        n_bins = self.size("cgpa_bin")
+        hired = self.has[:, self.placed] | self.has[:, self.shortlisted]
+        stats_all = self.cgpa_counts(np.bincount(bins[binned], minlength=n_bins))
+        stats_p = self.cgpa_counts(np.bincount(bins[binned & hired], minlength=n_bins))
+        dominant_bin = None
+        if binned.any():
+            # Ties resolve like cgpa_bin_stats: the smallest label wins
+            rows = pd.Series(np.bincount(bins[binned], weights=self.rows[binned], minlength=n_bins),
+                             index=self.dtypes["cgpa_bin"].categories)
+            dominant_bin = sorted(rows[rows == rows.max()].index.astype(str))[0]
+        return stats_all, stats_p, dominant_bin
+
+    def cgpa_counts(self, counts):
+        bins = np.flatnonzero(counts)
+        return pd.DataFrame({"cgpa_bin": categorical(bins, self.dtypes["cgpa_bin"]),
+                             "count": counts[bins].astype("int64")})
+
+    def aggregate(self, name):
+        if name in ("batch", "dept"):
+            return self.group_wise_stats(name)
+        return {
+            "kpis": self.kpis,
+            "overall": self.overall_status_stats,
+            "top_recruiters": self.top_recruiters_stats,
+            "salary": self.salary_stats,
+            "conversion": self.conversion_stats,
+            "cgpa": self.cgpa_bin_stats,
+        }[name]()
+
+    @timed(name="metrics.aggregates")
+    def metrics(self):
+        return DashboardMetrics(
+            kpis=self.kpis(),
+            overall=self.overall_status_stats(),
+            top_recruiters=self.top_recruiters_stats(),
+            batch=self.group_wise_stats("batch"),
+            dept=self.group_wise_stats("dept"),
+            salary=self.salary_stats(),
+            conversion=self.conversion_stats(),
+            cgpa=self.cgpa_bin_stats(),
+        )
+
+def compute_metrics(df):
+    return MetricsEngine(df).metrics()
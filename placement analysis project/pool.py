@@ -0,0 +1,139 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    pass
+
+class PoolClosedError(Exception):
+    pass
+
+
+# --- Health check ---
+def ping_connection(conn) -> bool:
+    try:
+        if hasattr(conn, "ping"):
+            # mysql.connector: reconnects in place if the server dropped us
+            conn.ping(reconnect=True, attempts=1, delay=0)
+        else:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+    except Exception:
+        return False
+    return True
+
+def close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# --- Connection pool ---
+# `factory` is any zero-argument callable returning a DB-API connection, so
+# the pool works the same for mysql.connector, sqlite3 or a fake backend.
+class ConnectionPool:
+    def __init__(self, factory, size=5, timeout=10, health_check=ping_connection):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = False
+
+    def _new_connection(self):
+        conn = self.factory()
+        self.created += 1
+        return conn
+
+    def acquire(self, timeout=None):
+        if self.closed:
+            raise PoolClosedError("Connection pool is closed")
+        wait = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            raise PoolExhaustedError(f"No free connection after {wait}s (pool size {self.size})")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_connection()
+            if not self.health_check(conn):
+                close_quietly(conn)
+                conn = self._new_connection()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            # End the read transaction so the next user sees fresh data
+            conn.rollback()
+        except Exception:
+            close_quietly(conn)
+        else:
+            # Connections handed out before close() are closed on return
+            # rather than parked in the idle queue of a dead pool
+            with self._lock:
+                if not self.closed:
+                    self._idle.put(conn)
+                    conn = None
+            if conn is not None:
+                close_quietly(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    # --- Per-session checkout ---
+    # A session keeps the same connection across calls until it checks in.
+    def checkout(self, session_id, timeout=None):
+        with self._lock:
+            conn = self._sessions.get(session_id)
+        if conn is not None:
+            if self.health_check(conn):
+                return conn
+            with self._lock:
+                self._sessions.pop(session_id, None)
+            close_quietly(conn)
+            self._slots.release()
+        conn = self.acquire(timeout)
+        with self._lock:
+            self._sessions[session_id] = conn
+        return conn
+
+    def checkin(self, session_id):
+        with self._lock:
+            conn = self._sessions.pop(session_id, None)
+        if conn is not None:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for conn in sessions:
+            close_quietly(conn)
+        while True:
+            try:
+                close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    @property
+    def idle(self):
+        return self._idle.qsize()
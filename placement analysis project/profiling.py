@@ -0,0 +1,345 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# Finished render profiles are logged as one JSON object per line, to
+# stderr or, with PLACEMENT_PROFILE_LOG set, appended to that file.
+logger = logging.getLogger("placement.profiling")
+logger.setLevel(logging.INFO)
+PROFILE_LOG = os.environ.get("PLACEMENT_PROFILE_LOG")
+if not logger.handlers:
+    handler = logging.FileHandler(PROFILE_LOG) if PROFILE_LOG else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
+
+PROFILE_MODES = ["off", "cprofile", "sampling"]
+SAMPLE_INTERVAL = 0.005    # seconds between stack samples in "sampling" mode
+REPORT_LINES = 25
+
+# The profile of the render running in this thread/context, if any. Every
+# timer below is a no-op when it is unset, so instrumented code costs one
+# context-variable lookup per call outside a profiled render.
+_active = contextvars.ContextVar("placement_profile", default=None)
+
+def active_profile():
+    return _active.get()
+
+# tracemalloc is process-wide: its counters only mean something for a
+# render while no other session is profiling. Every start bumps the
+# generation, so a stage can tell whether another render overlapped it.
+_running = set()
+_running_lock = threading.Lock()
+_generation = 0
+
+def memory_mark():
+    with _running_lock:
+        return _generation if len(_running) == 1 else None
+
+def row_count(value):
+    # Rows of a frame/series/array, or of the first one in a returned tuple
+    if isinstance(value, tuple):
+        value = next((item for item in value if hasattr(item, "shape")), None)
+    shape = getattr(value, "shape", None)
+    return shape[0] if shape else None
+
+
+# --- Sampling profiler ---
+# Samples the profiled thread's stack from a helper thread and counts, for
+# each function, the samples it appeared in (inclusive time).
+class StackSampler:
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                seen.add((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            self.counts.update(seen)
+            self.samples += 1
+
+    def report(self, limit=REPORT_LINES):
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms (inclusive)"]
+        for (filename, lineno, name), count in self.counts.most_common(limit):
+            share = count / self.samples * 100 if self.samples else 0
+            lines.append(f"{share:6.1f}% {count:7d}  {name} ({filename}:{lineno})")
+        return "\n".join(lines)
+
+
+# --- Render profile ---
+# Stages, queries and (optionally) a cProfile/sampling report for one
+# dashboard render of one session.
+class RenderProfile:
+    def __init__(self, session=None, mode="off", trace_memory=False):
+        self.session = session
+        self.mode = mode
+        self.stages = []
+        self.queries = []
+        self.created = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.report = None
+        self.trace_memory = trace_memory
+        self.thread_id = threading.get_ident()
+        self._depths = {}     # thread id -> stage nesting depth
+        self._profiler = None
+        self._sampler = None
+        self._owns_tracemalloc = False
+
+    def start(self):
+        global _generation
+        with _running_lock:
+            _running.add(self)
+            _generation += 1
+            alone = len(_running) == 1
+        if self.trace_memory and alone and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler (or a debugger) already owns the hook
+                self._profiler = None
+                self.report = "cProfile unavailable: another profiler is active"
+        elif self.mode == "sampling":
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+
+    def stop(self):
+        self.seconds = time.perf_counter() - self.started
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(REPORT_LINES)
+            self.report = out.getvalue()
+        if self._sampler is not None:
+            self._sampler.stop()
+            self.report = self._sampler.report()
+        with _running_lock:
+            _running.discard(self)
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    @property
+    def finished(self):
+        return self.seconds is not None
+
+    def measures_memory(self):
+        # Only on the render's own thread, with tracing it started itself
+        return self._owns_tracemalloc and threading.get_ident() == self.thread_id
+
+    def record_query(self, sql, params=None):
+        entry = {"sql": " ".join(str(sql).split()), "params": len(params) if params else 0,
+                 "seconds": 0.0, "rows": 0}
+        self.queries.append(entry)
+        return entry
+
+    @property
+    def stage_seconds(self):
+        return sum(s["seconds"] for s in self.stages if s["depth"] == 0)
+
+    @property
+    def query_seconds(self):
+        return sum(q["seconds"] for q in self.queries)
+
+    def to_dict(self):
+        return {
+            "session": self.session,
+            "created": self.created.isoformat(),
+            "mode": self.mode,
+            "seconds": self.seconds,
+            "stages": self.stages,
+            "queries": self.queries,
+            "report": self.report,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), default=str, **kwargs)
+
+    def stage_frame(self):
+        import pandas as pd
+        columns = ["stage", "depth", "seconds", "rows", "memory_delta"]
+        frame = pd.DataFrame(self.stages, columns=columns)
+        frame["stage"] = [".." * depth + name for depth, name in zip(frame["depth"], frame["stage"])]
+        return frame
+
+    def query_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.queries, columns=["sql", "params", "seconds", "rows"])
+
+
+def start_profile(session=None, mode="off", trace_memory=False):
+    profile = RenderProfile(session, mode, trace_memory)
+    _active.set(profile)
+    profile.start()
+    return profile
+
+def finish_profile(profile):
+    # Safe to call twice, and from a later run than the one that started it
+    if profile.seconds is None:
+        profile.stop()
+        logger.info(profile.to_json())
+    if _active.get() is profile:
+        _active.set(None)
+    return profile
+
+@contextmanager
+def profile_render(session=None, mode="off", trace_memory=False):
+    profile = start_profile(session, mode, trace_memory)
+    try:
+        yield profile
+    finally:
+        finish_profile(profile)
+
+
+# --- Stage timers ---
+class Stage:
+    def __init__(self):
+        self.rows = None
+
+@contextmanager
+def stage(name, rows=None):
+    profile = _active.get()
+    if profile is None or profile.finished:
+        yield Stage()
+        return
+    handle = Stage()
+    handle.rows = rows
+    # Depth is kept per thread: helper threads running in a copy of the
+    # render's context nest their own stages without skewing the render's
+    thread = threading.get_ident()
+    depth = profile._depths.get(thread, 0)
+    entry = {"stage": name, "depth": depth, "seconds": None, "rows": None, "memory_delta": None}
+    profile.stages.append(entry)
+    mark = memory_mark() if profile.measures_memory() else None
+    memory = tracemalloc.get_traced_memory()[0] if mark is not None else None
+    profile._depths[thread] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        entry["seconds"] = time.perf_counter() - start
+        profile._depths[thread] = depth
+        entry["rows"] = handle.rows
+        if mark is not None and mark == memory_mark() and tracemalloc.is_tracing():
+            entry["memory_delta"] = tracemalloc.get_traced_memory()[0] - memory
+
+def timed(func=None, name=None):
+    # @timed or @timed(name="..."): records a stage per call, with the row
+    # count of what the call returned.
+    if func is None:
+        return lambda f: timed(f, name)
+    label = name or f"{func.__module__}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None or profile.finished:
+            return func(*args, **kwargs)
+        with stage(label) as s:
+            result = func(*args, **kwargs)
+            s.rows = row_count(result)
+            return result
+    return wrapper
+
+
+# --- Query timing ---
+# Thin DB-API proxies handed out while a profile is active; every execute
+# and fetch on them is added to that profile's query log.
+class TimedCursor:
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+        self._entry = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self._entry = self._profile.record_query(sql, params)
+        start = time.perf_counter()
+        try:
+            if params is None:
+                return self._cursor.execute(sql, *args, **kwargs)
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._entry["seconds"] += time.perf_counter() - start
+
+    def executemany(self, sql, seq_of_params, *args, **kwargs):
+        self._entry = self._profile.record_query(sql)
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_params, *args, **kwargs)
+        finally:
+            self._entry["seconds"] += time.perf_counter() - start
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        if self._entry is not None:
+            self._entry["seconds"] += time.perf_counter() - start
+            if method == "fetchone":
+                self._entry["rows"] += result is not None
+            else:
+                self._entry["rows"] += len(result)
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+class TimedConnection:
+    def __init__(self, conn, profile):
+        self._conn = conn
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs), self._profile)
+
+def unwrap(conn):
+    return conn._conn if isinstance(conn, TimedConnection) else conn
+
+def instrument(conn):
+    profile = _active.get()
+    return conn if profile is None or profile.finished else TimedConnection(conn, profile)
@@ -0,0 +1,329 @@
+import sqlite3
+
+import pandas as pd
+from analyzer import PLACEMENT_ORDER, STATUS_LABELS, STATUS_CODES, JOIN_CLAUSE, kpi_values, map_status
+from backends import current_backend
+from dbconfig import connection
+from export import PIVOT_INDEX
+from profiling import timed, unwrap
+
+PLACED = STATUS_CODES["Placed"]
+SHORTLISTED = STATUS_CODES["Shortlisted"]
+KNOWN_STATUSES = ", ".join(str(code) for code in sorted(STATUS_LABELS))
+
+GROUP_COLUMNS = {"batch": "s.batch", "dept": "s.dept"}
+
+CGPA_CASE = """
+    CASE WHEN s.cgpa < 6 THEN '<6'
+         WHEN s.cgpa < 7 THEN '6-7'
+         WHEN s.cgpa < 8 THEN '7-8'
+         WHEN s.cgpa < 9 THEN '8-9'
+         ELSE '9-10' END
+"""
+
+# Same rule as apply_filters: the three most recent batches, or no filter
+# at all (rows without a batch included) when fewer than three exist.
+LAST_3_BATCHES = """
+    (s.batch IN (SELECT batch FROM (
+        SELECT DISTINCT batch FROM student WHERE batch IS NOT NULL
+        ORDER BY batch DESC LIMIT 3) recent)
+     OR (SELECT COUNT(DISTINCT batch) FROM student) < 3)
+"""
+
+FILTER_OPTION_QUERIES = {
+    "dept": "SELECT DISTINCT dept FROM student WHERE dept IS NOT NULL ORDER BY dept",
+    "batch": "SELECT DISTINCT batch FROM student WHERE batch IS NOT NULL ORDER BY batch",
+    "company": "SELECT DISTINCT company FROM company WHERE company IS NOT NULL ORDER BY company",
+}
+
+RECORD_COLUMNS = "s.usn, s.name, s.dept, s.batch, s.cgpa, p.status, c.company, h.ctc"
+
+def like_pattern(text):
+    # Case-insensitive substring match, with LIKE wildcards taken literally
+    escaped = text.lower().replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
+
+def placeholder_for(conn):
+    return "?" if isinstance(unwrap(conn), sqlite3.Connection) else "%s"
+
+
+# --- Query builder ---
+# Compiles the sidebar filters into a parameterized WHERE clause over the
+# student/performance/hiring/company join and builds the GROUP BY queries
+# behind each KPI and chart. Every method returns (sql, params).
+class PlacementQuery:
+    def __init__(self, batch_filter="All", dept_filter="All", company_filter="All", placeholder="%s"):
+        self.placeholder = placeholder
+        self.clauses = []
+        self.params = []
+
+        if batch_filter == "Last 3 Years":
+            self.clauses.append(LAST_3_BATCHES)
+        elif batch_filter != "All":
+            self._add("s.batch", batch_filter)
+
+        if dept_filter != "All":
+            self._add("s.dept", dept_filter)
+
+        if company_filter != "All":
+            self._add("c.company", company_filter)
+            # Implied by the join once c matched; lets the planner start from
+            # company and reach performance through its cid index
+            self.clauses.append("p.cid = c.cid")
+
+    def _add(self, column, value):
+        self.clauses.append(f"{column} = {self.placeholder}")
+        self.params.append(value)
+
+    def _build(self, select, *conditions, params=(), group_by=None, order_by=None, limit=None, offset=0):
+        # `params` bind the placeholders of `conditions`, after the filters'
+        clauses = self.clauses + list(conditions)
+        sql = f"SELECT {select} {JOIN_CLAUSE}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if group_by:
+            sql += f" GROUP BY {group_by}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        return sql, list(self.params) + list(params)
+
+    def kpis(self):
+        return self._build(f"""
+            COUNT(DISTINCT s.usn) AS total,
+            COUNT(DISTINCT CASE WHEN p.status = {PLACED} THEN s.usn END) AS placed,
+            COUNT(DISTINCT CASE WHEN p.status = {SHORTLISTED} THEN s.usn END) AS shortlisted
+        """)
+
+    def status_counts(self):
+        return self._build("p.status AS status, COUNT(DISTINCT s.usn) AS count",
+                           f"p.status IN ({KNOWN_STATUSES})", group_by="p.status")
+
+    def group_totals(self, group_col):
+        column = GROUP_COLUMNS[group_col]
+        return self._build(f"{column} AS {group_col}, COUNT(DISTINCT s.usn) AS total",
+                           f"{column} IS NOT NULL", group_by=column)
+
+    def group_status_counts(self, group_col):
+        column = GROUP_COLUMNS[group_col]
+        return self._build(f"{column} AS {group_col}, p.status AS status, COUNT(DISTINCT s.usn) AS count",
+                           f"{column} IS NOT NULL", f"p.status IN ({KNOWN_STATUSES})",
+                           group_by=f"{column}, p.status")
+
+    def company_hires(self):
+        return self._build("c.company AS company, COUNT(DISTINCT s.usn) AS hires",
+                           f"p.status IN ({PLACED}, {SHORTLISTED})", "c.company IS NOT NULL",
+                           group_by="c.company", order_by="hires DESC")
+
+    def ctc_stats(self):
+        return self._build("c.company AS company, MAX(h.ctc) AS highest, MIN(h.ctc) AS lowest, AVG(h.ctc) AS average",
+                           f"p.status = {PLACED}", "c.company IS NOT NULL",
+                           group_by="c.company", order_by="c.company")
+
+    def conversion(self):
+        return self._build(f"""
+            c.company AS company,
+            COUNT(DISTINCT CASE WHEN p.status = {PLACED} THEN s.usn END) AS placed,
+            COUNT(DISTINCT s.usn) AS total
+        """, "c.company IS NOT NULL", group_by="c.company", order_by="c.company")
+
+    def cgpa_bins(self, placed_only=False):
+        conditions = ["s.cgpa IS NOT NULL"]
+        if placed_only:
+            conditions.append(f"p.status IN ({PLACED}, {SHORTLISTED})")
+        return self._build(f"{CGPA_CASE} AS cgpa_bin, COUNT(DISTINCT s.usn) AS count, COUNT(*) AS n_rows",
+                           *conditions, group_by="cgpa_bin", order_by="cgpa_bin")
+
+    def records(self, usns=None):
+        if usns is None:
+            return self._build(RECORD_COLUMNS)
+        usns = list(usns)
+        return self._build(RECORD_COLUMNS, f"s.usn IN ({', '.join([self.placeholder] * len(usns))})", params=usns)
+
+    # --- Hiring records table (see records.SqlRecordsView) ---
+    # The students of the pivot are those with a known status at a company
+    # and every PIVOT_INDEX column set; a search matches their usn or name,
+    # or any company they have a row for in the filtered view.
+    def _record_conditions(self, search=""):
+        conditions = [f"p.status IN ({KNOWN_STATUSES})", "c.company IS NOT NULL"]
+        conditions += [f"s.{column} IS NOT NULL" for column in PIVOT_INDEX]
+        if not search:
+            return conditions, []
+        like = f"LOWER({{}}) LIKE {self.placeholder} ESCAPE '!'"
+        companies, company_params = self._build("s.usn", like.format("c.company"), params=[like_pattern(search)])
+        conditions.append(f"({like.format('s.usn')} OR {like.format('s.name')} OR s.usn IN ({companies}))")
+        return conditions, [like_pattern(search)] * 2 + company_params
+
+    def record_count(self, search=""):
+        conditions, params = self._record_conditions(search)
+        return self._build("COUNT(DISTINCT s.usn) AS total", *conditions, params=params)
+
+    def record_students(self, sort_by="usn", ascending=True, search="", limit=None, offset=0):
+        conditions, params = self._record_conditions(search)
+        direction = "ASC" if ascending else "DESC"
+        columns = [sort_by] + [c for c in PIVOT_INDEX if c != sort_by]
+        return self._build("DISTINCT " + ", ".join(f"s.{c}" for c in PIVOT_INDEX), *conditions, params=params,
+                           order_by=", ".join(f"s.{c} {direction}" for c in columns), limit=limit, offset=offset)
+
+    def record_companies(self):
+        conditions, _ = self._record_conditions()
+        return self._build("DISTINCT c.company AS company", *conditions, order_by="c.company")
+
+
+# --- Aggregate fetchers ---
+# Results come back in the exact shapes produced by visualization.*_stats.
+def read_query(conn, query):
+    sql, params = query
+    return pd.read_sql(sql, conn, params=params or None)
+
+def status_categorical(codes):
+    return pd.Categorical(codes.map(map_status), categories=PLACEMENT_ORDER, ordered=True)
+
+def fetch_overall_status(conn, query, total):
+    counts = read_query(conn, query.status_counts())
+    counts["Placement_status"] = status_categorical(counts["status"])
+    stats = (counts.groupby("Placement_status", observed=False)["count"].sum()
+                   .reset_index(name="count"))
+    stats["percent"] = stats["count"]/total*100 if total else 0.0
+    return stats, total
+
+def fetch_group_wise(conn, query, group_col):
+    totals = read_query(conn, query.group_totals(group_col))
+    counts = read_query(conn, query.group_status_counts(group_col))
+    counts["Placement_status"] = counts["status"].map(map_status)
+
+    # One row per (group, status), zero-filled like a categorical groupby
+    grid = pd.MultiIndex.from_product([totals[group_col], PLACEMENT_ORDER],
+                                      names=[group_col, "Placement_status"])
+    stats = (counts.set_index([group_col, "Placement_status"])["count"]
+                   .reindex(grid, fill_value=0).reset_index())
+    stats["Placement_status"] = pd.Categorical(stats["Placement_status"], categories=PLACEMENT_ORDER, ordered=True)
+    stats = stats.merge(totals, on=group_col)
+    stats["percent"] = stats["count"]/stats["total"]*100
+    return stats
+
+def fetch_conversion(conn, query):
+    conv = read_query(conn, query.conversion())
+    conv["conversion"] = (conv["placed"]/conv["total"]*100).round().astype(int)
+    return conv[["company", "conversion"]]
+
+def fetch_cgpa_bins(conn, query):
+    stats_all = read_query(conn, query.cgpa_bins())
+    stats_p = read_query(conn, query.cgpa_bins(placed_only=True))
+    dominant_bin = None
+    if not stats_all.empty:
+        # Ties resolve like Series.mode(): the smallest label wins
+        top = stats_all[stats_all["n_rows"] == stats_all["n_rows"].max()]
+        dominant_bin = sorted(top["cgpa_bin"])[0]
+    return stats_all[["cgpa_bin", "count"]], stats_p[["cgpa_bin", "count"]], dominant_bin
+
+def fetch_kpis(conn, query):
+    kpis = read_query(conn, query.kpis()).iloc[0]
+    return kpi_values(int(kpis["total"]), int(kpis["placed"]), int(kpis["shortlisted"]))
+
+SQL_AGGREGATES = {
+    "kpis": fetch_kpis,
+    "overall": lambda conn, query: fetch_overall_status(conn, query, fetch_kpis(conn, query)["total_students"]),
+    "top_recruiters": lambda conn, query: read_query(conn, query.company_hires()),
+    "batch": lambda conn, query: fetch_group_wise(conn, query, "batch"),
+    "dept": lambda conn, query: fetch_group_wise(conn, query, "dept"),
+    "salary": lambda conn, query: read_query(conn, query.ctc_stats()),
+    "conversion": fetch_conversion,
+    "cgpa": fetch_cgpa_bins,
+}
+
+# Backends without SQL (the Parquet snapshot) push the filters down into the
+# file read instead and aggregate the (small) result in pandas.
+@timed
+def fetch_aggregates(batch_filter="All", dept_filter="All", company_filter="All"):
+    backend = current_backend()
+    if not backend.supports_sql:
+        from visualization import compute_aggregates
+        return compute_aggregates(backend.read_combined(batch_filter, dept_filter, company_filter))
+    with connection() as conn:
+        query = PlacementQuery(batch_filter, dept_filter, company_filter, placeholder_for(conn))
+        kpis = fetch_kpis(conn, query)
+        aggs = {"kpis": kpis, "overall": fetch_overall_status(conn, query, kpis["total_students"])}
+        aggs.update((name, fetch(conn, query)) for name, fetch in SQL_AGGREGATES.items() if name not in aggs)
+        return aggs
+
+# Only the named aggregate (see SQL_AGGREGATES), for charts drawn on demand
+@timed
+def fetch_aggregate(name, batch_filter="All", dept_filter="All", company_filter="All"):
+    backend = current_backend()
+    if not backend.supports_sql:
+        from visualization import compute_aggregate
+        return compute_aggregate(backend.read_combined(batch_filter, dept_filter, company_filter), name)
+    with connection() as conn:
+        query = PlacementQuery(batch_filter, dept_filter, company_filter, placeholder_for(conn))
+        return SQL_AGGREGATES[name](conn, query)
+
+@timed
+def fetch_records(batch_filter="All", dept_filter="All", company_filter="All"):
+    backend = current_backend()
+    if not backend.supports_sql:
+        return backend.read_combined(batch_filter, dept_filter, company_filter)
+    with connection() as conn:
+        query = PlacementQuery(batch_filter, dept_filter, company_filter, placeholder_for(conn))
+        records = read_query(conn, query.records())
+    records["Placement_status"] = status_categorical(records["status"])
+    return records
+
+# --- Trend base counts ---
+# trends.base_counts in SQL: per-student flags first, then summed per group,
+# so the trend engine is built from a few hundred rows, not every record.
+TREND_KEYS = {"batch": "s.batch", "dept": "s.dept", "company": "c.company"}
+TREND_COUNTS_QUERY = f"""
+    SELECT {{keys}},
+           COUNT(*) AS students, SUM(placed) AS placed, SUM(shortlisted) AS shortlisted,
+           SUM(interviewed) AS interviewed, SUM(placed * interviewed) AS placed_interviewed,
+           COALESCE(SUM(ctc_sum), 0) AS ctc_sum, SUM(ctc_count) AS ctc_count,
+           MIN(ctc_min) AS ctc_min, MAX(ctc_max) AS ctc_max
+    FROM (
+        SELECT {{selected}}, s.usn,
+               MAX(CASE WHEN p.status = {PLACED} THEN 1 ELSE 0 END) AS placed,
+               MAX(CASE WHEN p.status = {SHORTLISTED} THEN 1 ELSE 0 END) AS shortlisted,
+               MAX(CASE WHEN c.company IS NOT NULL THEN 1 ELSE 0 END) AS interviewed,
+               SUM(CASE WHEN p.status = {PLACED} THEN h.ctc END) AS ctc_sum,
+               COUNT(CASE WHEN p.status = {PLACED} THEN h.ctc END) AS ctc_count,
+               MIN(CASE WHEN p.status = {PLACED} THEN h.ctc END) AS ctc_min,
+               MAX(CASE WHEN p.status = {PLACED} THEN h.ctc END) AS ctc_max
+        {JOIN_CLAUSE}
+        WHERE {{conditions}}
+        GROUP BY {{columns}}, s.usn
+    ) per_student
+    GROUP BY {{keys}}
+"""
+
+def trend_counts_query(keys):
+    selected = ", ".join(f"{TREND_KEYS[key]} AS {key}" for key in keys)
+    columns = ", ".join(TREND_KEYS[key] for key in keys)
+    conditions = " AND ".join(f"{TREND_KEYS[key]} IS NOT NULL" for key in keys if key != "dept")
+    return TREND_COUNTS_QUERY.format(keys=", ".join(keys), selected=selected, columns=columns, conditions=conditions)
+
+def fetch_trend_counts(conn, keys):
+    from trends import COUNT_COLUMNS
+    counts = read_query(conn, (trend_counts_query(keys), []))
+    counts[COUNT_COLUMNS] = counts[COUNT_COLUMNS].astype("int64")
+    counts[["ctc_sum", "ctc_min", "ctc_max"]] = counts[["ctc_sum", "ctc_min", "ctc_max"]].astype("float64")
+    return counts
+
+@timed
+def fetch_trend_engine():
+    from trends import TrendEngine
+    backend = current_backend()
+    if not backend.supports_sql:
+        return TrendEngine(backend.read_combined())
+    with connection() as conn:
+        return TrendEngine(None, fetch_trend_counts(conn, ["batch", "dept"]),
+                           fetch_trend_counts(conn, ["batch", "dept", "company"]))
+
+@timed
+def fetch_filter_options():
+    backend = current_backend()
+    if not backend.supports_sql:
+        return backend.filter_options()
+    with connection() as conn:
+        options = {column: read_query(conn, (sql, []))[column].tolist() for column, sql in FILTER_OPTION_QUERIES.items()}
+    return options["dept"], options["batch"], options["company"]
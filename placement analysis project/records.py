@@ -0,0 +1,134 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import query_builder as qb
+from backends import current_backend
+from dbconfig import connection
+from export import PIVOT_INDEX, pivot_records, record_companies
+from profiling import timed
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def contains(series, text):
+    # Categorical columns are matched on their (few) categories, not per row
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        hits = series.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+        return pd.Series(series.cat.codes.isin(np.flatnonzero(hits)), index=series.index)
+    return series.astype(str).str.contains(text, case=False, regex=False, na=False)
+
+
+# --- Paginated records ---
+# One row per student of the hiring pivot, indexed by usn -> row positions so
+# a page only pivots the rows of the students shown on it.
+class RecordsView:
+    @timed(name="records.RecordsView")
+    def __init__(self, df):
+        self.df = df
+        valid = (df["Placement_status"].notna() & df["company"].notna()
+                 & df[PIVOT_INDEX].notna().all(axis=1))
+        self.students = df.loc[valid, PIVOT_INDEX].drop_duplicates().reset_index(drop=True)
+        self.companies = record_companies(df)
+        self.positions = df.groupby("usn", observed=True, sort=False).indices
+        self._orders = {}
+
+    def __sizeof__(self):
+        # For the result caches' memory cap. Sort orders are memoized after
+        # the view is cached, so every possible one is counted up front.
+        orders = 2 * len(PIVOT_INDEX) * len(self.students) * np.dtype(np.intp).itemsize
+        return int(self.df.memory_usage(deep=True).sum()
+                   + self.students.memory_usage(deep=True).sum()
+                   + sum(p.nbytes for p in self.positions.values())
+                   + orders)
+
+    def order(self, sort_by, ascending):
+        key = (sort_by, ascending)
+        if key not in self._orders:
+            columns = [sort_by] + [c for c in PIVOT_INDEX if c != sort_by]
+            sorted_students = self.students.sort_values(columns, ascending=ascending, kind="stable")
+            self._orders[key] = sorted_students.index.to_numpy()
+        return self._orders[key]
+
+    def search(self, text):
+        students = self.students
+        match = contains(students["usn"], text) | contains(students["name"], text)
+        company_rows = contains(self.df["company"], text)
+        if company_rows.any():
+            match |= students["usn"].isin(self.df.loc[company_rows, "usn"].unique())
+        return np.flatnonzero(match.to_numpy())
+
+    def count(self, search=""):
+        return len(self.search(search)) if search else len(self.students)
+
+    @timed(name="records.RecordsView.page")
+    def page(self, page=1, page_size=PAGE_SIZES[0], sort_by="usn", ascending=True, search=""):
+        order = self.order(sort_by, ascending)
+        if search:
+            order = order[np.isin(order, self.search(search))]
+        total = len(order)
+        start = (max(page, 1) - 1) * page_size
+        shown = self.students.iloc[order[start:start + page_size]]
+        if shown.empty:
+            return pd.DataFrame(columns=PIVOT_INDEX + list(self.companies)), total
+
+        rows = np.sort(np.concatenate([self.positions[usn] for usn in shown["usn"].unique()]))
+        return page_pivot(self.df.take(rows), self.companies, shown["usn"]), total
+
+    def page_count(self, total, page_size):
+        return max(1, -(-total // page_size))
+
+def page_pivot(rows, companies, usns):
+    # Keep the requested sort order rather than the pivot's index order
+    pivot = pivot_records(rows, companies)
+    rank = {usn: i for i, usn in enumerate(usns.astype(object))}
+    order = np.argsort(pivot["usn"].astype(object).map(rank).to_numpy(), kind="stable")
+    return pivot.iloc[order].reset_index(drop=True)
+
+
+# --- Paginated records in SQL ---
+# Same pages as RecordsView for SQL mode, without pulling the filtered join:
+# the students of a page come from a LIMIT/OFFSET query and only their rows
+# are read and pivoted.
+class SqlRecordsView:
+    page_count = RecordsView.page_count
+
+    def __init__(self, batch_filter="All", dept_filter="All", company_filter="All"):
+        self.filters = (batch_filter, dept_filter, company_filter)
+        self._companies = None
+        self._counts = {}
+
+    def __sizeof__(self):
+        return sys.getsizeof(self.companies)
+
+    def read(self, build, *args, **kwargs):
+        with connection() as conn:
+            query = qb.PlacementQuery(*self.filters, placeholder=qb.placeholder_for(conn))
+            return qb.read_query(conn, getattr(query, build)(*args, **kwargs))
+
+    @property
+    def companies(self):
+        if self._companies is None:
+            self._companies = self.read("record_companies")["company"].tolist()
+        return self._companies
+
+    def count(self, search=""):
+        if search not in self._counts:
+            self._counts[search] = int(self.read("record_count", search)["total"].iloc[0])
+        return self._counts[search]
+
+    @timed(name="records.SqlRecordsView.page")
+    def page(self, page=1, page_size=PAGE_SIZES[0], sort_by="usn", ascending=True, search=""):
+        total = self.count(search)
+        start = (max(page, 1) - 1) * page_size
+        shown = self.read("record_students", sort_by, ascending, search, limit=page_size, offset=start)
+        if shown.empty:
+            return pd.DataFrame(columns=PIVOT_INDEX + list(self.companies)), total
+        rows = self.read("records", shown["usn"].tolist())
+        rows["Placement_status"] = qb.status_categorical(rows["status"])
+        return page_pivot(rows, self.companies, shown["usn"]), total
+
+def records_view(batch_filter="All", dept_filter="All", company_filter="All"):
+    # SQL mode; backends without SQL read the filtered rows instead
+    if not current_backend().supports_sql:
+        return RecordsView(qb.fetch_records(batch_filter, dept_filter, company_filter))
+    return SqlRecordsView(batch_filter, dept_filter, company_filter)
@@ -0,0 +1,142 @@
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import analyzer
+import backends
+import visualization as vz
+
+AXES = ["dept", "batch", "company"]
+IMAGE_FORMATS = ["html", "png", "svg", "pdf"]
+# Optional dependency: Plotly exports static images (every format but html)
+# through kaleido, which is not installed with the dashboard.
+IMAGE_EXPORT_PACKAGE = "kaleido"
+
+def missing_export_package(fmt):
+    if fmt == "html" or importlib.util.find_spec(IMAGE_EXPORT_PACKAGE) is not None:
+        return None
+    return IMAGE_EXPORT_PACKAGE
+
+def slug(value):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(value)).strip("_") or "_"
+
+def axis_values(df, axis, wanted=None):
+    values = sorted(df[axis].dropna().unique())
+    if wanted:
+        wanted = {str(w) for w in wanted}
+        values = [v for v in values if str(v) in wanted]
+    return values
+
+# Every (dept, batch, company) to report on: "All" plus each value along the
+# axes in `by`, "All" only along the others.
+def report_variants(df, by=("dept", "batch"), choices=None):
+    choices = choices or {}
+    axes = [["All"] + axis_values(df, axis, choices.get(axis)) if axis in by else ["All"] for axis in AXES]
+    return list(itertools.product(*axes))
+
+def variant_dir(out_dir, variant):
+    return os.path.join(out_dir, *(f"{axis}={slug(value)}" for axis, value in zip(AXES, variant)))
+
+
+# --- Worker ---
+# Each pool process gets the loaded frame once (inherited on fork, pickled
+# once per process otherwise, or mapped from the same file when it came
+# from an Arrow snapshot) and builds its own filter index from it.
+_frame = None
+_index = None
+
+def init_worker(frame):
+    global _frame, _index
+    _frame = backends.unshared(frame)
+    _index = analyzer.FilterIndex(_frame)
+
+def write_tables(aggs, path):
+    stats, total = aggs["overall"]
+    stats_all, stats_p, dominant_bin = aggs["cgpa"]
+    tables = {
+        "overall": stats, "top_recruiters": aggs["top_recruiters"], "batch": aggs["batch"],
+        "dept": aggs["dept"], "salary": aggs["salary"], "conversion": aggs["conversion"],
+        "cgpa_all": stats_all, "cgpa_placed": stats_p,
+    }
+    for name, table in tables.items():
+        table.to_csv(os.path.join(path, f"{name}.csv"), index=False)
+    summary = {**aggs["kpis"], "students_with_status": total, "dominant_cgpa_bin": dominant_bin}
+    with open(os.path.join(path, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+
+def write_charts(figures, path, fmt):
+    for name, fig in figures.items():
+        target = os.path.join(path, f"{name}.{fmt}")
+        if fmt == "html":
+            fig.write_html(target, include_plotlyjs="cdn")
+        else:
+            fig.write_image(target)
+
+def render_variant(variant, out_dir, fmt="html"):
+    dept, batch, company = variant
+    start = time.perf_counter()
+    df = analyzer.apply_filters(_frame, batch, dept, company, index=_index)
+    row = {"dept": dept, "batch": batch, "company": company, "rows": len(df), "path": None}
+    if not df.empty:
+        aggs = vz.compute_aggregates(df)
+        path = variant_dir(out_dir, variant)
+        os.makedirs(path, exist_ok=True)
+        write_tables(aggs, path)
+        write_charts(vz.build_figures(aggs), path, fmt)
+        row.update(aggs["kpis"], path=os.path.relpath(path, out_dir))
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+# --- Batch run ---
+def generate_reports(df, out_dir, variants, fmt="html", workers=None):
+    os.makedirs(out_dir, exist_ok=True)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(backends.shareable(df),)) as pool:
+        futures = [pool.submit(render_variant, variant, out_dir, fmt) for variant in variants]
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            print(f"[{done}/{len(futures)}] {row['dept']} / {row['batch']} / {row['company']}: "
+                  f"{row['rows']} rows, {row['seconds']:.2f}s")
+    index = pd.DataFrame(rows).sort_values(["dept", "batch", "company"], key=lambda c: c.astype(str))
+    index.to_csv(os.path.join(out_dir, "index.csv"), index=False)
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render placement reports for every dept x batch x company")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--by", nargs="+", choices=AXES, default=["dept", "batch"],
+                        help="axes to split reports on; the others are reported as 'All'")
+    parser.add_argument("--depts", nargs="+", help="only these departments")
+    parser.add_argument("--batches", nargs="+", help="only these batches")
+    parser.add_argument("--companies", nargs="+", help="only these companies")
+    parser.add_argument("--format", choices=IMAGE_FORMATS, default="html",
+                        help=f"chart format; all but html need the optional {IMAGE_EXPORT_PACKAGE} package")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--backend", help="mysql, sqlite:<file>, parquet:<directory> or arrow:<directory> (default: PLACEMENT_BACKEND)")
+    args = parser.parse_args(argv)
+    # Checked here rather than failing in every worker after the data load
+    missing = missing_export_package(args.format)
+    if missing:
+        parser.error(f"--format {args.format} needs the optional {missing} package "
+                     f"(pip install {missing}); --format html works without it")
+
+    if args.backend:
+        backends.configure_backend(args.backend)
+    combined_df = analyzer.load_all_data(use_cache=False)[4]
+
+    choices = {"dept": args.depts, "batch": args.batches, "company": args.companies}
+    variants = report_variants(combined_df, args.by, choices)
+    print(f"{len(variants)} report variants from {len(combined_df)} rows")
+    index = generate_reports(combined_df, args.out, variants, args.format, args.workers)
+    print(f"wrote {index['path'].notna().sum()} reports to {args.out}")
+
+if __name__ == "__main__":
+    main()
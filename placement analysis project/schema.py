@@ -0,0 +1,334 @@
+import argparse
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+import analyzer
+import backends
+import incremental
+import query_builder as qb
+from dbconfig import connection
+from profiling import unwrap
+
+TABLE_ORDER = ["student", "company", "performance", "hiring"]   # referenced tables first
+SLOW_QUERY_SECONDS = 1.0      # --run: slower statements are reported
+PLAN_ROWS_WARNING = 1_000_000  # MySQL: estimated rows examined per statement
+
+# --- Tables ---
+# Keys match incremental.PRIMARY_KEYS. The tables the join looks rows up in
+# are stored in primary key order (InnoDB clustered index, SQLite WITHOUT
+# ROWID), so the performance -> hiring -> company lookups read one key
+# range each and need no separate index. student stays a rowid table on
+# SQLite: it drives the join, and SQLite would otherwise scan it through a
+# secondary index with a key lookup per row. updated_at is the incremental
+# refresh watermark; SQLite has no ON UPDATE, a trigger sets it instead.
+TABLE_DDL = {
+    "student": """
+        CREATE TABLE IF NOT EXISTS student (
+            usn {key} NOT NULL,
+            name {text},
+            dept {key},
+            batch {int},
+            cgpa {real},
+            updated_at {updated_at},
+            PRIMARY KEY (usn)
+        ){engine}""",
+    "company": """
+        CREATE TABLE IF NOT EXISTS company (
+            cid {int} NOT NULL,
+            company {text},
+            updated_at {updated_at},
+            PRIMARY KEY (cid)
+        ){engine}{clustered}""",
+    "performance": """
+        CREATE TABLE IF NOT EXISTS performance (
+            usn {key} NOT NULL,
+            cid {int} NOT NULL,
+            status {int},
+            updated_at {updated_at},
+            PRIMARY KEY (usn, cid),
+            FOREIGN KEY (usn) REFERENCES student (usn) ON DELETE CASCADE,
+            FOREIGN KEY (cid) REFERENCES company (cid) ON DELETE CASCADE
+        ){engine}{clustered}""",
+    "hiring": """
+        CREATE TABLE IF NOT EXISTS hiring (
+            cid {int} NOT NULL,
+            ctc {real},
+            updated_at {updated_at},
+            PRIMARY KEY (cid),
+            FOREIGN KEY (cid) REFERENCES company (cid) ON DELETE CASCADE
+        ){engine}{clustered}""",
+}
+
+DIALECTS = {
+    "mysql": {
+        "key": "VARCHAR(20)", "text": "VARCHAR(100)", "int": "INT", "real": "FLOAT",
+        "updated_at": "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP",
+        "engine": " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4", "clustered": "",
+    },
+    "sqlite": {
+        "key": "TEXT", "text": "TEXT", "int": "INTEGER", "real": "REAL",
+        "updated_at": "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+        "engine": "", "clustered": " WITHOUT ROWID",
+    },
+}
+
+SQLITE_TOUCH_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS {table}_touch AFTER UPDATE ON {table}
+    FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+    BEGIN
+        UPDATE {table} SET updated_at = CURRENT_TIMESTAMP WHERE {match};
+    END"""
+
+# --- Indexes ---
+# name -> (table, columns, what it serves). Each one covers its queries:
+# trailing columns are the ones they read, so no row lookups are needed.
+INDEXES = {
+    "idx_student_batch_dept": ("student", ["batch", "dept", "usn"],
+                               "batch filter, Last 3 Years subquery, batch options and group-by"),
+    "idx_student_dept_batch": ("student", ["dept", "batch", "usn"],
+                               "dept filter, dept options and group-by"),
+    "idx_company_name": ("company", ["company", "cid"],
+                         "company filter, options and group-by; starts the join from company"),
+    "idx_performance_cid": ("performance", ["cid", "status", "usn"],
+                            "company filter (company -> performance) and status filters"),
+    "idx_student_updated": ("student", ["updated_at"], "incremental refresh watermark"),
+    "idx_company_updated": ("company", ["updated_at"], "incremental refresh watermark"),
+    "idx_performance_updated": ("performance", ["updated_at"], "incremental refresh watermark"),
+    "idx_hiring_updated": ("hiring", ["updated_at"], "incremental refresh watermark"),
+}
+
+def dialect_for(conn):
+    return "sqlite" if isinstance(unwrap(conn), sqlite3.Connection) else "mysql"
+
+def execute(conn, statements):
+    cursor = conn.cursor()
+    for sql in statements:
+        cursor.execute(sql)
+    cursor.close()
+    conn.commit()
+
+def table_columns(conn, table):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+    columns = [d[0] for d in cursor.description]
+    cursor.close()
+    return columns
+
+def existing_indexes(conn):
+    cursor = conn.cursor()
+    if dialect_for(conn) == "sqlite":
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    else:
+        cursor.execute("SELECT DISTINCT index_name FROM information_schema.statistics WHERE table_schema = DATABASE()")
+    names = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return names
+
+def missing_indexes(conn):
+    # Recommended indexes not yet created (on tables that have the columns)
+    existing = existing_indexes(conn)
+    columns = {table: set(table_columns(conn, table)) for table in TABLE_ORDER}
+    return {name: spec for name, spec in INDEXES.items()
+            if name not in existing and set(spec[1]) <= columns[spec[0]]}
+
+def ensure_indexes(conn):
+    missing = missing_indexes(conn)
+    execute(conn, [f"CREATE INDEX {name} ON {table} ({', '.join(cols)})"
+                   for name, (table, cols, _) in missing.items()])
+    return list(missing)
+
+def create_schema(conn):
+    # Creates whatever is missing; existing tables are left as they are
+    dialect = dialect_for(conn)
+    statements = [TABLE_DDL[table].format(**DIALECTS[dialect]) for table in TABLE_ORDER]
+    if dialect == "sqlite":
+        statements += [SQLITE_TOUCH_TRIGGER.format(
+            table=table, match=" AND ".join(f"{key} = NEW.{key}" for key in incremental.PRIMARY_KEYS[table]))
+            for table in TABLE_ORDER]
+    execute(conn, statements)
+    return ensure_indexes(conn)
+
+
+# --- Query plans ---
+# Every statement the dashboard, incremental refresh and the change probe
+# send, with parameters taken from the data, keyed by a readable name.
+PUSHDOWN_QUERIES = [
+    ("kpis", ()), ("status_counts", ()), ("group_totals", ("batch",)), ("group_totals", ("dept",)),
+    ("group_status_counts", ("batch",)), ("group_status_counts", ("dept",)), ("company_hires", ()),
+    ("ctc_stats", ()), ("conversion", ()), ("cgpa_bins", (False,)), ("cgpa_bins", (True,)), ("records", ()),
+]
+
+def first_value(conn, sql):
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+def sample_filters(conn):
+    dept = first_value(conn, "SELECT MIN(dept) FROM student")
+    batch = first_value(conn, "SELECT MAX(batch) FROM student")
+    company = first_value(conn, "SELECT MIN(company) FROM company")
+    return {
+        "all": ("All", "All", "All"),
+        "last3": ("Last 3 Years", "All", "All"),
+        "batch": (batch, "All", "All"),
+        "dept": ("All", dept, "All"),
+        "company": ("All", "All", company),
+        "batch+dept+company": (batch, dept, company),
+    }
+
+def analyzer_queries(conn):
+    ph = qb.placeholder_for(conn)
+    queries = {}
+    for profile, tables in analyzer.TABLE_QUERIES.items():
+        for table, sql in tables.items():
+            queries[f"load.{profile}.{table}"] = (sql, [])
+    queries["load.combined"] = (analyzer.COMBINED_QUERY, [])
+    for table, sql in analyzer.probe_queries(conn).items():
+        queries[f"probe.{table}"] = (sql, [])
+    for column, sql in qb.FILTER_OPTION_QUERIES.items():
+        queries[f"options.{column}"] = (sql, [])
+
+    for label, filters in sample_filters(conn).items():
+        query = qb.PlacementQuery(*filters, placeholder=ph)
+        for method, args in PUSHDOWN_QUERIES:
+            name = f"{method}({', '.join(map(str, args))})" if args else method
+            queries[f"sql.{name}[{label}]"] = getattr(query, method)(*args)
+
+    for table in TABLE_ORDER:
+        columns = table_columns(conn, table)
+        column = incremental.WATERMARK_COLUMN
+        if column in columns:
+            mark = incremental.to_python(first_value(conn, f"SELECT MAX({column}) FROM {table}"))
+            queries[f"refresh.delta.{table}"] = (
+                incremental.DELTA_QUERY.format(columns=", ".join(incremental.PRIMARY_KEYS[table] + [column]),
+                                               table=table, column=column, op=">", ph=ph), [mark])
+        queries[f"refresh.count.{table}"] = (f"SELECT COUNT(*) FROM {table}", [])
+        keys = ", ".join(incremental.PRIMARY_KEYS[table])
+        queries[f"refresh.keys.{table}"] = (incremental.KEYS_QUERY.format(keys=keys, table=table), [])
+    usns = [first_value(conn, "SELECT MIN(usn) FROM student"), first_value(conn, "SELECT MAX(usn) FROM student")]
+    queries["refresh.students"] = (f"{incremental.STUDENTS_QUERY} WHERE s.usn IN ({ph}, {ph})", usns)
+    return queries
+
+def plan_rows(conn, sql, params):
+    cursor = conn.cursor()
+    cursor.execute(("EXPLAIN QUERY PLAN " if dialect_for(conn) == "sqlite" else "EXPLAIN ") + sql, params)
+    columns = [d[0] for d in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+def sqlite_findings(plan):
+    # SCAN = reads a whole table (or whole index: "USING ... INDEX", with a
+    # row lookup per entry unless COVERING); the first loop of each
+    # (sub)query drives it, later ones run per outer row. An automatic
+    # index is one SQLite builds on every run for lack of ours.
+    findings, driving = [], set()
+    for row in plan:
+        detail = row["detail"]
+        words = detail.split()
+        if words[0] in ("SCAN", "SEARCH"):
+            inner = row["parent"] in driving
+            driving.add(row["parent"])
+            if words[0] == "SCAN" and "USING" not in words and "CONSTANT" not in words:
+                findings.append(("warning" if inner else "info", words[1], "full scan", detail))
+            elif words[0] == "SCAN" and "COVERING" not in words:
+                findings.append(("warning", words[1], "full scan with row lookups", detail))
+            elif words[0] == "SCAN":
+                findings.append(("warning" if inner else "info", words[1], "full index scan", detail))
+            if "AUTOMATIC" in words:
+                findings.append(("warning", words[1], "no index for join", detail))
+        elif "TEMP B-TREE" in detail:
+            findings.append(("info", "", "sort in temp b-tree", detail))
+    return findings
+
+def mysql_findings(plan):
+    findings, driving, estimate = [], set(), 1
+    for row in plan:
+        table, access, extra = row.get("table") or "", row.get("type"), row.get("Extra") or ""
+        inner = row.get("id") in driving
+        driving.add(row.get("id"))
+        estimate *= max(int(row.get("rows") or 1), 1)
+        detail = f"type={access} key={row.get('key')} rows={row.get('rows')} {extra}".strip()
+        if access == "ALL":
+            findings.append(("warning" if inner else "info", table, "full scan", detail))
+        elif access == "index":
+            findings.append(("warning" if inner else "info", table, "full index scan", detail))
+        if "join buffer" in extra:
+            findings.append(("warning", table, "no index for join", detail))
+        if "temporary" in extra or "filesort" in extra:
+            findings.append(("info", table, "temporary table / filesort", detail))
+    if estimate > PLAN_ROWS_WARNING:
+        findings.append(("warning", "", "slow plan", f"~{estimate:,} row combinations examined"))
+    return findings
+
+def run_seconds(conn, sql, params):
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    cursor.fetchall()
+    seconds = time.perf_counter() - start
+    cursor.close()
+    return seconds
+
+def check_plans(conn, run=False, slow_seconds=SLOW_QUERY_SECONDS):
+    # One row per finding: severity "warning" (an index would help) or "info"
+    # (expected for what the statement reads, e.g. scanning a whole table
+    # for a full load)
+    plan_findings = sqlite_findings if dialect_for(conn) == "sqlite" else mysql_findings
+    findings = []
+    for name, (sql, params) in analyzer_queries(conn).items():
+        for severity, table, issue, detail in plan_findings(plan_rows(conn, sql, params)):
+            findings.append({"query": name, "severity": severity, "table": table, "issue": issue, "detail": detail})
+        if run:
+            seconds = run_seconds(conn, sql, params)
+            if seconds > slow_seconds:
+                findings.append({"query": name, "severity": "warning", "table": "", "issue": "slow query",
+                                 "detail": f"{seconds:.2f}s (threshold {slow_seconds}s)"})
+    return pd.DataFrame(findings, columns=["query", "severity", "table", "issue", "detail"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create the placement_db schema and check the analyzer's query plans")
+    parser.add_argument("command", choices=["create", "indexes", "explain"],
+                        help="create: tables, keys and indexes; indexes: list (or --apply) missing indexes; "
+                             "explain: report full scans and slow plans")
+    parser.add_argument("--backend", help="mysql or sqlite:<file> (default: PLACEMENT_BACKEND)")
+    parser.add_argument("--apply", action="store_true", help="indexes: create the missing ones")
+    parser.add_argument("--run", action="store_true", help="explain: also run each query and time it")
+    parser.add_argument("--slow", type=float, default=SLOW_QUERY_SECONDS, help="explain --run: threshold in seconds")
+    parser.add_argument("--all", action="store_true", help="explain: include info findings, not only warnings")
+    args = parser.parse_args(argv)
+
+    backend = backends.configure_backend(args.backend) if args.backend else backends.current_backend()
+    if not backend.supports_sql:
+        parser.error(f"{backend.name} is not a SQL backend")
+
+    with connection() as conn:
+        if args.command == "create":
+            created = create_schema(conn)
+            print(f"schema ready on {backend.name}; created indexes: {', '.join(created) or 'none'}")
+        elif args.command == "indexes":
+            missing = missing_indexes(conn)
+            for name, (table, cols, reason) in missing.items():
+                print(f"{name} ON {table} ({', '.join(cols)})  -- {reason}")
+            if args.apply and missing:
+                ensure_indexes(conn)
+                print(f"created {len(missing)} indexes")
+            elif not missing:
+                print("all recommended indexes exist")
+        else:
+            findings = check_plans(conn, run=args.run, slow_seconds=args.slow)
+            warnings = findings[findings["severity"] == "warning"]
+            shown = findings if args.all else warnings
+            if not shown.empty:
+                print(shown.to_string(index=False))
+            print(f"{len(warnings)} warnings, {len(findings) - len(warnings)} info findings")
+            return 1 if len(warnings) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
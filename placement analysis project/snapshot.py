@@ -0,0 +1,43 @@
+import argparse
+import time
+
+import backends
+
+FORMATS = ["parquet", "arrow"]
+
+# Copy of placement_db into local files. Point the dashboard (and report.py,
+# worker.py, notebooks) at it with PLACEMENT_BACKEND=<format>:<directory>.
+# With --every it keeps running as the one loader process: it re-reads the
+# source only when its signature changed, and with --format arrow each new
+# snapshot is a new version that readers swap to on their next probe.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot the placement database into Parquet or Arrow files")
+    parser.add_argument("--source", default="mysql", help="mysql or sqlite:<file>")
+    parser.add_argument("--out", default="placement_snapshot", help="directory to (re)create")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--row-group-size", type=int, default=backends.ROW_GROUP_SIZE, help="parquet only")
+    parser.add_argument("--every", type=float, help="keep running, checking the source every N seconds")
+    args = parser.parse_args(argv)
+
+    source = backends.configure_backend(args.source)
+    written = None
+    while True:
+        signature = source.signature()
+        if signature != written:
+            start = time.perf_counter()
+            frames = source.fetch_all_data()
+            if args.format == "parquet":
+                backends.write_snapshot(frames, args.out, row_group_size=args.row_group_size)
+                target = args.out
+            else:
+                target = f"{args.out} ({backends.write_arrow_snapshot(frames, args.out)})"
+            written = signature
+            print(f"wrote {len(frames[4])} joined rows from {source.name} to {target} "
+                  f"in {time.perf_counter() - start:.1f}s")
+            print(f"use it with PLACEMENT_BACKEND={args.format}:{args.out}")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+import analyzer
+
+# Readers never mutate the shared frames in place, and with copy-on-write any
+# derived frame that is modified gets its own copy instead of writing through
+# to the shared one (the default from pandas 3 onwards).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+# --- Snapshot ---
+# One immutable, versioned view of the loaded data plus anything derived from
+# it (sidebar options, cube, indexes). Sessions keep the snapshot they started
+# a run with; a refresh swaps in a new snapshot instead of editing this one.
+class DataSnapshot:
+    def __init__(self, version, frames):
+        self.version = version
+        self.frames = frames
+        self.student_df, self.company_df, self.performance_df, self.hiring_df, self.combined_df = frames
+        self._derived = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def derived(self, name, build):
+        # Built once, outside the lock: a slow build (cube, index) holds up
+        # only the readers waiting on the same name
+        with self._lock:
+            if name in self._derived:
+                return self._derived[name]
+            waiting = self._pending.get(name)
+            if waiting is None:
+                pending = self._pending[name] = Future()
+        if waiting is not None:
+            return waiting.result()
+        try:
+            value = build(self)
+        except BaseException as exc:
+            self._finish(name)
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            self._derived[name] = value
+            self._pending.pop(name, None)
+        pending.set_result(value)
+        return value
+
+    def _finish(self, name):
+        with self._lock:
+            self._pending.pop(name, None)
+
+    @property
+    def options(self):
+        return self.derived("options", build_options)
+
+    @property
+    def filter_index(self):
+        return self.derived("filter_index", lambda s: analyzer.FilterIndex(s.combined_df))
+
+
+def build_options(snapshot):
+    return (
+        sorted(snapshot.student_df["dept"].dropna().unique().tolist()),
+        sorted(snapshot.student_df["batch"].dropna().unique().tolist()),
+        sorted(snapshot.company_df["company"].dropna().unique().tolist()),
+    )
+
+
+# --- Process-wide store ---
+class DataStore:
+    def __init__(self, loader=analyzer.load_all_data):
+        self.loader = loader
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._loads = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-load")
+        self._loading = None
+
+    def current(self):
+        frames = self.loader()
+        with self._lock:
+            snapshot = self._snapshot
+            # The loader returns the same objects until the data changes
+            if snapshot is None or any(a is not b for a, b in zip(frames, snapshot.frames)):
+                version = 1 if snapshot is None else snapshot.version + 1
+                snapshot = DataSnapshot(version, frames)
+                self._snapshot = snapshot
+            return snapshot
+
+    def load_in_background(self):
+        # current() on a loader thread, shared by every session waiting on
+        # it, so pages can draw their shell and a progress bar meanwhile.
+        # It runs outside any session's context: the load is nobody's
+        # render, so its stages must not land in the starter's profile.
+        with self._lock:
+            if self._loading is None or self._loading.done():
+                self._loading = self._loads.submit(contextvars.Context().run, self.current)
+            return self._loading
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return 0 if snapshot is None else snapshot.version
+
+
+shared_store = DataStore()
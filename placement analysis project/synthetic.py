@@ -0,0 +1,80 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from analyzer import compact_frame
+from schema import TABLE_ORDER, create_schema
+
+DEFAULT_DEPTS = ["CSE", "ISE", "ECE", "EEE", "MECH", "CIVIL", "AIML", "CSD"]
+
+# Share of interviews ending in each status code
+DEFAULT_STATUS_WEIGHTS = {0: 0.10, 1: 0.30, 2: 0.15, 3: 0.15, 4: 0.08, 9: 0.07, 10: 0.15}
+
+def parse_status_weights(text):
+    weights = {}
+    for part in text.split(","):
+        code, weight = part.split(":")
+        weights[int(code)] = float(weight)
+    return weights
+
+
+# --- Generator ---
+# Builds the four placement_db tables with the same columns the analyzer
+# reads. Rows in the joined frame ~= students * interviews_per_student.
+def generate(students=1000, batches=5, depts=8, companies=50, interviews_per_student=4,
+             status_weights=None, first_batch=2020, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = status_weights or DEFAULT_STATUS_WEIGHTS
+    dept_names = (DEFAULT_DEPTS + [f"DEPT{i}" for i in range(len(DEFAULT_DEPTS), depts)])[:depts]
+
+    usns = np.array([f"4GS{i:08d}" for i in range(students)], dtype=object)
+    student_df = pd.DataFrame({
+        "usn": usns,
+        "name": np.char.add("Student ", np.arange(students).astype(str)).astype(object),
+        "dept": np.array(dept_names, dtype=object)[rng.integers(0, depts, students)],
+        "batch": first_batch + rng.integers(0, batches, students),
+        "cgpa": np.round(np.clip(rng.normal(7.4, 1.1, students), 4.0, 10.0), 2),
+    })
+
+    cids = np.arange(1, companies + 1)
+    company_df = pd.DataFrame({"cid": cids, "company": [f"Company {c:04d}" for c in cids]})
+    hiring_df = pd.DataFrame({"cid": cids, "ctc": np.round(rng.lognormal(2.0, 0.5, companies), 2)})
+
+    # Each student interviews with a Poisson number of distinct-ish companies
+    counts = rng.poisson(interviews_per_student, students)
+    perf_usn = np.repeat(usns, counts)
+    codes = np.array(list(weights), dtype=np.int64)
+    probs = np.array(list(weights.values()), dtype=float)
+    performance_df = pd.DataFrame({
+        "usn": perf_usn,
+        "cid": rng.integers(1, companies + 1, len(perf_usn)),
+        "status": rng.choice(codes, len(perf_usn), p=probs / probs.sum()),
+    }).drop_duplicates(["usn", "cid"], ignore_index=True)
+
+    return student_df, company_df, performance_df, hiring_df
+
+def combine(student_df, company_df, performance_df, hiring_df):
+    # In-memory equivalent of the analyzer's LEFT JOIN
+    combined = (student_df.merge(performance_df, on="usn", how="left")
+                          .merge(hiring_df, on="cid", how="left")
+                          .merge(company_df, on="cid", how="left"))
+    combined = combined[["usn", "name", "dept", "batch", "cgpa", "status", "company", "ctc"]]
+    return compact_frame(combined)
+
+def load_frames(frames):
+    # Same 5-tuple as analyzer.load_all_data, without a database
+    return (*frames, combine(*frames))
+
+
+# --- SQLite ---
+def write_sqlite(frames, path, chunksize=100_000):
+    # Keys, foreign keys and indexes from schema.py; rows are appended into them
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript("".join(f"DROP TABLE IF EXISTS {name};" for name in reversed(TABLE_ORDER)))
+        create_schema(conn)
+        for name, frame in zip(TABLE_ORDER, frames):
+            frame.to_sql(name, conn, if_exists="append", index=False, chunksize=chunksize)
+        conn.commit()
+    finally:
+        conn.close()
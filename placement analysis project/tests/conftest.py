@@ -0,0 +1,67 @@
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# The project is a flat set of modules run from its own directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+import worker  # noqa: E402
+from store import DataStore  # noqa: E402
+
+# Bin edges, both sides of them, and missing values
+EDGE_CGPAS = [4.0, 5.99, 6.0, 6.5, 7.0, 7.99, 8.0, 9.0, 9.99, 10.0, np.nan, np.nan]
+
+@pytest.fixture(scope="session")
+def frames():
+    student_df, company_df, performance_df, hiring_df = synthetic.generate(students=600, companies=15, seed=7)
+    student_df.loc[:len(EDGE_CGPAS) - 1, "cgpa"] = EDGE_CGPAS
+    return synthetic.load_frames((student_df, company_df, performance_df, hiring_df))
+
+@pytest.fixture(scope="session")
+def combined(frames):
+    return frames[4]
+
+@pytest.fixture(scope="session")
+def filter_sets(combined):
+    batches = sorted(combined["batch"].dropna().unique())
+    depts = sorted(combined["dept"].dropna().unique())
+    companies = sorted(combined["company"].dropna().unique())
+    return [
+        ("All", "All", "All"),
+        ("Last 3 Years", "All", "All"),
+        (batches[0], "All", "All"),
+        ("All", depts[1], "All"),
+        ("All", "All", companies[2]),
+        (batches[1], depts[0], companies[0]),
+        ("All", "All", "No such company"),
+    ]
+
+@pytest.fixture(scope="session")
+def worker_client(frames):
+    # A real aggregation worker on a free loopback port, serving `frames`
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        address = f"127.0.0.1:{s.getsockname()[1]}"
+    authkey = secrets.token_hex(16).encode()
+    shared_store, worker.shared_store = worker.shared_store, DataStore(loader=lambda: frames)
+    server = worker.AggregationServer(address, authkey=authkey, processes=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = worker.AggregationClient(address, authkey)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            client.info()
+            break
+        except worker.WorkerError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+    yield client
+    worker.shared_store = shared_store
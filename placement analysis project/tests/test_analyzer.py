@@ -0,0 +1,53 @@
+import itertools
+
+import pandas as pd
+import pytest
+from analyzer import FilterIndex, apply_filters
+
+
+def assert_index_matches_mask(df, filters, index=None):
+    expected = apply_filters(df, *filters)
+    actual = apply_filters(df, *filters, index=index or FilterIndex(df))
+    pd.testing.assert_frame_equal(actual, expected)
+    return actual
+
+
+@pytest.mark.parametrize("which", range(7))
+def test_index_matches_mask(combined, filter_sets, which):
+    assert_index_matches_mask(combined, filter_sets[which])
+
+def test_index_matches_mask_for_every_combination(combined):
+    index = FilterIndex(combined)
+    batches = ["All", "Last 3 Years"] + sorted(combined["batch"].dropna().unique())
+    depts = ["All"] + sorted(combined["dept"].dropna().unique())
+    companies = ["All"] + sorted(combined["company"].dropna().unique())
+    empty = 0
+    for filters in itertools.product(batches, depts, companies):
+        empty += assert_index_matches_mask(combined, filters, index).empty
+    assert empty   # some intersections have no rows
+
+@pytest.mark.parametrize("filters", [
+    ("All", "All", "No such company"),
+    ("All", "No such dept", "All"),
+    (1900, "All", "All"),
+    ("1900", "All", "All"),
+])
+def test_unknown_values_match_nothing(combined, filters):
+    assert assert_index_matches_mask(combined, filters).empty
+
+def test_last_three_years_with_fewer_batches(combined):
+    batches = sorted(combined["batch"].dropna().unique())
+    df = combined[combined["batch"].isin(batches[:2]) | combined["batch"].isna()]
+    index = FilterIndex(df)
+    assert index.recent is None
+    assert index.lookup("Last 3 Years") is None
+    # No batch filter at all: rows without a batch stay
+    assert len(assert_index_matches_mask(df, ("Last 3 Years", "All", "All"), index)) == len(df)
+    dept = df["dept"].dropna().iloc[0]
+    assert_index_matches_mask(df, ("Last 3 Years", dept, "All"), index)
+
+def test_last_three_years_drops_rows_without_a_batch(combined):
+    df = combined.copy()
+    df.loc[df.index[:10], "batch"] = None
+    result = assert_index_matches_mask(df, ("Last 3 Years", "All", "All"))
+    assert result["batch"].notna().all()
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from cache import DataCache, FrameRegistry
+from figure_cache import cached_result, figure_cache
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def join_all(threads):
+    for thread in threads:
+        thread.join(5)
+
+
+def test_hit_does_not_wait_for_other_compute():
+    figure_cache.invalidate()
+    cached_result("test", ("hit",), lambda: "cached")
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    threads = run_threads([lambda: cached_result("test", ("slow",), slow)])
+    assert started.wait(5)
+    begin = time.monotonic()
+    assert cached_result("test", ("hit",), lambda: "recomputed") == "cached"
+    assert time.monotonic() - begin < 0.5
+    release.set()
+    join_all(threads)
+
+
+def test_concurrent_misses_share_one_compute():
+    figure_cache.invalidate()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    join_all(run_threads([lambda: results.append(cached_result("test", ("shared",), compute))] * 6))
+    assert calls == [1]
+    assert results == ["value"] * 6
+
+
+def test_failed_load_propagates_and_is_not_cached():
+    cache = DataCache(ttl=None)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get("key", fail)
+    assert "key" not in cache
+    assert cache.get("key", lambda: 1) == 1
+
+
+def test_load_invalidated_midway_is_not_cached():
+    cache = DataCache(ttl=None)
+
+    def load():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get("key", load) == "stale"
+    assert "key" not in cache
+
+
+def test_registry_builds_once_per_frame():
+    calls = []
+
+    def build(df):
+        calls.append(1)
+        time.sleep(0.2)
+        return len(df)
+
+    registry = FrameRegistry(build)
+    df, results = pd.DataFrame({"a": [1, 2, 3]}), []
+    join_all(run_threads([lambda: results.append(registry.get(df))] * 4))
+    assert calls == [1]
+    assert results == [3] * 4
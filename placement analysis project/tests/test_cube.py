@@ -0,0 +1,91 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import visualization as vz
+from analyzer import apply_filters, compact_frame, STATUS_CODES
+from cube import AGGREGATE_NAMES, AggregateCube
+
+
+def filter_combinations(df):
+    batches = ["All", "Last 3 Years"] + sorted(df["batch"].dropna().unique())
+    depts = ["All"] + sorted(df["dept"].dropna().unique())
+    companies = ["All"] + sorted(df["company"].dropna().unique())
+    return itertools.product(batches, depts, companies)
+
+def assert_kpis_match(cube, df):
+    for filters in filter_combinations(df):
+        assert cube.slice(*filters).kpis() == pytest.approx(vz.kpi_summary(apply_filters(df, *filters))), filters
+
+def normalized(table):
+    table = table.copy()
+    for column in table.columns:
+        values = table[column].astype(object)
+        numeric = pd.to_numeric(values, errors="coerce")
+        table[column] = numeric.astype("float64") if numeric.notna().sum() == values.notna().sum() \
+            else values.map(str)
+    return table.sort_values(list(table.columns)).reset_index(drop=True)
+
+def assert_same(actual, expected):
+    if isinstance(expected, tuple):
+        for a, e in zip(actual, expected):
+            assert_same(a, e)
+    elif isinstance(expected, pd.DataFrame):
+        if expected.empty:
+            assert actual.empty
+        else:
+            pd.testing.assert_frame_equal(normalized(actual[expected.columns]), normalized(expected),
+                                          check_dtype=False, rtol=1e-5)
+    elif isinstance(expected, dict):
+        assert actual == pytest.approx(expected)
+    else:
+        assert actual == expected
+
+
+def test_kpis_match_every_filter_combination(combined):
+    assert_kpis_match(AggregateCube(combined), combined)
+
+def test_aggregates_match_pandas(combined, filter_sets):
+    cube = AggregateCube(combined)
+    for filters in filter_sets:
+        df = apply_filters(combined, *filters)
+        if df.empty:
+            continue
+        view = cube.slice(*filters)
+        for name in AGGREGATE_NAMES:
+            assert_same(view.aggregate(name), vz.compute_aggregate(df, name))
+
+
+# --- Incremental refresh ---
+def resync(combined, usns, change):
+    # The frame after re-syncing `usns`: their rows replaced by change(rows)
+    stale = combined["usn"].astype(str).isin(usns)
+    old_rows = combined[stale].astype(object).drop(columns="Placement_status")
+    new_rows = change(old_rows.copy())
+    raw = pd.concat([combined[~stale].astype(object).drop(columns="Placement_status"), new_rows],
+                    ignore_index=True)
+    df = compact_frame(raw)
+    changed = pd.concat([combined[stale].astype(object),
+                         compact_frame(new_rows).astype(object)], ignore_index=True)
+    return df, changed
+
+def edit(rows):
+    rng = np.random.default_rng(1)
+    usns = rows["usn"].unique()
+    rows["status"] = rng.choice(list(STATUS_CODES.values()), len(rows))
+    cgpa = dict(zip(usns, np.round(rng.uniform(5, 10, len(usns)), 2)))
+    rows["cgpa"] = rows["usn"].map(cgpa)                         # moves students across CGPA bins
+    rows.loc[rows["usn"].isin(usns[1::3]), "dept"] = "MOVED"     # and into a new group
+    return rows[rows["usn"] != usns[0]]                          # one student deleted
+
+def test_refreshed_matches_a_rebuild(combined):
+    cube = AggregateCube(combined)
+    usns = combined["usn"].astype(str).drop_duplicates().sample(25, random_state=4).tolist()
+    df, changed = resync(combined, usns, edit)
+    refreshed = cube.refreshed(df, changed)
+    assert_kpis_match(refreshed, df)
+    rebuilt = AggregateCube(df)
+    for name in AGGREGATE_NAMES:
+        assert_same(refreshed.aggregate(name), rebuilt.aggregate(name))
@@ -0,0 +1,65 @@
+import gzip
+
+import pandas as pd
+import pytest
+
+import export
+from export import PIVOT_INDEX, export_file, iter_csv, iter_parquet, iter_pivot_chunks, pivot_records, record_companies
+
+
+def expected_csv(df):
+    return pivot_records(df).to_csv(index=False).encode("utf-8")
+
+def as_text(table):
+    # Categoricals, nullable strings and float widths compared as text
+    table = table.astype(object).where(table.notna(), None)
+    table.columns = [str(c) for c in table.columns]
+    table["cgpa"] = table["cgpa"].map(lambda v: None if v is None else round(float(v), 2))
+    return table.astype(str).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("chunk_students", [7, 64, 10 ** 6])
+def test_usn_chunks_concatenate_to_the_pivot(combined, chunk_students):
+    companies = record_companies(combined)
+    chunks = list(iter_pivot_chunks(combined, companies, chunk_students=chunk_students))
+    assert all(list(chunk.columns) == PIVOT_INDEX + companies for chunk in chunks)
+    assert all(chunk["usn"].nunique() <= chunk_students for chunk in chunks)
+    assert as_text(pd.concat(chunks, ignore_index=True)).equals(as_text(pivot_records(combined, companies)))
+
+@pytest.mark.parametrize("by", ["batch", "dept"])
+def test_group_chunks_hold_one_value_each(combined, by):
+    chunks = list(iter_pivot_chunks(combined, by=by))
+    assert all(chunk[by].nunique() == 1 for chunk in chunks)
+    rows = pd.concat(chunks, ignore_index=True).sort_values("usn", ignore_index=True)
+    assert as_text(rows).equals(as_text(pivot_records(combined, record_companies(combined))))
+
+@pytest.mark.parametrize("chunk_students", [7, 50, 10 ** 6])
+def test_csv_stream_matches_to_csv(combined, chunk_students):
+    assert b"".join(iter_csv(combined, chunk_students=chunk_students)) == expected_csv(combined)
+
+def test_gzip_stream_decompresses_to_the_csv(combined):
+    data = b"".join(iter_csv(combined, compress=True, chunk_students=50))
+    assert data[:2] == b"\x1f\x8b"
+    assert gzip.decompress(data) == expected_csv(combined)
+
+def test_empty_frame_exports_a_header(combined):
+    empty = combined.iloc[:0]
+    assert b"".join(iter_csv(empty)) == ",".join(PIVOT_INDEX).encode("utf-8") + b"\n"
+    assert list(iter_parquet(empty)) == []
+
+def test_parquet_round_trip(combined):
+    pytest.importorskip("pyarrow")
+    with export_file(combined, "parquet", chunk_students=50) as f:
+        table = pd.read_parquet(f)
+    assert list(table.columns) == PIVOT_INDEX + [str(c) for c in record_companies(combined)]
+    assert as_text(table).equals(as_text(pivot_records(combined)))
+
+def test_export_file_spools_to_disk(combined, monkeypatch):
+    monkeypatch.setattr(export, "SPOOL_BYTES", 1024)
+    with export_file(combined, "csv", chunk_students=50) as f:
+        assert f._rolled
+        assert f.read() == expected_csv(combined)
+
+def test_unknown_format(combined):
+    with pytest.raises(ValueError):
+        export_file(combined, "xlsx")
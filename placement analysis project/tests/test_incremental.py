@@ -0,0 +1,160 @@
+import os
+import re
+import sqlite3
+
+import pytest
+
+import analyzer
+import backends
+import incremental
+import synthetic
+from profiling import finish_profile, start_profile
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = tmp_path / "placement.db"
+    synthetic.write_sqlite(synthetic.generate(students=400, companies=12, seed=3), str(path))
+    # Rows written long before the first sync, as in a live database
+    execute(path, *[f"UPDATE {table} SET {incremental.WATERMARK_COLUMN} = '2020-01-01 00:00:00'"
+                    for table in incremental.TABLE_ORDER])
+    backends.configure_backend(f"sqlite:{path}")
+    snapshot = str(tmp_path / ".snapshot" / "placement.pkl")
+    monkeypatch.setattr(incremental, "SNAPSHOT_PATH", snapshot)
+    monkeypatch.setattr(incremental, "_state", None)
+    yield path
+    incremental._state = None
+
+def issued_queries(load):
+    profile = start_profile("test")
+    try:
+        load()
+    finally:
+        finish_profile(profile)
+    return [query["sql"] for query in profile.queries]
+
+def issued(sql, queries):
+    return " ".join(sql.split()) in queries
+
+
+def test_cold_load_reads_only_the_profile(database):
+    queries = issued_queries(lambda: incremental.sync_all_data("test", "options"))
+    profile = analyzer.TABLE_QUERIES["options"]
+    assert set(profile.values()) <= set(queries)
+    # No raw table is read whole: besides the profile and the join, only
+    # key and watermark columns
+    whole = [q for q in queries if re.fullmatch(r"SELECT \* FROM \w+", q)]
+    assert whole == []
+    sync = [q for q in queries if q.startswith("SELECT") and q.endswith(tuple(incremental.TABLE_ORDER))
+            and q not in profile.values()]
+    assert len(sync) == len(incremental.TABLE_ORDER)
+    assert all(incremental.WATERMARK_COLUMN in q for q in sync)
+    assert len(queries) == 1 + 2 * len(incremental.TABLE_ORDER) + len(profile) + 1
+
+def test_cold_load_matches_a_full_load(database):
+    frames = incremental.sync_all_data("test", "options")
+    expected = analyzer.fetch_all_data("options")
+    for actual, wanted in zip(frames[:4], expected[:4]):
+        assert sorted(map(tuple, actual.astype(str).values)) == sorted(map(tuple, wanted.astype(str).values))
+    assert len(frames[4]) == len(expected[4])
+
+
+# --- Refresh against a changing database ---
+def execute(path, *statements):
+    conn = sqlite3.connect(path)
+    try:
+        for sql in statements:
+            conn.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+def rows(frame):
+    frame = frame.drop(columns=[incremental.WATERMARK_COLUMN], errors="ignore")
+    return sorted(map(tuple, frame.astype(str).values))
+
+def assert_matches_a_full_load(frames, profile):
+    expected = analyzer.fetch_all_data(profile)
+    for actual, wanted in zip(frames, expected):
+        assert rows(actual) == rows(wanted)
+
+FIRST_STUDENT = "(SELECT MIN(usn) FROM student)"
+FIRST_COMPANY = "(SELECT MIN(cid) FROM company)"
+
+MUTATIONS = {
+    "update": [f"UPDATE student SET cgpa = 9.99, dept = 'MOVED' WHERE usn = {FIRST_STUDENT}"],
+    "status": ["UPDATE performance SET status = 10 WHERE usn IN (SELECT usn FROM student LIMIT 5)"],
+    "insert": ["INSERT INTO student (usn, name, dept, batch, cgpa) VALUES ('NEW0001', 'New', 'CSE', 2030, 7.5)",
+               f"INSERT INTO performance (usn, cid, status) VALUES ('NEW0001', {FIRST_COMPANY}, 10)"],
+    "delete": [f"DELETE FROM performance WHERE usn = {FIRST_STUDENT}",
+               f"DELETE FROM student WHERE usn = {FIRST_STUDENT}"],
+    # One row out, one in: the row count alone would not change
+    "delete+insert": [f"DELETE FROM performance WHERE usn = {FIRST_STUDENT} AND cid = {FIRST_COMPANY}",
+                      "INSERT INTO performance (usn, cid, status) VALUES ((SELECT MAX(usn) FROM student), "
+                      "(SELECT MAX(cid) FROM company), 9)"],
+    "company": [f"UPDATE company SET company = 'Renamed Co' WHERE cid = {FIRST_COMPANY}",
+                f"UPDATE hiring SET ctc = 99 WHERE cid = {FIRST_COMPANY}"],
+}
+
+@pytest.mark.parametrize("profile", ["full", "options"])
+@pytest.mark.parametrize("mutation", list(MUTATIONS))
+def test_refresh_matches_a_full_load(database, monkeypatch, profile, mutation):
+    monkeypatch.setattr(incremental, "FULL_JOIN_SHARE", 1)
+    incremental.sync_all_data("test", profile)
+    execute(database, *MUTATIONS[mutation])
+    queries = issued_queries(lambda: incremental.sync_all_data("test", profile))
+    assert not issued(analyzer.COMBINED_QUERY, queries)   # patched, not re-joined
+    assert_matches_a_full_load(incremental.sync_all_data("test", profile), profile)
+
+def test_unchanged_database_keeps_the_frames(database):
+    before = incremental.sync_all_data("test")
+    after = incremental.sync_all_data("test")
+    assert all(a is b for a, b in zip(before, after))
+
+def test_delta_reads_rows_past_the_watermark(database):
+    incremental.sync_all_data("test")
+    execute(database, f"UPDATE student SET cgpa = 9.99 WHERE usn = {FIRST_STUDENT}")
+    queries = issued_queries(lambda: incremental.sync_all_data("test"))
+    assert not [q for q in queries if re.fullmatch(r"SELECT \* FROM \w+", q)]
+    deltas = [q for q in queries if f"WHERE {incremental.WATERMARK_COLUMN} " in q]
+    assert len(deltas) == len(incremental.TABLE_ORDER)
+    student = incremental._state.tables["student"]
+    assert student.loc[student["usn"] == student["usn"].min(), "cgpa"].item() == pytest.approx(9.99)
+
+def test_row_count_detects_deletes(database):
+    incremental.sync_all_data("test")
+    execute(database, *MUTATIONS["delete+insert"])
+    queries = issued_queries(lambda: incremental.sync_all_data("test"))
+    keys = incremental.KEYS_QUERY.format(keys=", ".join(incremental.PRIMARY_KEYS["performance"]), table="performance")
+    assert keys in queries
+    assert_matches_a_full_load(incremental.sync_all_data("test"), "full")
+
+def test_many_changed_students_rerun_the_join(database, monkeypatch):
+    monkeypatch.setattr(incremental, "FULL_JOIN_SHARE", 0)
+    incremental.sync_all_data("test")
+    execute(database, *MUTATIONS["status"])
+    queries = issued_queries(lambda: incremental.sync_all_data("test"))
+    assert issued(analyzer.COMBINED_QUERY, queries)
+    assert not [q for q in queries if "WHERE s.usn IN" in q]
+    assert_matches_a_full_load(incremental.sync_all_data("test"), "full")
+
+def test_snapshot_round_trip(database, monkeypatch):
+    incremental.sync_all_data("test", "options")
+    assert os.path.exists(incremental.SNAPSHOT_PATH)
+    saved = incremental.load_snapshot()
+    assert saved.profile == "options" and saved.source == "test"
+    assert rows(saved.combined) == rows(incremental._state.combined)
+
+    # A new process: the pickle is patched forward, not reloaded whole
+    monkeypatch.setattr(incremental, "_state", None)
+    execute(database, *MUTATIONS["update"])
+    queries = issued_queries(lambda: incremental.sync_all_data("test", "options"))
+    assert not issued(analyzer.COMBINED_QUERY, queries)
+    assert_matches_a_full_load(incremental._state.frames, "options")
+    assert rows(incremental.load_snapshot().combined) == rows(incremental._state.combined)
+
+def test_snapshot_of_another_source_is_reloaded(database):
+    incremental.sync_all_data("test")
+    incremental._state = None
+    queries = issued_queries(lambda: incremental.sync_all_data("other"))
+    assert issued(analyzer.COMBINED_QUERY, queries)
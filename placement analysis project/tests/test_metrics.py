@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import visualization as vz
+from analyzer import apply_filters
+from metrics import DashboardMetrics, MetricsEngine
+
+TABLES = ["top_recruiters", "batch", "dept", "salary", "conversion"]
+
+def normalized(table):
+    # Same rows and values, whatever the row order and categorical dtypes
+    table = table.copy()
+    for column in table.columns:
+        if isinstance(table[column].dtype, pd.CategoricalDtype):
+            table[column] = table[column].astype(str)
+        elif pd.api.types.is_numeric_dtype(table[column]):
+            table[column] = table[column].astype("float64")
+    return table.sort_values(list(table.columns)).reset_index(drop=True)
+
+def assert_same_table(actual, expected):
+    pd.testing.assert_frame_equal(normalized(actual), normalized(expected), check_dtype=False, rtol=1e-5)
+
+def filtered_frames(combined, filter_sets):
+    return [apply_filters(combined, *filters) for filters in filter_sets]
+
+
+def test_kpis_match_pandas(combined, filter_sets):
+    for df in filtered_frames(combined, filter_sets):
+        assert MetricsEngine(df).kpis() == pytest.approx(vz.kpi_summary(df))
+
+@pytest.mark.parametrize("name", TABLES)
+def test_tables_match_pandas(combined, filter_sets, name):
+    for df in filtered_frames(combined, filter_sets):
+        expected = vz.compute_aggregate(df, name)
+        if expected.empty:
+            assert MetricsEngine(df).aggregate(name).empty
+        else:
+            assert_same_table(MetricsEngine(df).aggregate(name), expected)
+
+def test_overall_matches_pandas(combined, filter_sets):
+    for df in filtered_frames(combined, filter_sets):
+        stats, total = MetricsEngine(df).overall_status_stats()
+        expected, expected_total = vz.overall_status_stats(df)
+        assert total == expected_total
+        assert_same_table(stats, expected)
+
+def test_cgpa_matches_pandas(combined, filter_sets):
+    for df in filtered_frames(combined, filter_sets):
+        stats_all, stats_p, dominant = MetricsEngine(df).cgpa_bin_stats()
+        expected_all, expected_p, expected_dominant = vz.cgpa_bin_stats(df)
+        assert_same_table(stats_all, expected_all)
+        assert_same_table(stats_p, expected_p)
+        assert dominant == expected_dominant
+
+def test_arrays_sized_by_the_view(combined):
+    df = apply_filters(combined, "All", "All", sorted(combined["company"].dropna().unique())[0])
+    engine = MetricsEngine(df)
+    assert engine.n_students == df["usn"].nunique() < combined["usn"].nunique()
+    assert engine.has.shape[0] == engine.n_students
+
+def test_metrics_result_reads_by_name(combined):
+    metrics = MetricsEngine(combined).metrics()
+    assert isinstance(metrics, DashboardMetrics)
+    assert DashboardMetrics.of(metrics) is metrics
+    assert metrics["kpis"]["total_students"] == metrics.total_students == combined["usn"].nunique()
+
+def test_empty_view(combined):
+    metrics = MetricsEngine(combined.iloc[:0]).metrics()
+    assert metrics.total_students == 0
+    assert metrics.conversion.empty and metrics.salary.empty
+    assert metrics.cgpa[2] is None
+    assert np.all(metrics.overall[0]["count"] == 0)
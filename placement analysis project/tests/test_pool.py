@@ -0,0 +1,124 @@
+import threading
+
+import pytest
+
+from pool import ConnectionPool, PoolClosedError, PoolExhaustedError
+
+
+class FakeConnection:
+    def __init__(self, ident):
+        self.ident = ident
+        self.healthy = True
+        self.closed = False
+        self.rollbacks = 0
+        self.fail_rollback = False
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise RuntimeError("connection lost")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+class FakeFactory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.made))
+        self.made.append(conn)
+        return conn
+
+@pytest.fixture
+def factory():
+    return FakeFactory()
+
+@pytest.fixture
+def pool(factory):
+    return ConnectionPool(factory, size=2, timeout=0.05, health_check=lambda conn: conn.healthy)
+
+
+def test_connections_are_reused(pool, factory):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(factory.made) == 1 and pool.idle == 1
+
+def test_exhaustion_times_out(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+    pool.release(held.pop())
+    assert pool.acquire() is not None
+
+def test_waiter_gets_a_released_connection(pool):
+    held = [pool.acquire(), pool.acquire()]
+    timer = threading.Timer(0.1, pool.release, [held[0]])
+    timer.start()
+    assert pool.acquire(timeout=2) is held[0]
+    timer.join()
+
+def test_unhealthy_idle_connection_is_replaced(pool, factory):
+    with pool.connection() as conn:
+        pass
+    conn.healthy = False
+    with pool.connection() as replacement:
+        assert replacement is not conn
+    assert conn.closed and len(factory.made) == 2
+
+def test_release_rolls_back(pool):
+    with pool.connection() as conn:
+        pass
+    assert conn.rollbacks == 1
+
+def test_failed_rollback_drops_the_connection(pool):
+    with pool.connection() as conn:
+        conn.fail_rollback = True
+    assert conn.closed and pool.idle == 0
+    # Its slot is free again
+    pool.acquire()
+    pool.acquire()
+
+def test_session_keeps_its_connection_until_checkin(pool):
+    conn = pool.checkout("a")
+    assert pool.checkout("a") is conn
+    assert pool.checkout("b") is not conn
+    pool.checkin("a")
+    assert pool.idle == 1 and conn.rollbacks == 1
+    assert pool.acquire() is conn
+
+def test_unhealthy_session_connection_is_replaced(pool):
+    conn = pool.checkout("a")
+    conn.healthy = False
+    replacement = pool.checkout("a")
+    assert replacement is not conn and conn.closed
+    # The dropped connection's slot was given back
+    pool.checkout("b")
+
+def test_close_closes_idle_and_session_connections(pool):
+    with pool.connection() as idle:
+        pass
+    session = pool.checkout("a")
+    pool.close()
+    assert idle.closed and session.closed
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+
+def test_connection_returned_after_close_is_closed(pool):
+    with pool.connection() as conn:
+        pool.close()
+    assert conn.closed and pool.idle == 0
+
+def test_reconfigure_closes_connections_still_checked_out(monkeypatch, factory):
+    import dbconfig
+    monkeypatch.setattr(dbconfig, "_pool", None)
+    old = dbconfig.configure_pool(factory, size=2, timeout=0.05)
+    conn = old.acquire()
+    new = dbconfig.configure_pool(factory, size=2, timeout=0.05)
+    assert dbconfig.get_pool() is new and old.closed
+    old.release(conn)
+    assert conn.closed and old.idle == 0
+    new.close()
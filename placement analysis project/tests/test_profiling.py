@@ -0,0 +1,81 @@
+import contextvars
+import logging
+import threading
+
+import profiling
+from profiling import finish_profile, stage, start_profile
+
+
+def run_in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join(5)
+
+
+def profile_in_thread(body, trace_memory=False):
+    # Each render runs on its own thread, like a Streamlit session
+    result = {}
+
+    def render():
+        profile = start_profile("s", trace_memory=trace_memory)
+        body(profile)
+        result["profile"] = finish_profile(profile)
+
+    run_in_thread(render)
+    return result["profile"]
+
+
+def test_logger_emits_info():
+    assert profiling.logger.isEnabledFor(logging.INFO)
+    assert profiling.logger.handlers
+
+
+def test_helper_threads_keep_their_own_depth():
+    def body(profile):
+        with stage("outer"):
+            context = contextvars.copy_context()
+            run_in_thread(lambda: context.run(nested))
+            with stage("inner"):
+                pass
+
+    def nested():
+        with stage("helper"):
+            with stage("helper.child"):
+                pass
+
+    depths = {s["stage"]: s["depth"] for s in profile_in_thread(body).stages}
+    assert depths == {"outer": 0, "helper": 0, "helper.child": 1, "inner": 1}
+
+
+def test_finished_profile_records_nothing():
+    profile = profile_in_thread(lambda profile: None)
+    context = contextvars.copy_context()
+    context.run(profiling._active.set, profile)
+    context.run(lambda: stage("late").__enter__())
+    assert profile.stages == []
+
+
+def test_memory_only_for_a_single_profiling_session():
+    def alone(profile):
+        with stage("alloc"):
+            data = [0] * 100000
+        del data
+
+    entry = profile_in_thread(alone, trace_memory=True).stages[0]
+    assert entry["memory_delta"] > 0
+
+    started, release = threading.Event(), threading.Event()
+
+    def other():
+        profile = start_profile("other")
+        started.set()
+        release.wait(5)
+        finish_profile(profile)
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    assert started.wait(5)
+    entry = profile_in_thread(alone, trace_memory=True).stages[0]
+    release.set()
+    thread.join(5)
+    assert entry["memory_delta"] is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backends
+import query_builder as qb
+import synthetic
+import visualization as vz
+from analyzer import apply_filters
+
+
+def sqlite_backend(tmp_path, tables):
+    path = str(tmp_path / "placement.db")
+    synthetic.write_sqlite(tables, path)
+    backends.configure_backend(f"sqlite:{path}")
+    return synthetic.load_frames(tables)[4]
+
+@pytest.fixture
+def pushdown(tmp_path, frames):
+    return sqlite_backend(tmp_path, frames[:4])
+
+@pytest.fixture
+def two_batches(tmp_path):
+    # Fewer than three batches, and students without one
+    student_df, company_df, performance_df, hiring_df = synthetic.generate(
+        students=200, batches=2, companies=8, seed=5)
+    student_df["batch"] = student_df["batch"].astype(object)
+    student_df.loc[:9, "batch"] = None
+    return sqlite_backend(tmp_path, (student_df, company_df, performance_df, hiring_df))
+
+def normalized(table, keys):
+    # Group keys as text (SQL returns batch years as numbers), counts as floats
+    table = table.copy()
+    for column in table.columns:
+        values = table[column].astype(object)
+        table[column] = values.map(str) if column in keys else values.astype("float64")
+    return table.sort_values(keys).reset_index(drop=True)
+
+def assert_parity(combined, filters):
+    df = apply_filters(combined, *filters)
+    assert qb.fetch_aggregate("kpis", *filters) == pytest.approx(vz.kpi_summary(df))
+    stats, total = qb.fetch_aggregate("overall", *filters)
+    expected, expected_total = vz.overall_status_stats(df)
+    assert total == expected_total
+    assert np.array_equal(stats["count"].to_numpy(), expected["count"].to_numpy())
+    for name, key in [("batch", ["batch", "Placement_status"]), ("dept", ["dept", "Placement_status"])]:
+        actual = normalized(qb.fetch_aggregate(name, *filters)[key + ["count", "total"]], key)
+        wanted = normalized(vz.compute_aggregate(df, name)[key + ["count", "total"]], key)
+        pd.testing.assert_frame_equal(actual, wanted, check_dtype=False)
+    conversion = qb.fetch_aggregate("conversion", *filters)
+    assert vz.conversion_stats(df).set_index("company")["conversion"].to_dict() == (
+        conversion.set_index("company")["conversion"].to_dict() if not conversion.empty else {})
+
+
+def test_pushdown_matches_apply_filters(pushdown, filter_sets):
+    for filters in filter_sets:
+        assert_parity(pushdown, filters)
+
+@pytest.mark.parametrize("filters", [("Last 3 Years", "All", "All"), ("All", "All", "All")])
+def test_last_3_years_with_fewer_batches(two_batches, filters):
+    assert_parity(two_batches, filters)
+    # No filter applies, rows without a batch included
+    total = qb.fetch_aggregate("kpis", *filters)["total_students"]
+    assert total == two_batches["usn"].nunique() == 200
@@ -0,0 +1,76 @@
+import sys
+
+import pytest
+
+import backends
+import synthetic
+from analyzer import apply_filters
+from cache import DataCache
+from export import PIVOT_INDEX
+from records import RecordsView, SqlRecordsView
+
+
+def test_view_size_counts_rows_and_orders(combined):
+    view = RecordsView(combined)
+    before = sys.getsizeof(view)
+    assert before >= combined.memory_usage(deep=True).sum()
+    # Orders memoized after caching were already counted
+    for sort_by in PIVOT_INDEX:
+        for ascending in (True, False):
+            view.page(1, 25, sort_by, ascending)
+    assert before >= combined.memory_usage().sum() + sum(o.nbytes for o in view._orders.values())
+
+def test_cached_views_evict_under_the_cap(combined, filter_sets):
+    views = [RecordsView(apply_filters(combined, *filters)) for filters in filter_sets[:3]]
+    cache = DataCache(ttl=None, max_bytes=sys.getsizeof(views[0]) + sys.getsizeof(views[1]) // 2)
+    for i, view in enumerate(views):
+        cache.put(i, view)
+    assert cache.total_bytes <= cache.max_bytes
+    assert 0 not in cache and 2 in cache
+
+
+# --- Parity between the pandas, SQL and worker views ---
+@pytest.fixture
+def sqlite_frames(tmp_path, frames):
+    path = str(tmp_path / "placement.db")
+    synthetic.write_sqlite(frames[:4], path)
+    backends.configure_backend(f"sqlite:{path}")
+
+def as_text(page):
+    # SQL reads batch years and CGPAs with other dtypes than the compacted frame
+    page = page.astype(object).where(page.notna(), None)
+    page["cgpa"] = page["cgpa"].map(lambda v: None if v is None else round(float(v), 2))
+    page.columns = [str(c) for c in page.columns]
+    return page.astype(str)
+
+def assert_same_pages(views, pages):
+    for args in pages:
+        expected, expected_total = views[0].page(*args)
+        for view in views[1:]:
+            actual, total = view.page(*args)
+            assert total == expected_total, args
+            assert as_text(actual).equals(as_text(expected)), args
+
+def parity_views(combined, worker_client, filters):
+    return [RecordsView(apply_filters(combined, *filters)), SqlRecordsView(*filters),
+            worker_client.records_view(*filters)]
+
+@pytest.mark.parametrize("which", [0, 2, 3, 5, 6])
+def test_views_page_alike(combined, filter_sets, sqlite_frames, worker_client, which):
+    views = parity_views(combined, worker_client, filter_sets[which])
+    total = views[0].count()
+    assert [view.count() for view in views] == [total] * 3
+    last = views[0].page_count(total, 50)
+    assert_same_pages(views, [(1, 25), (2, 25), (last, 50), (last + 1, 50), (1, 250)])
+
+@pytest.mark.parametrize("sort_by", PIVOT_INDEX)
+def test_views_sort_alike(combined, filter_sets, sqlite_frames, worker_client, sort_by):
+    views = parity_views(combined, worker_client, filter_sets[0])
+    assert_same_pages(views, [(page, 25, sort_by, ascending) for page in (1, 4) for ascending in (True, False)])
+
+@pytest.mark.parametrize("search", ["student 1", "4GS0000005", "Company 0003", "no such student"])
+def test_views_search_alike(combined, filter_sets, sqlite_frames, worker_client, search):
+    views = parity_views(combined, worker_client, filter_sets[3])
+    total = views[0].count(search)
+    assert [view.count(search) for view in views] == [total] * 3
+    assert_same_pages(views, [(1, 25, "name", True, search), (2, 25, "name", True, search)])
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import analyzer
+import sketch
+import synthetic
+from cube import SketchCube
+
+# Estimates must land within 4 standard errors of the exact count (about
+# 6.5% at p=12; a 1-in-15000 miss for a fair estimator, and the hashes are
+# deterministic so a pass is stable), plus one for rounding small counts.
+TOLERANCE = 4 * sketch.relative_error()
+# Below a few thousand students linear counting is far tighter than that
+LINEAR_TOLERANCE = 0.03
+
+def assert_close(estimate, exact, tolerance=TOLERANCE):
+    assert abs(estimate - exact) <= tolerance * exact + 1, (estimate, exact)
+
+def estimate_distinct(values):
+    hashes = sketch.hash_values(values)
+    entries = sketch.entries(hashes)
+    return int(sketch.estimate(sketch.registers(entries, np.zeros(len(entries), dtype=np.int64), 1))[0])
+
+
+@pytest.mark.parametrize("n", [1, 10, 300, 5000, 12000, 60000])
+def test_estimate_within_tolerance(n):
+    values = [f"USN{i:07d}" for i in range(n)]
+    # Duplicates must not count twice
+    assert_close(estimate_distinct(values + values[: n // 2]), n)
+
+
+def test_small_counts_use_linear_counting():
+    for n in [1, 2, 50, 200, 600, 2000]:
+        assert_close(estimate_distinct([f"S{i}" for i in range(n)]), n, LINEAR_TOLERANCE)
+
+
+def test_sparse_sketches_merge_like_a_union():
+    values = np.array([f"USN{i:06d}" for i in range(20000)], dtype=object)
+    groups = np.arange(len(values)) % 3
+    members, lengths = sketch.compact(groups, sketch.entries(sketch.hash_values(values)), 3)
+    union = sketch.estimate(sketch.registers(members, np.zeros(len(members), dtype=np.int64), 1))[0]
+    assert union == estimate_distinct(values)
+    per_group = sketch.estimate(sketch.registers(members, np.repeat(np.arange(3), lengths), 3))
+    for group, estimate in enumerate(per_group):
+        assert_close(estimate, int((groups == group).sum()))
+
+
+# --- Sketch cube against exact distinct counts ---
+@pytest.fixture(scope="module")
+def large_combined():
+    # Large enough that the unfiltered counts are past linear counting
+    return synthetic.load_frames(synthetic.generate(students=15000, companies=20, seed=11))[4]
+
+@pytest.fixture(scope="module")
+def large_cube(large_combined):
+    return SketchCube(large_combined)
+
+def test_cube_counts_match_nunique(large_combined, large_cube):
+    batches = sorted(large_combined["batch"].dropna().unique())
+    depts = sorted(large_combined["dept"].dropna().unique())
+    companies = sorted(large_combined["company"].dropna().unique())
+    for filters in [("All", "All", "All"), ("Last 3 Years", "All", "All"), (batches[0], "All", "All"),
+                    ("All", depts[1], "All"), ("All", "All", companies[2])]:
+        df = analyzer.apply_filters(large_combined, *filters)
+        kpis = large_cube.slice(*filters).kpis()
+        assert_close(kpis["total_students"], df["usn"].nunique())
+        for status, key in [("Placed", "placed_students"), ("Shortlisted", "shortlisted_students")]:
+            assert_close(kpis[key], df.loc[df["Placement_status"] == status, "usn"].nunique())
+
+def test_cube_group_totals_match_nunique(large_combined, large_cube):
+    for column in ["dept", "batch"]:
+        stats = large_cube.group_wise_stats(column).drop_duplicates(column)
+        exact = large_combined.groupby(column, observed=True)["usn"].nunique()
+        for value, total in zip(stats[column], stats["total"]):
+            assert_close(total, exact[value])
+
+def test_cube_company_hires_match_nunique(large_combined, large_cube):
+    hired = large_combined[large_combined["Placement_status"].isin(["Placed", "Shortlisted"])]
+    exact = hired.groupby("company", observed=True)["usn"].nunique()
+    top = large_cube.top_recruiters_stats()
+    assert set(top["company"]) == set(exact.index)
+    for company, hires in zip(top["company"], top["hires"]):
+        assert_close(hires, exact[company])
+
+def test_cube_on_small_frame(combined, filter_sets):
+    cube = SketchCube(combined)
+    for filters in filter_sets:
+        df = analyzer.apply_filters(combined, *filters)
+        assert_close(cube.slice(*filters).kpis()["total_students"], df["usn"].nunique(), LINEAR_TOLERANCE)
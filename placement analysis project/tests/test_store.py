@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from store import DataSnapshot, DataStore
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def join_all(threads):
+    for thread in threads:
+        thread.join(5)
+
+
+@pytest.fixture
+def snapshot(frames):
+    return DataSnapshot(1, frames)
+
+
+def test_slow_build_does_not_block_other_names(snapshot):
+    started, release = threading.Event(), threading.Event()
+
+    def slow(s):
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    threads = run_threads([lambda: snapshot.derived("slow", slow)])
+    assert started.wait(5)
+    begin = time.monotonic()
+    assert snapshot.derived("fast", lambda s: "fast") == "fast"
+    assert time.monotonic() - begin < 0.5
+    release.set()
+    join_all(threads)
+    assert snapshot.derived("slow", slow) == "slow"
+
+def test_concurrent_readers_share_one_build(snapshot):
+    builds, release = [], threading.Event()
+    results = []
+
+    def build(s):
+        builds.append(1)
+        release.wait(5)
+        return object()
+
+    threads = run_threads([lambda: results.append(snapshot.derived("shared", build)) for _ in range(8)])
+    time.sleep(0.1)
+    release.set()
+    join_all(threads)
+    assert len(builds) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+def test_failed_build_reaches_waiters_and_is_retried(snapshot):
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing(s):
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    def wait():
+        try:
+            snapshot.derived("flaky", lambda s: "unused")
+        except ValueError as exc:
+            errors.append(exc)
+
+    def first():
+        try:
+            snapshot.derived("flaky", failing)
+        except ValueError as exc:
+            errors.append(exc)
+
+    threads = run_threads([first])
+    assert started.wait(5)
+    threads += run_threads([wait])
+    time.sleep(0.1)
+    release.set()
+    join_all(threads)
+    assert len(errors) == 2
+    assert snapshot.derived("flaky", lambda s: "rebuilt") == "rebuilt"
+
+def test_store_keeps_the_snapshot_until_the_frames_change(frames):
+    loaded = [frames]
+    store = DataStore(loader=lambda: loaded[-1])
+    first = store.current()
+    assert store.current() is first
+    loaded.append(tuple(frame.copy() for frame in frames))
+    second = store.current()
+    assert second is not first and second.version == first.version + 1
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analyzer import apply_filters
+from visualization import CGPA_ORDER, bin_cgpa, cgpa_bin_stats, conversion_stats
+
+
+# --- Reference implementations (before vectorizing) ---
+def legacy_bin_cgpa_value(cgpa):
+    try:
+        cgpa = float(cgpa)
+    except (TypeError, ValueError):
+        return "Unknown"
+    return "<6" if cgpa < 6 else "6-7" if cgpa < 7 else "7-8" if cgpa < 8 else "8-9" if cgpa < 9 else "9-10"
+
+def legacy_conversion(df):
+    conv = {}
+    for company, rows in df.groupby("company", observed=True):
+        total = rows["usn"].nunique()
+        placed = rows.loc[rows["Placement_status"] == "Placed", "usn"].nunique()
+        conv[company] = round(placed / total * 100) if total else 0
+    return conv
+
+def legacy_cgpa_stats(df):
+    df = df[df["cgpa"].notna()].assign(cgpa_bin=df["cgpa"].apply(legacy_bin_cgpa_value))
+    stats_all = df.groupby("cgpa_bin")["usn"].nunique().to_dict()
+    placed = df[df["Placement_status"].isin(["Placed", "Shortlisted"])]
+    stats_p = placed.groupby("cgpa_bin")["usn"].nunique().to_dict()
+    dominant_bin = df["cgpa_bin"].mode()[0] if not df.empty else None
+    return stats_all, stats_p, dominant_bin
+
+def as_dict(stats, key, value="count"):
+    return {str(k): int(v) for k, v in zip(stats[key], stats[value])}
+
+
+# --- Binning ---
+@pytest.mark.parametrize("cgpa", [0, 4.2, 5.999, 6, 6.01, 7, 7.5, 8, 8.99, 9, 9.5, 10, "7.25", "8"])
+def test_bin_cgpa_matches_scalar_bins(cgpa):
+    assert str(bin_cgpa([cgpa])[0]) == legacy_bin_cgpa_value(cgpa)
+
+@pytest.mark.parametrize("cgpa", [None, np.nan, "n/a", ""])
+def test_bin_cgpa_missing_is_nan(cgpa):
+    assert pd.isna(bin_cgpa([cgpa])[0])
+
+def test_bin_cgpa_labels_in_chart_order():
+    assert list(bin_cgpa([5, 6, 7, 8, 9]).cat.categories) == CGPA_ORDER
+
+def test_bin_cgpa_custom_edges():
+    bins = bin_cgpa([5.5, 6.5, 9.5], edges=[6, 9])
+    assert [str(b) for b in bins] == ["<6", "6-9", "9-10"]
+
+
+# --- Aggregates ---
+def test_conversion_matches_per_company_loop(combined, filter_sets):
+    for filters in filter_sets:
+        df = apply_filters(combined, *filters)
+        assert as_dict(conversion_stats(df), "company", "conversion") == legacy_conversion(df)
+
+def test_conversion_empty_frame(combined):
+    stats = conversion_stats(combined.iloc[:0])
+    assert stats.empty and list(stats.columns) == ["company", "conversion"]
+
+def test_cgpa_bin_stats_match_scalar_binning(combined, filter_sets):
+    for filters in filter_sets:
+        df = apply_filters(combined, *filters)
+        stats_all, stats_p, dominant_bin = cgpa_bin_stats(df)
+        expected_all, expected_p, expected_dominant = legacy_cgpa_stats(df)
+        assert as_dict(stats_all, "cgpa_bin") == expected_all
+        assert as_dict(stats_p, "cgpa_bin") == expected_p
+        assert dominant_bin == expected_dominant
@@ -0,0 +1,97 @@
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+import visualization as vz
+import worker
+from analyzer import apply_filters
+from metrics import MetricsEngine
+from records import RecordsView
+
+
+def assert_same(actual, expected):
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(actual, expected)
+    elif isinstance(expected, (tuple, list)):
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert_same(a, e)
+    else:
+        assert actual == pytest.approx(expected)
+
+
+# --- Authkey and address ---
+@pytest.fixture
+def authkey_path(tmp_path, monkeypatch):
+    path = str(tmp_path / ".worker_authkey")
+    monkeypatch.setattr(worker, "AUTHKEY_PATH", path)
+    monkeypatch.delenv("PLACEMENT_WORKER_AUTHKEY", raising=False)
+    return path
+
+def test_authkey_file_is_private(authkey_path):
+    with pytest.raises(worker.WorkerError):
+        worker.worker_authkey()
+    key = worker.worker_authkey(create=True)
+    assert len(key) == 64
+    assert stat.S_IMODE(os.stat(authkey_path).st_mode) == 0o600
+    # Later workers and clients read the same key
+    assert worker.worker_authkey(create=True) == key
+    assert worker.worker_authkey() == key
+
+def test_authkey_from_the_environment(authkey_path, monkeypatch):
+    monkeypatch.setenv("PLACEMENT_WORKER_AUTHKEY", "shared-secret")
+    assert worker.worker_authkey(create=True) == b"shared-secret"
+    assert not os.path.exists(authkey_path)
+
+@pytest.mark.parametrize("address", ["0.0.0.0:6399", "192.168.1.5:6399"])
+def test_remote_address_needs_allow_remote(address, monkeypatch):
+    started = []
+    monkeypatch.setattr(worker, "AggregationServer", lambda *args, **kwargs: started.append(args))
+    with pytest.raises(SystemExit):
+        worker.main(["--address", address])
+    assert started == []
+
+def test_allow_remote_starts_the_server(monkeypatch):
+    started = []
+
+    class Server:
+        def __init__(self, address, **kwargs):
+            started.append(address)
+
+        def serve_forever(self):
+            pass
+
+    monkeypatch.setattr(worker, "AggregationServer", Server)
+    worker.main(["--address", "0.0.0.0:6399", "--allow-remote"])
+    worker.main(["--address", "127.0.0.1:6399"])
+    assert started == ["0.0.0.0:6399", "127.0.0.1:6399"]
+
+
+# --- A live worker ---
+def test_wrong_authkey_is_refused(worker_client):
+    client = worker.AggregationClient(worker_client.address, b"not the key")
+    with pytest.raises(worker.WorkerError, match="rejected"):
+        client.info()
+
+def test_aggregates_match_local(combined, filter_sets, worker_client):
+    assert worker_client.info()["rows"] == len(combined)
+    for filters in filter_sets:
+        df = apply_filters(combined, *filters)
+        local = MetricsEngine(df).metrics()
+        assert worker_client.aggregate("kpis", *filters) == pytest.approx(vz.kpi_summary(df))
+        for name in vz.AGGREGATES:
+            assert_same(worker_client.aggregate(name, *filters), local[name])
+
+def test_records_pages_match_local(combined, filter_sets, worker_client):
+    for filters in filter_sets:
+        local = RecordsView(apply_filters(combined, *filters))
+        remote = worker_client.records_view(*filters)
+        assert remote.count() == local.count()
+        for args in [(1, 25), (2, 50, "cgpa", False), (1, 25, "usn", True, "student 1")]:
+            assert_same(remote.page(*args), local.page(*args))
+
+def test_errors_come_back_as_worker_errors(worker_client):
+    with pytest.raises(worker.WorkerError, match="no such aggregate"):
+        worker_client.aggregate("no such aggregate", "All", "All", "All")
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from cache import FrameRegistry
+
+COUNT_COLUMNS = ["students", "placed", "shortlisted", "interviewed", "placed_interviewed", "ctc_count"]
+SUM_COLUMNS = COUNT_COLUMNS + ["ctc_sum"]
+TREND_METRICS = {
+    "placement_rate": "Placement rate (%)",
+    "conversion": "Interview-to-offer conversion (%)",
+    "ctc_avg": "Average CTC (LPA)",
+    "ctc_max": "Highest CTC (LPA)",
+    "ctc_min": "Lowest CTC (LPA)",
+}
+TREND_GROUPS = ["dept", "company"]
+
+
+# --- Per-batch base counts ---
+# Distinct-student counts per (batch, dept) and per (batch, dept, company).
+# Every student has exactly one batch and one dept, so counts of different
+# batches or depts add up exactly: a rolling window or an all-dept total is
+# a plain sum of these rows, never a re-scan of the raw data.
+def base_counts(df, keys):
+    df = df[df["batch"].notna()]
+    if "company" in keys:
+        df = df[df["company"].notna()]
+    status = df["Placement_status"]
+    placed = (status == "Placed").to_numpy()
+    rows = pd.DataFrame({
+        **{key: df[key].astype(object).to_numpy() for key in keys},
+        "usn": df["usn"].astype(object).to_numpy(),
+        "placed": placed,
+        "shortlisted": (status == "Shortlisted").to_numpy(),
+        "interviewed": df["company"].notna().to_numpy(),
+        "ctc": np.where(placed, df["ctc"].astype("float64"), np.nan),
+    })
+    if rows.empty:
+        return pd.DataFrame(columns=keys + SUM_COLUMNS + ["ctc_min", "ctc_max"])
+
+    students = rows.groupby(keys + ["usn"], dropna=False, sort=False)[["placed", "shortlisted", "interviewed"]].any()
+    students["placed_interviewed"] = students["placed"] & students["interviewed"]
+    counts = students.groupby(level=keys, dropna=False, sort=False).agg(
+        students=("placed", "size"), placed=("placed", "sum"), shortlisted=("shortlisted", "sum"),
+        interviewed=("interviewed", "sum"), placed_interviewed=("placed_interviewed", "sum"))
+    ctc = rows.groupby(keys, dropna=False, sort=False)["ctc"].agg(
+        ctc_sum="sum", ctc_count="count", ctc_min="min", ctc_max="max")
+    return counts.join(ctc).reset_index()
+
+def add_metrics(table):
+    table["placement_rate"] = (table["placed"] + table["shortlisted"]) / table["students"].where(table["students"] > 0) * 100
+    table["conversion"] = table["placed_interviewed"] / table["interviewed"].where(table["interviewed"] > 0) * 100
+    table["ctc_avg"] = table["ctc_sum"] / table["ctc_count"].where(table["ctc_count"] > 0)
+    return table
+
+
+# --- Trend engine ---
+class TrendEngine:
+    def __init__(self, df, dept_counts=None, company_counts=None):
+        if dept_counts is None:
+            dept_counts = base_counts(df, ["batch", "dept"])
+            company_counts = base_counts(df, ["batch", "dept", "company"])
+        self.dept_counts = dept_counts
+        self.company_counts = company_counts
+        self.batches = sorted(dept_counts["batch"].unique())
+
+    # Recount only the batches present in `changed_rows` (the old and new
+    # rows of every re-synced student); other batches are carried over.
+    def refreshed(self, df, changed_rows):
+        batches = changed_rows["batch"].dropna().astype(object).unique()
+        rows = df[df["batch"].astype(object).isin(batches)]
+
+        def merge(old, keys):
+            kept = old[~old["batch"].isin(batches)]
+            return pd.concat([kept, base_counts(rows, keys)], ignore_index=True)
+
+        return TrendEngine(df, merge(self.dept_counts, ["batch", "dept"]),
+                           merge(self.company_counts, ["batch", "dept", "company"]))
+
+    def trends(self, by=None, window=1, dept_filter="All", company_filter="All"):
+        # One row per batch (and per `by` value: "dept" or "company") with
+        # the metrics over a rolling `window` of batches and their change
+        # from the previous batch (`<metric>_yoy`).
+        counts = self.company_counts if by == "company" or company_filter != "All" else self.dept_counts
+        if dept_filter != "All":
+            counts = counts[counts["dept"] == dept_filter]
+        if company_filter != "All":
+            counts = counts[counts["company"] == company_filter]
+        keys = [by] if by else []
+        counts = counts[counts[by].notna()] if by else counts
+        if counts.empty:
+            return pd.DataFrame(columns=keys + ["batch"] + SUM_COLUMNS + list(TREND_METRICS))
+
+        totals = counts.groupby(keys + ["batch"], sort=False).agg(
+            {**{c: "sum" for c in SUM_COLUMNS}, "ctc_min": "min", "ctc_max": "max"})
+        if keys:
+            grid = pd.MultiIndex.from_product([sorted(totals.index.unique(level=0)), self.batches], names=keys + ["batch"])
+        else:
+            grid = pd.Index(self.batches, name="batch")
+        totals = totals.reindex(grid)
+        totals[SUM_COLUMNS] = totals[SUM_COLUMNS].fillna(0)
+
+        def roll(columns, how):
+            source = totals.groupby(level=0, sort=False)[columns] if keys else totals[columns]
+            result = getattr(source.rolling(window, min_periods=1), how)()
+            return result.droplevel(0) if keys else result
+
+        table = roll(SUM_COLUMNS, "sum").assign(ctc_min=roll("ctc_min", "min"), ctc_max=roll("ctc_max", "max"))
+        table = table.reindex(grid)
+        table[COUNT_COLUMNS] = table[COUNT_COLUMNS].astype("int64")
+        table = add_metrics(table)
+
+        for metric in TREND_METRICS:
+            previous = table.groupby(level=0, sort=False)[metric].shift() if keys else table[metric].shift()
+            table[f"{metric}_yoy"] = table[metric] - previous
+        table = table.reset_index()
+        return table[table["students"] > 0].reset_index(drop=True)
+
+
+# One engine per loaded frame, carried forward by incremental refresh
+_engines = FrameRegistry(TrendEngine)
+
+def register_trends(df, engine):
+    return _engines.register(df, engine)
+
+def peek_trends(df):
+    return _engines.peek(df)
+
+def trends_for(df):
+    return _engines.get(df)
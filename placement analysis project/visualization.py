@@ -1,34 +1,180 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import streamlit as st
-from analyzer import PLACEMENT_ORDER
+from analyzer import PLACEMENT_ORDER, kpi_summary
+from figure_cache import cached_figure, chart_key
+from profiling import stage, timed
+from trends import TREND_METRICS, TrendEngine
+
+CGPA_EDGES = [6, 7, 8, 9]
+CGPA_ORDER = ["<6","6-7","7-8","8-9","9-10"]
 
 # --- Utils ---
-def bin_cgpa_value(cgpa):
-    try: 
-        cgpa = float(cgpa)
-    except: 
-        return "Unknown"
-    return "<6" if cgpa < 6 else "6-7" if cgpa < 7 else "7-8" if cgpa < 8 else "8-9" if cgpa < 9 else "9-10"
-
-def make_bar(df, x, y, color, title, text="count", barmode=None, order=None, height=500, angle=0, hover=None):
+def cgpa_labels(edges):
+    edges = [f"{e:g}" for e in edges]
+    return [f"<{edges[0]}"] + [f"{lo}-{hi}" for lo, hi in zip(edges, edges[1:])] + [f"{edges[-1]}-10"]
+
+# CGPA -> "<6", "6-7", ... "9-10": [lo, hi) bins, missing/non-numeric -> NaN
+def bin_cgpa(cgpa, edges=CGPA_EDGES, labels=None):
+    values = pd.to_numeric(pd.Series(cgpa), errors="coerce")
+    return pd.cut(values, bins=[-np.inf, *edges, np.inf], right=False,
+                  labels=labels or cgpa_labels(edges))
+
+# Plotly is imported where figures are built, so importing this module (and
+# drawing the page before the first chart) does not wait for it
+def bar_figure(df, x, y, color, title, text="count", barmode=None, order=None, height=500, angle=0, hover=None):
+    import plotly.express as px
     fig = px.bar(df, x=x, y=y, color=color, text=text, height=height,
                  title=title, category_orders={color: order} if order else None)
     fig.update_traces(texttemplate="%{text}", textposition="inside", hovertemplate=hover)
     fig.update_layout(xaxis_title=x.capitalize(), yaxis_title=y.capitalize(),
                       legend_title=color.replace("_"," ").title(), xaxis_tickangle=angle, barmode=barmode)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-# --- Overall Placement ---
-def plot_overall_status(df):
+def show_figure(build, key=None):
+    fig = cached_figure(key, build)
+    with stage("visualization.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+# --- Aggregates ---
+# Each *_stats function reduces the filtered frame to the small table its
+# chart needs; render_* draws from that table only, so the same charts can
+# be fed by pandas or by SQL aggregates (see query_builder).
+@timed
+def overall_status_stats(df):
     df = df[df["Placement_status"] != "Unknown"]
     total = df["usn"].nunique()
+    stats = df.groupby("Placement_status", observed=False)["usn"].nunique().reset_index(name="count")
+    stats["percent"] = stats["count"]/total*100 if total else 0.0
+    return stats, total
+
+@timed
+def group_wise_stats(df, group_col):
+    df = df[df["Placement_status"] != "Unknown"]
+    totals = df.groupby(group_col, observed=True)["usn"].nunique().reset_index(name="total")
+    stats = df.groupby([group_col,"Placement_status"], observed=False)["usn"].nunique().reset_index(name="count")
+    stats = stats.merge(totals, on=group_col)
+    stats["percent"] = stats["count"]/stats["total"]*100
+    return stats
+
+@timed
+def top_recruiters_stats(df):
+    top = df[df["Placement_status"].isin(["Placed","Shortlisted"])]
+    return top.groupby("company", observed=True)["usn"].nunique().reset_index(name="hires").sort_values("hires",ascending=False)
+
+@timed
+def cgpa_bin_stats(df, edges=CGPA_EDGES):
+    df = df.assign(cgpa_bin=bin_cgpa(df["cgpa"], edges))
+    df = df[df["cgpa_bin"].notna()]
+    stats_all = df.groupby("cgpa_bin", observed=True)["usn"].nunique().reset_index(name="count")
+    placed = df[df["Placement_status"].isin(["Placed","Shortlisted"])]
+    stats_p = placed.groupby("cgpa_bin", observed=True)["usn"].nunique().reset_index(name="count")
+    dominant_bin = None
+    if not df.empty:
+        # Ties resolve like Series.mode() on the labels: the smallest label wins
+        rows = df["cgpa_bin"].value_counts()
+        dominant_bin = sorted(rows[rows == rows.max()].index.astype(str))[0]
+    return stats_all, stats_p, dominant_bin
+
+@timed
+def salary_stats(df):
+    return df[df["Placement_status"]=="Placed"].groupby("company", observed=True)["ctc"].agg(highest="max",lowest="min",average="mean").reset_index()
+
+@timed
+def conversion_stats(df):
+    # One pass over the rows: reduce to (company, usn) -> ever placed, then the
+    # mean of that flag per company is placed students / interviewed students.
+    df = df[df["company"].notna()]
+    if df.empty:
+        return pd.DataFrame(columns=["company","conversion"])
+    placed = (df["Placement_status"] == "Placed").rename("placed")
+    per_student = placed.groupby([df["company"], df["usn"]], observed=True, sort=False).any()
+    conv = per_student.groupby(level="company", observed=True).mean().mul(100)
+    return conv.round().astype(int).reset_index(name="conversion")
+
+AGGREGATES = {
+    "kpis": kpi_summary,
+    "overall": overall_status_stats,
+    "top_recruiters": top_recruiters_stats,
+    "batch": lambda df: group_wise_stats(df, "batch"),
+    "dept": lambda df: group_wise_stats(df, "dept"),
+    "salary": salary_stats,
+    "conversion": conversion_stats,
+    "cgpa": cgpa_bin_stats,
+}
+
+def compute_aggregate(df, name):
+    return AGGREGATES[name](df)
+
+# Every aggregate at once, from one reduction of the rows (see metrics)
+def compute_aggregates(df):
+    from metrics import compute_metrics
+    return compute_metrics(df)
+
+# --- Charts ---
+# Chart id -> tab label; each chart draws the aggregate of the same name.
+CHARTS = {
+    "overall": "Overall",
+    "top_recruiters": "Top Recruiters",
+    "batch": "Batch-wise",
+    "dept": "Branch-wise",
+    "salary": "Salary",
+    "conversion": "Conversion",
+    "cgpa": "CGPA",
+}
+
+def render_chart(name, agg, key=None):
+    if name == "overall":
+        return render_overall_status(*agg, key=key)
+    if name == "top_recruiters":
+        return render_top_recruiters(agg, key=key)
+    if name in ("batch", "dept"):
+        return render_group_wise(agg, name, CHARTS[name], key=key)
+    if name == "salary":
+        return render_salary_trends(agg, key=key)
+    if name == "conversion":
+        return render_conversion_rates(agg, key=key)
+    if name == "cgpa":
+        return render_cgpa_bins(*agg, key=key)
+    raise ValueError(f"Unknown chart: {name}")
+
+# `aggs` is a metrics.DashboardMetrics or any {name: aggregate} dict; `key`
+# identifies the data version and filters behind it and, when given, built
+# figures are cached per chart under it.
+@timed
+def render_aggregates(aggs, key=None):
+    for name in CHARTS:
+        render_chart(name, aggs[name], chart_key(key, name))
+
+# The same charts as static figures, for headless use (see report)
+def build_figures(aggs):
+    stats, total = aggs["overall"]
+    stats_all, stats_p, _ = aggs["cgpa"]
+    charts = {
+        "overall": (total > 0, lambda: overall_status_figure(stats)),
+        "top_recruiters": (not aggs["top_recruiters"].empty, lambda: top_recruiters_figure(aggs["top_recruiters"])),
+        "batch": (not aggs["batch"].empty, lambda: group_wise_figure(aggs["batch"], "batch", "Batch-wise")),
+        "dept": (not aggs["dept"].empty, lambda: group_wise_figure(aggs["dept"], "dept", "Branch-wise")),
+        "salary": (not aggs["salary"].empty, lambda: salary_figure(aggs["salary"])),
+        "conversion": (not aggs["conversion"].empty, lambda: conversion_figure(aggs["conversion"])),
+        "cgpa_all": (not stats_all.empty, lambda: cgpa_figure(stats_all, "CGPA Distribution (All)")),
+        "cgpa_placed": (not stats_p.empty, lambda: cgpa_figure(stats_p, "CGPA Distribution (Placed+Shortlisted)")),
+    }
+    return {name: build() for name, (shown, build) in charts.items() if shown}
+
+# --- Overall Placement ---
+def overall_status_figure(stats):
+    return bar_figure(stats, "Placement_status","percent","Placement_status",
+                      "Overall Placement Status (%)", text="count", order=PLACEMENT_ORDER)
+
+def plot_overall_status(df):
+    return render_overall_status(*overall_status_stats(df))
+
+@timed
+def render_overall_status(stats, total, key=None):
     if total == 0: 
         return st.info("⚠ No placement data available.")
-    stats = df.groupby("Placement_status")["usn"].nunique().reset_index(name="count")
-    stats["percent"] = stats["count"]/total*100
-    make_bar(stats, "Placement_status","percent","Placement_status",
-             "Overall Placement Status (%)", text="count", order=PLACEMENT_ORDER)
+    show_figure(lambda: overall_status_figure(stats), key)
 
     # --- Text Analysis ---
     placed = stats.loc[stats["Placement_status"] == "Placed", "percent"].sum()
@@ -42,18 +188,20 @@ def plot_overall_status(df):
     """)
 
 # --- Branch/Batch wise ---
+def group_wise_figure(stats, group_col, title):
+    return bar_figure(stats, group_col,"percent","Placement_status",
+                      f"{title} Placement Status (%)", text="count", order=PLACEMENT_ORDER, barmode="stack", height=600)
+
 def plot_group_wise(df, group_col, title):
-    df = df[df["Placement_status"] != "Unknown"]
-    if df.empty: 
+    if df[df["Placement_status"] != "Unknown"].empty:
         return st.info(f"⚠ No {group_col}-wise data available.")
-    totals = df.groupby(group_col)["usn"].nunique().reset_index(name="total")
-    stats = df.groupby([group_col,"Placement_status"])["usn"].nunique().reset_index(name="count")
-    stats = stats.merge(totals, on=group_col)
-    stats["percent"] = stats["count"]/stats["total"]*100
+    render_group_wise(group_wise_stats(df, group_col), group_col, title)
+
+@timed
+def render_group_wise(stats, group_col, title, key=None):
     if stats.empty: 
         return st.info(f"⚠ No {group_col}-wise data available.")
-    make_bar(stats, group_col,"percent","Placement_status",
-             f"{title} Placement Status (%)", text="count", order=PLACEMENT_ORDER, barmode="stack", height=600)
+    show_figure(lambda: group_wise_figure(stats, group_col, title), key)
 
     # --- Text Analysis ---
     best_group = stats.groupby(group_col)["percent"].mean().idxmax()
@@ -71,13 +219,18 @@ def plot_batch_wise(df):
     plot_group_wise(df,"batch","Batch-wise")
 
 # --- Top Recruiters ---
+def top_recruiters_figure(top):
+    return bar_figure(top,"company","hires","company","Top Recruiters (Placed+Shortlisted)", text="hires", height=600, angle=45)
+
 def plot_top_recruiters(df):
-    top = df[df["Placement_status"].isin(["Placed","Shortlisted"])]
-    top = top.groupby("company")["usn"].nunique().reset_index(name="hires").sort_values("hires",ascending=False)
+    render_top_recruiters(top_recruiters_stats(df))
+
+@timed
+def render_top_recruiters(top, key=None):
     if top.empty: 
         return st.info("⚠ No recruiter data.")
-    
-    make_bar(top,"company","hires","company","Top Recruiters (Placed+Shortlisted)", text="hires", height=600, angle=45)
+
+    show_figure(lambda: top_recruiters_figure(top), key)
 
     # --- Text Analysis ---
     top_company = top.iloc[0]["company"]
@@ -88,27 +241,27 @@ def plot_top_recruiters(df):
     """)
 
 # --- CGPA bins ---
-def plot_cgpa_bins(df, colors):
-    df["cgpa_bin"] = df["cgpa"].apply(bin_cgpa_value)
-    df = df[df["cgpa_bin"]!="Unknown"]
-    order = ["<6","6-7","7-8","8-9","9-10"]
+def cgpa_figure(stats, title):
+    return bar_figure(stats,"cgpa_bin","count","cgpa_bin",title, order=CGPA_ORDER, height=500)
+
+def plot_cgpa_bins(df):
+    render_cgpa_bins(*cgpa_bin_stats(df))
+
+@timed
+def render_cgpa_bins(stats_all, stats_p, dominant_bin, key=None):
     col1,col2 = st.columns(2)
 
     with col1:
-        stats_all = df.groupby("cgpa_bin")["usn"].nunique().reset_index(name="count")
-        make_bar(stats_all,"cgpa_bin","count","cgpa_bin","CGPA Distribution (All)", order=order, height=500)
+        show_figure(lambda: cgpa_figure(stats_all, "CGPA Distribution (All)"), chart_key(key, "all"))
 
     with col2:
-        placed = df[df["Placement_status"].isin(["Placed","Shortlisted"])]
-        if placed.empty: 
+        if stats_p.empty:
             st.info("⚠ No placed/shortlisted CGPA data.")
         else:
-            stats_p = placed.groupby("cgpa_bin")["usn"].nunique().reset_index(name="count")
-            make_bar(stats_p,"cgpa_bin","count","cgpa_bin","CGPA Distribution (Placed+Shortlisted)", order=order, height=500)
+            show_figure(lambda: cgpa_figure(stats_p, "CGPA Distribution (Placed+Shortlisted)"), chart_key(key, "placed"))
 
     # --- Text Analysis ---
-    if not df.empty:
-        dominant_bin = df["cgpa_bin"].mode()[0]
+    if dominant_bin is not None:
         st.markdown(f"""
         🔎 **Analysis:**  
         - Most students who are not placed fall in the **{dominant_bin} CGPA range**.  
@@ -116,12 +269,19 @@ def plot_cgpa_bins(df, colors):
 
 # --- Salary Trends ---
 def plot_salary_trends(df):
-    stats = df[df["Placement_status"]=="Placed"].groupby("company")["ctc"].agg(highest="max",lowest="min",average="mean").reset_index()
-    if stats.empty: 
-        return st.info("⚠ No salary data.")
+    render_salary_trends(salary_stats(df))
+
+def salary_figure(stats):
+    import plotly.express as px
     fig = px.pie(stats, names="company", values="average", title="Average Salary Distribution", color_discrete_sequence=px.colors.qualitative.Set3)
     fig.update_traces(textinfo="percent+label")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+@timed
+def render_salary_trends(stats, key=None):
+    if stats.empty: 
+        return st.info("⚠ No salary data.")
+    show_figure(lambda: salary_figure(stats), key)
 
     # --- Text Analysis ---
     top_salary = stats["average"].max()
@@ -132,14 +292,18 @@ def plot_salary_trends(df):
     """)
 
 # --- Conversion Rates ---
+def conversion_figure(conv):
+    return bar_figure(conv.sort_values("conversion",ascending=False),"company","conversion","company",
+                      "Interview-to-Offer Conversion (%)", text="conversion", height=600, angle=45)
+
 def plot_conversion_rates(df):
-    if df.empty: 
-        return st.info("⚠ No conversion rate data.")
-    conv = df.groupby("company").apply(lambda x: x[x["Placement_status"]=="Placed"]["usn"].nunique()/x["usn"].nunique()*100 if x["usn"].nunique()>0 else 0).reset_index().rename(columns={0:"conversion"})
+    render_conversion_rates(conversion_stats(df))
+
+@timed
+def render_conversion_rates(conv, key=None):
     if conv.empty: 
         return st.info("⚠ No conversion rate data.")
-    conv["conversion"] = conv["conversion"].round().astype(int)
-    make_bar(conv.sort_values("conversion",ascending=False),"company","conversion","company","Interview-to-Offer Conversion (%)", text="conversion", height=600, angle=45)
+    show_figure(lambda: conversion_figure(conv), key)
 
     # --- Text Analysis ---
     best_company = conv.loc[conv["conversion"].idxmax(), "company"]
@@ -148,3 +312,34 @@ def plot_conversion_rates(df):
     🔎 **Analysis:**  
     - **{best_company}** shows the **highest interview-to-offer conversion rate** at **{best_rate}%**.  
     """)
+
+# --- Placement Trends ---
+def trend_figure(trend, metric, by=None):
+    import plotly.express as px
+    fig = px.line(trend, x="batch", y=metric, color=by, markers=True,
+                  title=f"{TREND_METRICS[metric]} by Batch", hover_data=["students", f"{metric}_yoy"])
+    fig.update_layout(xaxis_title="Batch", yaxis_title=TREND_METRICS[metric], xaxis_type="category",
+                      legend_title=by.title() if by else None)
+    return fig
+
+def plot_trends(df, metric="placement_rate", by="dept", window=1):
+    render_trends(TrendEngine(df).trends(by, window), metric, by)
+
+@timed
+def render_trends(trend, metric, by=None, key=None):
+    trend = trend[trend[metric].notna()]
+    if trend.empty:
+        return st.info("⚠ No trend data.")
+    show_figure(lambda: trend_figure(trend, metric, by), key)
+
+    # --- Text Analysis ---
+    batch = trend["batch"].max()
+    latest = trend[trend["batch"] == batch]
+    best = latest.loc[latest[metric].idxmax()]
+    change = best[f"{metric}_yoy"]
+    delta = "" if pd.isna(change) else f" ({change:+.2f} vs. the previous batch)"
+    subject = f"**{best[by]}** leads batch **{batch}**" if by else f"Batch **{batch}**"
+    st.markdown(f"""
+    🔎 **Analysis:**  
+    - {subject} at **{best[metric]:.2f}**{delta}.
+    """)
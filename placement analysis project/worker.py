@@ -0,0 +1,335 @@
+import argparse
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+import analyzer
+import backends
+import visualization as vz
+from cube import cube_for, sketch_cube_for
+from figure_cache import figure_cache
+from metrics import MetricsEngine
+from profiling import stage
+from records import PAGE_SIZES, RecordsView
+from store import shared_store
+from trends import trends_for
+
+# The aggregation worker owns the loaded data and answers aggregate queries
+# for any number of dashboards (PLACEMENT_QUERY_MODE=worker) over a local
+# socket. Aggregates run in a process pool, so viewers use every core
+# instead of queueing on one Streamlit process, and every result is shared
+# by all of them through one cache.
+WORKER_ADDRESS = os.environ.get("PLACEMENT_WORKER", "localhost:6399")
+# "metrics" answers every aggregate of a filter set from one reduction of
+# its rows (see metrics), the cubes from a prebuilt cube per pool process
+WORKER_MODES = ["metrics", "pandas", "cube", "sketch"]
+LOOPBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+BACKLOG = 128   # pending connections; Listener's default of 1 drops simultaneous connects
+
+# Requests are pickled, so the authkey is all that stands between a client
+# and running code in the worker. PLACEMENT_WORKER_AUTHKEY sets it (needed
+# for clients on other hosts); otherwise the first worker started creates
+# a random key in AUTHKEY_PATH, readable by its owner only, that local
+# dashboards read.
+AUTHKEY_PATH = os.environ.get("PLACEMENT_WORKER_AUTHKEY_FILE",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), ".worker_authkey"))
+
+class WorkerError(Exception):
+    pass
+
+def worker_authkey(create=False):
+    key = os.environ.get("PLACEMENT_WORKER_AUTHKEY")
+    if key:
+        return key.encode()
+    if create:
+        try:
+            fd = os.open(AUTHKEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+    try:
+        with open(AUTHKEY_PATH) as f:
+            return f.read().strip().encode()
+    except FileNotFoundError:
+        raise WorkerError(f"No aggregation worker authkey: set PLACEMENT_WORKER_AUTHKEY, or start the "
+                          f"worker on this machine to create {AUTHKEY_PATH}") from None
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "localhost", int(port)
+
+def pool_context():
+    # Not fork: the server has live connection threads when it (re)starts a pool
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+# --- Pool processes ---
+# Each one gets the combined frame of one data version (pickled, or mapped
+# from the same file with an Arrow snapshot backend) and builds its own
+# cube (or filter index) from it up front.
+_frame = None
+_mode = None
+_index = None
+
+def init_worker(frame, mode):
+    global _frame, _mode, _index
+    _frame, _mode = backends.unshared(frame), mode
+    if mode in ("metrics", "pandas"):
+        _index = analyzer.FilterIndex(_frame)
+    else:
+        (cube_for if mode == "cube" else sketch_cube_for)(_frame)
+
+def filtered(filters):
+    return analyzer.apply_filters(_frame, *filters, index=_index)
+
+def compute(kind, args):
+    if kind == "trends":
+        return trends_for(_frame).trends(*args)
+    if kind == "metrics":
+        return MetricsEngine(filtered(args)).metrics()
+    name, filters = args
+    if _mode == "pandas":
+        return vz.compute_aggregate(filtered(filters), name)
+    return (cube_for if _mode == "cube" else sketch_cube_for)(_frame).slice(*filters).aggregate(name)
+
+
+# --- Server ---
+class AggregationServer:
+    def __init__(self, address=WORKER_ADDRESS, authkey=None, mode="metrics", processes=None):
+        self.address = parse_address(address)
+        self.authkey = authkey or worker_authkey(create=True)
+        self.mode = mode
+        self.processes = processes or os.cpu_count()
+        self._version = None
+        self._pool = None
+        self._pending = {}
+        self._lock = threading.RLock()   # done-callbacks may run inline, under it
+        self.methods = {
+            "info": self.info, "refresh": self.refresh, "options": self.options,
+            "aggregate": self.aggregate, "aggregates": self.aggregates,
+            "records": self.records, "records_page": self.records_page, "record_count": self.record_count,
+            "trends": self.trends,
+        }
+
+    def current(self):
+        # The store reloads when the data changed; a new version gets a new pool
+        snapshot = shared_store.current()
+        with self._lock:
+            if self._version != snapshot.version:
+                old = self._pool
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=pool_context(), initializer=init_worker,
+                                                 initargs=(backends.shareable(snapshot.combined_df), self.mode))
+                self._version = snapshot.version
+                if old is not None:
+                    old.shutdown(wait=False)
+            return snapshot, self._pool
+
+    def submit(self, kind, args):
+        # A future for the result, shared by every request for the same key
+        # while it is being computed and cached for later ones
+        snapshot, pool = self.current()
+        key = ("worker", self.mode, snapshot.version, kind) + tuple(args)
+        value = figure_cache.peek(key)
+        if value is not None:
+            future = Future()
+            future.set_result(value)
+            return future
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = pool.submit(compute, kind, args)
+                future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        if future.exception() is None:
+            figure_cache.put(key, future.result())
+        with self._lock:
+            self._pending.pop(key, None)
+
+    # --- Methods ---
+    def info(self):
+        snapshot, _ = self.current()
+        return {"version": snapshot.version, "mode": self.mode, "processes": self.processes,
+                "backend": backends.current_backend().name, "rows": len(snapshot.combined_df)}
+
+    def refresh(self):
+        analyzer.invalidate_data()
+        return self.info()
+
+    def options(self):
+        return self.current()[0].options
+
+    def aggregate(self, name, *filters):
+        if self.mode == "metrics":
+            return self.aggregates(*filters)[name]
+        return self.submit("aggregate", (name, filters)).result()
+
+    def aggregates(self, *filters):
+        if self.mode == "metrics":
+            return self.submit("metrics", filters).result()
+        futures = {name: self.submit("aggregate", (name, filters)) for name in vz.AGGREGATES}
+        return {name: future.result() for name, future in futures.items()}
+
+    def records(self, *filters):
+        snapshot, _ = self.current()
+        return analyzer.apply_filters(snapshot.combined_df, *filters, index=snapshot.filter_index)
+
+    def records_view(self, filters):
+        # The filtered rows stay here; clients get one page at a time
+        snapshot, _ = self.current()
+        key = ("worker", "records", snapshot.version) + tuple(filters)
+        return figure_cache.get(key, lambda: RecordsView(self.records(*filters)))
+
+    def records_page(self, filters, *page_args):
+        return self.records_view(filters).page(*page_args)
+
+    def record_count(self, filters, search=""):
+        return self.records_view(filters).count(search)
+
+    def trends(self, by=None, window=1, dept_filter="All", company_filter="All"):
+        return self.submit("trends", (by, window, dept_filter, company_filter)).result()
+
+    # --- Connections ---
+    def handle(self, conn):
+        # Authenticated here rather than in accept(), so a slow client
+        # cannot hold up everyone else's connections
+        with conn:
+            try:
+                deliver_challenge(conn, self.authkey)
+                answer_challenge(conn, self.authkey)
+            except (multiprocessing.AuthenticationError, EOFError, OSError):
+                return
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self.methods[method](*args))
+                except Exception as exc:
+                    reply = ("error", f"{type(exc).__name__}: {exc}")
+                conn.send(reply)
+
+    def serve_forever(self):
+        self.current()
+        with Listener(self.address, backlog=BACKLOG) as listener:
+            print(f"aggregation worker on {self.address[0]}:{self.address[1]} "
+                  f"({self.mode} mode, {self.processes} processes)")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+
+# --- Client ---
+# One connection per thread (Streamlit runs each session's script in its
+# own thread); reconnects once if the worker was restarted.
+class AggregationClient:
+    def __init__(self, address=WORKER_ADDRESS, authkey=None):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Read on connect: the worker may create the key after the client
+            authkey = self.authkey or worker_authkey()
+            try:
+                conn = self._local.conn = Client(parse_address(self.address), authkey=authkey)
+            except (ConnectionRefusedError, FileNotFoundError) as exc:
+                raise WorkerError(f"No aggregation worker at {self.address} (start one with python worker.py)") from exc
+            except multiprocessing.AuthenticationError as exc:
+                raise WorkerError(f"The aggregation worker at {self.address} rejected this authkey "
+                                  "(check PLACEMENT_WORKER_AUTHKEY)") from exc
+        return conn
+
+    def call(self, method, *args):
+        with stage(f"worker.{method}"):
+            for attempt in range(2):
+                conn = self._connection()
+                try:
+                    conn.send((method, args))
+                    status, value = conn.recv()
+                    break
+                except (EOFError, OSError):
+                    self._local.conn = None
+                    if attempt:
+                        raise WorkerError(f"Lost the connection to the aggregation worker at {self.address}")
+        if status == "error":
+            raise WorkerError(value)
+        return value
+
+    def info(self):
+        return self.call("info")
+
+    def refresh(self):
+        return self.call("refresh")
+
+    def filter_options(self):
+        return self.call("options")
+
+    def aggregate(self, name, *filters):
+        return self.call("aggregate", name, *filters)
+
+    def aggregates(self, *filters):
+        return self.call("aggregates", *filters)
+
+    def records(self, *filters):
+        return self.call("records", *filters)
+
+    def records_view(self, *filters):
+        return WorkerRecordsView(self, filters)
+
+    def trends(self, by=None, window=1, dept_filter="All", company_filter="All"):
+        return self.call("trends", by, window, dept_filter, company_filter)
+
+# Pages of the records table, paged and pivoted in the worker so only the
+# rows shown cross the socket (same interface as records.RecordsView)
+class WorkerRecordsView:
+    page_count = RecordsView.page_count
+
+    def __init__(self, client, filters):
+        self.client = client
+        self.filters = tuple(filters)
+
+    def count(self, search=""):
+        return self.client.call("record_count", self.filters, search)
+
+    def page(self, page=1, page_size=PAGE_SIZES[0], sort_by="usn", ascending=True, search=""):
+        return self.client.call("records_page", self.filters, page, page_size, sort_by, ascending, search)
+
+_client = None
+
+def default_client():
+    global _client
+    if _client is None:
+        _client = AggregationClient()
+    return _client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve dashboard aggregates from a shared worker process pool")
+    parser.add_argument("--address", default=WORKER_ADDRESS, help="host:port to listen on (default: PLACEMENT_WORKER)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="listen on a non-loopback address (clients there need PLACEMENT_WORKER_AUTHKEY)")
+    parser.add_argument("--mode", choices=WORKER_MODES, default="metrics")
+    parser.add_argument("--processes", type=int, default=None, help="pool processes (default: CPU count)")
+    parser.add_argument("--backend", help="mysql, sqlite:<file>, parquet:<directory> or arrow:<directory> (default: PLACEMENT_BACKEND)")
+    args = parser.parse_args(argv)
+    host, _ = parse_address(args.address)
+    if host not in LOOPBACK_HOSTS and not args.allow_remote:
+        parser.error(f"{host} is not a loopback address; pass --allow-remote to listen on it")
+
+    if args.backend:
+        backends.configure_backend(args.backend)
+    AggregationServer(args.address, mode=args.mode, processes=args.processes).serve_forever()
+
+if __name__ == "__main__":
+    main()